@@ -0,0 +1,156 @@
+"""
+Module: Change Detection
+Description: Decides which files the Embedder must (re)index or purge.
+
+Works on column projections of the 'files' table and NumPy/Arrow masks:
+  1. Read only (file_path, last_modified, status, chunk_count).
+  2. Stat every path once, in parallel, into two NumPy arrays.
+  3. Compare everything in one vectorized pass.
+Full rows are fetched only for the files that actually need work; files
+edited since the last scan are hashed again.
+"""
+
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from concurrent.futures import ThreadPoolExecutor
+
+from src.common.db import (
+    STATUS_DELETED, STATUS_PENDING, read_columns, sql_in,
+)
+from src.agents.scanner_agent.hasher import hash_file_full
+
+STATE_COLUMNS = ['file_path', 'last_modified', 'status', 'chunk_count']
+
+# Seconds of mtime drift tolerated before a file counts as edited
+MTIME_TOLERANCE = 1.0
+# Threads for the stat pass (stat is I/O bound, especially on external drives)
+STAT_WORKERS = 16
+# Paths per SQL `IN (...)` when fetching the full rows of selected files
+FETCH_BATCH = 500
+
+
+def stat_paths(paths, workers: int = STAT_WORKERS):
+    """
+    One batched stat pass over the filesystem.
+    Returns (exists: bool[], mtime: float64[]) aligned with `paths`.
+    """
+    n = len(paths)
+    exists = np.zeros(n, dtype=bool)
+    mtime = np.zeros(n, dtype=np.float64)
+    if n == 0:
+        return exists, mtime
+
+    def _stat_range(bounds):
+        # Each thread fills its own slice of the arrays, so no locking is needed.
+        lo, hi = bounds
+        for i in range(lo, hi):
+            try:
+                mtime[i] = os.stat(paths[i]).st_mtime
+                exists[i] = True
+            except OSError:
+                pass
+
+    step = max(1, -(-n // (workers * 4)))
+    ranges = [(lo, min(lo + step, n)) for lo in range(0, n, step)]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stat") as pool:
+        list(pool.map(_stat_range, ranges))
+    return exists, mtime
+
+
+def detect_changes(status: pa.Array, chunk_count: np.ndarray, db_mtime: np.ndarray,
+                   exists: np.ndarray, disk_mtime: np.ndarray):
+    """
+    Pure vectorized decision logic (no I/O).
+    Returns three boolean masks:
+        purge  - gone from disk: drop its chunks and mark it deleted
+        embed  - pending, or edited on disk since the last scan
+        stale  - to be re-embedded while old chunks are still stored
+    """
+    is_deleted = pc.equal(status, STATUS_DELETED).to_numpy(zero_copy_only=False)
+    is_pending = pc.equal(status, STATUS_PENDING).to_numpy(zero_copy_only=False)
+    has_chunks = chunk_count > 0
+
+    gone = is_deleted | ~exists
+    # Skip rows that are already marked deleted and hold no chunks.
+    purge = gone & (has_chunks | ~is_deleted)
+    embed = ~gone & (is_pending | (disk_mtime - db_mtime > MTIME_TOLERANCE))
+    stale = embed & has_chunks
+    return purge, embed, stale
+
+
+def fetch_rows(files_table, state: pa.Table, mask: np.ndarray, total_files=None):
+    """
+    Full 'files' rows for the selected files, as plain dicts.
+    Small selections (relative to `total_files`, default: the rows in `state`)
+    use `IN` lookups; large ones read the table once.
+    """
+    if not mask.any():
+        return []
+    paths = state['file_path'].filter(pa.array(mask)).to_pylist()
+    if len(paths) > (total_files or len(mask)) // 10:
+        full = files_table.to_arrow()
+        wanted = pc.is_in(full['file_path'], value_set=pa.array(paths))
+        return full.filter(wanted).to_pylist()
+    rows = []
+    for i in range(0, len(paths), FETCH_BATCH):
+        batch = paths[i:i + FETCH_BATCH]
+        rows.extend(files_table.search().where(sql_in("file_path", batch)).limit(None).to_list())
+    return rows
+
+
+def rehash_edited(tasks, workers: int = STAT_WORKERS):
+    """
+    Fresh full content hashes for files edited since the scan. The stored hash
+    predates the edit, and it keys the reuse of stored extractions and chunk
+    ids. Always full: a sampled hash can miss an edit between its samples.
+    """
+    if not tasks:
+        return
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rehash") as pool:
+        for task, file_hash in zip(tasks, pool.map(lambda t: hash_file_full(t['file_path']), tasks)):
+            if file_hash:
+                task.update(file_hash=file_hash, hash_mode='full')
+
+
+def identify_tasks(files_table, paths=None):
+    """
+    Returns (tasks, purge_rows, stale_paths, total_files).
+      tasks       - full rows of files to (re)index, last_modified refreshed from disk
+      purge_rows  - full rows of files that disappeared
+      stale_paths - paths whose stored chunks must be removed (re-indexed or gone)
+    `paths` limits the check to those files (watch mode) instead of the whole
+    table; an empty list checks nothing.
+    """
+    if paths is not None and not paths:
+        return [], [], [], 0
+    where = sql_in('file_path', paths) if paths is not None else None
+    state = read_columns(files_table, STATE_COLUMNS, where=where)
+    total = state.num_rows
+    if total == 0:
+        return [], [], [], 0
+    table_rows = files_table.count_rows() if paths is not None else total
+
+    paths = state['file_path'].to_pylist()
+    db_mtime = pc.fill_null(state['last_modified'], 0.0).to_numpy(zero_copy_only=False)
+    chunk_count = pc.fill_null(state['chunk_count'], 0).to_numpy(zero_copy_only=False)
+
+    exists, disk_mtime = stat_paths(paths)
+    purge, embed, stale = detect_changes(state['status'], chunk_count, db_mtime, exists, disk_mtime)
+
+    tasks = fetch_rows(files_table, state, embed, table_rows)
+    # Carry the newest mtime so a file edited after the last scan is not re-queued
+    # forever, and hash edited files again so their old stored text is not reused
+    disk_by_path = dict(zip(state['file_path'].filter(pa.array(embed)).to_pylist(), disk_mtime[embed].tolist()))
+    edited = []
+    for task in tasks:
+        disk = disk_by_path.get(task['file_path'], 0.0)
+        if disk - task['last_modified'] > MTIME_TOLERANCE:
+            edited.append(task)
+        task['last_modified'] = max(task['last_modified'], disk)
+    rehash_edited(edited)
+
+    purge_rows = fetch_rows(files_table, state, purge, table_rows)
+    stale_paths = state['file_path'].filter(pa.array(stale | purge)).to_pylist()
+    return tasks, purge_rows, stale_paths, total
@@ -0,0 +1,174 @@
+"""
+Module: Embedding Cache
+Description: Persistent chunk-level cache so unchanged text is never re-embedded.
+
+Key = xxh64(MODEL_NAME + exact `_embedding_input`).
+  - A renamed folder, a duplicate copy or a small edit re-chunks the file, but
+    most chunk inputs are byte-identical to ones already embedded: those are
+    served from the cache and only the new ones reach model.encode.
+  - The model name is part of the key, so switching models never returns
+    vectors from the old one.
+
+Storage is a LanceDB side table ('embedding_cache'). Only the key column is
+kept in RAM; vectors are fetched for confirmed hits only. The table is bounded
+by `embedding_cache.max_entries`: least recently used entries are evicted at
+the end of each run.
+"""
+
+import time
+import numpy as np
+import xxhash
+
+from src.common.db import (
+    CachedEmbedding, EMBED_CACHE_TABLE, VECTOR_DIM, connect, read_columns, sql_in,
+)
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+CACHE_CFG = SETTINGS.get('embedding_cache', {})
+CACHE_ENABLED = CACHE_CFG.get('enabled', True)
+MAX_ENTRIES = CACHE_CFG.get('max_entries', 250_000)
+
+# New entries buffered before one append (avoids thousands of tiny fragments)
+FLUSH_EVERY = 2000
+# Keys per SQL `IN (...)` when fetching, touching or evicting entries
+KEY_BATCH = 500
+# Below this size a full scan is as fast as a scalar index
+INDEX_MIN_ROWS = 10_000
+
+
+def _open_table():
+    """Opens the cache table, rebuilding it if the vector size changed."""
+    db = connect()
+    if EMBED_CACHE_TABLE in db.table_names():
+        table = db.open_table(EMBED_CACHE_TABLE)
+        if table.schema.field('vector').type.list_size == VECTOR_DIM:
+            return table
+        print(f"   🧽 Embedding cache holds another vector size; rebuilding for {VECTOR_DIM} dims.")
+    return db.create_table(EMBED_CACHE_TABLE, schema=CachedEmbedding, mode="overwrite")
+
+
+class EmbeddingCache:
+    """
+    Usage (single thread):
+        cache = EmbeddingCache(MODEL_NAME)
+        vectors = cache.encode(model, inputs)   # drop-in for model.encode
+        cache.close()                           # flush, refresh LRU, evict
+    """
+
+    def __init__(self, model_name, max_entries=MAX_ENTRIES):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.table = _open_table()
+        self.keys = set(read_columns(self.table, ['key'])['key'].to_pylist())
+
+        self.new_keys, self.new_vectors = [], []   # Not yet written to the table
+        self.pending = {}                          # key -> vector, for the buffer above
+        self.touched = set()                       # Hits whose last_used must move
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        return xxhash.xxh64((self.model_name + "\0" + text).encode('utf-8')).hexdigest()
+
+    # --- LOOKUP + ENCODE ---
+    def encode(self, model, inputs):
+        """Returns a float32 matrix aligned with `inputs`; only cache misses are encoded."""
+        keys = [self.key(text) for text in inputs]
+        found = self._lookup(keys)
+
+        # Identical inputs inside one batch are encoded once
+        missing = {}
+        for k, text in zip(keys, inputs):
+            if k not in found and k not in missing:
+                missing[k] = text
+
+        if missing:
+            encoded = np.asarray(
+                model.encode(list(missing.values()), batch_size=len(missing), show_progress_bar=False),
+                dtype=np.float32,
+            )
+            for k, vector in zip(missing, encoded):
+                found[k] = vector
+                self._store(k, vector)
+
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+        return np.stack([found[k] for k in keys])
+
+    def _lookup(self, keys):
+        found = {}
+        to_fetch = []
+        for k in set(keys):
+            if k in self.pending:
+                found[k] = self.pending[k]
+            elif k in self.keys:
+                to_fetch.append(k)
+
+        for i in range(0, len(to_fetch), KEY_BATCH):
+            rows = read_columns(self.table, ['key', 'vector'], where=sql_in('key', to_fetch[i:i + KEY_BATCH]))
+            if rows.num_rows == 0:
+                continue
+            matrix = rows['vector'].combine_chunks().flatten().to_numpy().reshape(-1, VECTOR_DIM)
+            for k, vector in zip(rows['key'].to_pylist(), matrix):
+                found[k] = vector.astype(np.float32)
+        self.touched.update(k for k in to_fetch if k in found)
+        return found
+
+    # --- WRITES ---
+    def _store(self, key, vector):
+        self.pending[key] = vector
+        self.new_keys.append(key)
+        self.new_vectors.append(vector)
+        if len(self.new_keys) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if not self.new_keys:
+            return
+        now = time.time()
+        self.table.add([
+            {'key': k, 'model': self.model_name, 'vector': v.tolist(), 'last_used': now}
+            for k, v in zip(self.new_keys, self.new_vectors)
+        ])
+        self.keys.update(self.new_keys)
+        self.new_keys, self.new_vectors, self.pending = [], [], {}
+
+    def close(self):
+        """End of run: persist new vectors, refresh hit entries, enforce the size bound."""
+        self.flush()
+        now = time.time()
+        touched = list(self.touched)
+        for i in range(0, len(touched), KEY_BATCH):
+            self.table.update(where=sql_in('key', touched[i:i + KEY_BATCH]), values={'last_used': now})
+        self.touched.clear()
+        self._evict()
+
+        rows = self.table.count_rows()
+        if rows >= INDEX_MIN_ROWS and not any(i.columns == ['key'] for i in self.table.list_indices()):
+            self.table.create_scalar_index('key')
+        if self.hits + self.misses:
+            self.table.optimize()
+
+    def _evict(self):
+        excess = self.table.count_rows() - self.max_entries
+        if excess <= 0:
+            return
+        # Oldest `last_used` first. Entries written by one flush share a timestamp,
+        # so the boundary timestamp is trimmed key by key.
+        state = read_columns(self.table, ['key', 'last_used'])
+        last_used = state['last_used'].to_numpy()
+        cutoff = float(np.partition(last_used, excess - 1)[excess - 1])
+        self.table.delete(f"last_used < {cutoff!r}")
+        older = int((last_used < cutoff).sum())
+        ties = [k for k, t in zip(state['key'].to_pylist(), last_used) if t == cutoff][:excess - older]
+        for i in range(0, len(ties), KEY_BATCH):
+            self.table.delete(sql_in('key', ties[i:i + KEY_BATCH]))
+
+        self.keys = set(read_columns(self.table, ['key'])['key'].to_pylist())
+        print(f"   🧽 Embedding cache over {self.max_entries:,} entries: evicted {excess:,} least recently used.")
+
+    def report(self):
+        total = max(self.hits + self.misses, 1)
+        return (f"🗃️  Embedding cache: {self.hits} hits / {self.misses} encoded "
+                f"({self.hits / total:.0%} reused) | {len(self.keys):,} entries")
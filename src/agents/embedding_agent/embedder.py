@@ -1,208 +1,181 @@
 import time
+from contextlib import nullcontext
 
 import os
 # SILENCE WARNINGS: Must be set before importing transformers
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-import gc
-import pandas as pd
-import numpy as np
-from concurrent.futures import ProcessPoolExecutor
 from sentence_transformers import SentenceTransformer
-from src.common.db import get_table
+from src.common.vector_index import ensure_vector_index
+from src.common.text_index import ensure_text_index
+from src.common.scalar_index import ensure_scalar_indexes
+from src.common.db import STATUS_DELETED, STATUS_PENDING, get_files_table, get_table, sql_in
+from src.agents.embedding_agent.changes import identify_tasks
+from src.agents.embedding_agent.worker import process_file_wrapper
+from src.agents.embedding_agent.worker_pool import (
+    MAX_TASKS_PER_WORKER, WORKER_RSS_LIMIT_MB, RecyclingPool,
+)
+from src.agents.embedding_agent.scheduler import CostScheduler
+from src.extractors.ocr_service import SERVICE_ENABLED as OCR_SERVICE_ENABLED, OCRService
+from src.agents.embedding_agent.pipeline import ENCODE_BATCH, WRITE_BATCH, Pipeline
+from src.agents.embedding_agent.embed_cache import CACHE_ENABLED, EmbeddingCache
+from src.agents.embedding_agent.extraction_store import ExtractionStore
+from src.agents.embedding_agent.journal import IngestJournal
 from src.config.loader import SETTINGS
 
 # 1. LOAD CONFIG
 MODEL_NAME = SETTINGS['system']['model_name']
 EXPECTED_DIM = SETTINGS['system']['model_dimension']
 
-# MEMORY FIX:
-# We match Batch Size to Max Workers (4).
-# This ensures we process exactly one set of files, then STOP and FLUSH.
-BATCH_SIZE = SETTINGS['system']['max_workers'] 
+# Columns copied from the 'files' row onto each of its chunks
+CHUNK_METADATA = ['filename', 'file_path', 'file_type', 'file_size_bytes',
+                  'creation_date', 'last_modified', 'category']
+
+def chunk_template(file_row):
+    """The fields every chunk of a file shares. 'id' is the content hash."""
+    record = {k: file_row[k] for k in CHUNK_METADATA}
+    record['id'] = file_row['file_hash']
+    record['summary'] = ""
+    return record
+
+def delete_chunks(table, file_paths):
+    """Removes every chunk belonging to the given files, in SQL-sized batches."""
+    batch_size = 50
+    for i in range(0, len(file_paths), batch_size):
+        batch = file_paths[i:i+batch_size]
+        try: table.delete(sql_in("file_path", batch))
+        except Exception as e: print(f"     ⚠️ Cleanup Error: {e}")
+
+def mark_files(files_table, rows):
+    """Writes updated 'files' rows back in a single commit."""
+    if not rows:
+        return
+    (files_table.merge_insert("file_path")
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .execute(rows))
+
+def ensure_indexes(table):
+    """Brings the chunk table's search indexes up to date (cheap when they already are)."""
+    # Brute force until the table is big enough, then IVF_PQ kept in sync with ingests
+    ensure_vector_index(table)
+    # BM25 over content + filename for exact tokens (IDs, form codes)
+    ensure_text_index(table)
+    # Metadata indexes so filtered searches (type, date, folder, category) prefilter cheaply
+    ensure_scalar_indexes(table)
+
+def load_model():
+    """The embedding model, on the Apple Neural Engine (MPS) when available."""
+    try:
+        model = SentenceTransformer(MODEL_NAME, device='mps')
+        print("   ✅ Neural Engine (MPS) Enabled for Embeddings")
+    except:
+        model = SentenceTransformer(MODEL_NAME)
+        print("   ⚠️ Running on CPU")
+    return model
+
+def open_pool():
+    """The extraction worker pool (one per run, or kept open by watch mode)."""
+    # One OCR engine for all workers, fed in batches (see ocr_service.py)
+    services = [OCRService()] if OCR_SERVICE_ENABLED else []
+    return RecyclingPool(process_file_wrapper, workers=SETTINGS['system']['max_workers'],
+                         scheduler=CostScheduler(), services=services)
 
-def process_file_wrapper(row_dict):
+def embed_documents(reindex=False, paths=None, model=None, pool=None):
     """
-    Worker Function: Extracts content from file.
+    Embeds every pending or edited file.
+    `reindex=True` re-chunks and re-embeds everything (after changing chunk_size,
+    chunk_overlap or the model); stored extractions mean no file is OCR'd again.
+    `paths` limits the run to those files (watch mode); `model` and `pool`
+    reuse an already loaded model / running worker pool instead of starting
+    new ones for this run.
     """
-    # Lazy Import inside the process to keep it isolated
-    from src.common.factory import ExtractorFactory
-    from src.config.loader import SETTINGS
-
-    filename = row_dict['filename']
-    doc_id = row_dict['id']
-    file_path = row_dict['file_path']
-    
-    raw_type = str(row_dict['file_type']).lower()
-    file_type = raw_type if raw_type.startswith('.') else f".{raw_type}"
-    
-    extractor = ExtractorFactory.get_extractor(file_type)
-    if not extractor:
-        return []
-
-    chunks = []
-    try:
-        # Extract content
-        for page_num, content in extractor.extract(file_path):
-            if not content: continue
-
-            chunk_size = SETTINGS['system']['chunk_size']
-            overlap = SETTINGS['system']['chunk_overlap']
-            
-            start = 0
-            while start < len(content):
-                end = start + chunk_size
-                text_slice = content[start:end]
-                
-                embedding_input = f"Filename: {filename} Page: {page_num} Content: {text_slice}"
-                
-                record = row_dict.copy()
-                record['id'] = f"{doc_id}_p{page_num}_{start}" 
-                record['page_number'] = page_num
-                record['content'] = text_slice
-                record['_embedding_input'] = embedding_input 
-                
-                chunks.append(record)
-                
-                start += (chunk_size - overlap)
-                if start >= len(content): break
-            
-    except Exception as e:
-        print(f"❌ [Worker] Error processing {filename}: {e}")
-    
-    return chunks
-
-def embed_documents():
     print(f"🧠 Active Brain: {MODEL_NAME} (Target: {EXPECTED_DIM} dim)")
     
     # Force settings refresh
     num_workers = SETTINGS['system']['max_workers']
-    print(f"🚦 Parallel Mode: {num_workers} workers | Strict Batch Size: {BATCH_SIZE}")
+    print(f"🚦 Parallel Mode: {num_workers} workers (recycled every {MAX_TASKS_PER_WORKER} files "
+          f"or {WORKER_RSS_LIMIT_MB} MB) | Encode Batch: {ENCODE_BATCH} | Write Batch: {WRITE_BATCH}")
     
     table = get_table()
-    df = table.to_pandas()
-    
-    if df.empty:
-        print("⚠️ Database is empty. Waiting for Scanner...")
+    files_table = get_files_table()
+
+    # Finish the bookkeeping of a crashed / interrupted run before looking for work
+    journal = IngestJournal()
+    journal.recover(files_table)
+
+    if reindex:
+        print("🔁 Re-index requested: every known file goes back to pending.")
+        files_table.update(where=f"status != '{STATUS_DELETED}'", values={'status': STATUS_PENDING})
+
+    # --- 1. IDENTIFY TASKS ---
+    # Column projection of the manifest + one stat pass + vectorized compare.
+    t0 = time.time()
+    tasks, purge_rows, _, total_files = identify_tasks(files_table, paths)
+
+    if total_files == 0:
+        if paths is None:
+            print("⚠️ Database is empty. Waiting for Scanner...")
         return
+    print(f"📊 Analyzed {total_files} files for changes in {time.time() - t0:.2f}s")
 
-    # --- 1. DEDUPLICATION ---
-    total_rows = len(df)
-    df_clean = df.drop_duplicates(subset=['file_path'], keep='first')
-    if len(df_clean) < total_rows:
-        print(f"🧹 Removing {total_rows - len(df_clean)} duplicate rows...")
-        table.delete("true")
-        table.add(df_clean.to_dict('records'))
-        df = df_clean
-
-    # --- 2. IDENTIFY TASKS ---
-    tasks = []
-    files_to_delete = []
-    has_vector_col = 'vector' in df.columns
-
-    print(f"📊 Analyzing {len(df)} files for changes...")
-    
-    for _, row in df.iterrows():
-        f_path = row['file_path']
-        if not os.path.exists(f_path):
-            files_to_delete.append(f_path)
-            continue
-            
-        disk_mtime = os.path.getmtime(f_path)
-        db_mtime = row.get('last_modified', 0)
-        if pd.isna(db_mtime): db_mtime = 0
-        
-        val = row.get('vector')
-        should_reindex = False
-        
-        if not has_vector_col: should_reindex = True
-        elif val is None: should_reindex = True
-        elif isinstance(val, float) and pd.isna(val): should_reindex = True
-        elif hasattr(val, '__len__'):
-            if len(val) != EXPECTED_DIM: should_reindex = True
-            elif all(v == 0.0 for v in val): should_reindex = True
-        
-        if (disk_mtime - db_mtime > 1.0): should_reindex = True
-
-        if should_reindex:
-            files_to_delete.append(f_path) 
-            tasks.append(row.to_dict())
-
-    # --- 3. CLEANUP OLD DATA ---
+    # --- 2. CLEANUP OLD DATA ---
+    # Only files gone from disk lose their chunks up front. Edited files keep
+    # theirs (still searchable) until the writer swaps in the new ones.
+    files_to_delete = [r['file_path'] for r in purge_rows]
     if files_to_delete:
-        if len(files_to_delete) >= len(df):
-             print("🧹 Full Re-Index detected. Wiping table...")
-             table.delete("true")
-        else:
-            print(f"🧹 Cleaning {len(files_to_delete)} old entries...")
-            batch_size = 50
-            for i in range(0, len(files_to_delete), batch_size):
-                batch = files_to_delete[i:i+batch_size]
-                safe_names = [n.replace("'", "''") for n in batch]
-                where_clause = f"file_path IN ({', '.join([repr(n) for n in safe_names])})"
-                try: table.delete(where_clause)
-                except: pass
+        print(f"🧹 Cleaning old chunks of {len(files_to_delete)} files...")
+        delete_chunks(table, files_to_delete)
+    mark_files(files_table, [{**r, 'status': STATUS_DELETED, 'chunk_count': 0} for r in purge_rows])
 
     if not tasks:
+        # A migrated or already current store still gets its indexes
+        ensure_indexes(table)
         print("✅ Database is up to date.")
         return
 
-    # --- 4. EXECUTION ---
+    # --- 3. EXECUTION ---
     print(f"🚀 Processing {len(tasks)} files...")
     
-    try:
-        model = SentenceTransformer(MODEL_NAME, device='mps')
-        print("   ✅ Neural Engine (MPS) Enabled for Embeddings")
-    except:
-        model = SentenceTransformer(MODEL_NAME)
-        print("   ⚠️ Running on CPU")
+    if model is None:
+        model = load_model()
+
+    # Chunk texts embedded by earlier runs (renames, copies, small edits) skip the model
+    cache = EmbeddingCache(MODEL_NAME) if CACHE_ENABLED else None
+    # Files whose content was extracted before skip OCR/parsing entirely
+    extractions = ExtractionStore()
 
-    total_chunks_processed = 0
     start_time = time.time()
 
-    # Iterate through tasks in chunks
-    for i in range(0, len(tasks), BATCH_SIZE):
-        batch_tasks = tasks[i : i + BATCH_SIZE]
-        current_batch_num = (i // BATCH_SIZE) + 1
-        total_batches = (len(tasks) // BATCH_SIZE) + 1
-        
-        print(f"   [Batch {current_batch_num}/{total_batches}] Processing {len(batch_tasks)} files...")
-        
-        batch_chunks = []
-        
-        # A. EXTRACT (CPU Parallel)
-        # We RECREATE the executor for every batch or group of batches.
-        # This is slightly slower but guarantees memory is freed.
-        with ProcessPoolExecutor(max_workers=num_workers) as executor:
-            results = executor.map(process_file_wrapper, batch_tasks)
-            for res in results:
-                batch_chunks.extend(res)
-        
-        if not batch_chunks:
-            continue
-
-        # B. EMBED & SAVE
-        try:
-            inputs = [c.pop('_embedding_input') for c in batch_chunks]
-            
-            # Embed
-            vectors = model.encode(inputs, batch_size=32, show_progress_bar=False)
-            
-            current_time_val = time.time()
-            for idx, rec in enumerate(batch_chunks):
-                rec['vector'] = vectors[idx].tolist()
-                rec['last_modified'] = current_time_val
-            
-            table.add(batch_chunks, mode="append")
-            
-            total_chunks_processed += len(batch_chunks)
-            
-        except Exception as e:
-            print(f"     ❌ Batch Error: {e}")
-
-        # C. FLUSH MEMORY
-        del batch_chunks, inputs, vectors
-        gc.collect()
+    # One long-lived pool for the whole run. Workers recycle themselves
+    # (task quota / RSS watermark), so memory still saw-tooths.
+    # Extraction, embedding and writing overlap; bounded queues keep RAM flat.
+    # Every file is journaled; committed units survive a crash (see journal.py).
+    journal.start(tasks)
+    try:
+        with (nullcontext(pool) if pool is not None else open_pool()) as pool:
+            pipeline = Pipeline(pool, model, table, files_table, mark_files, cache, extractions, journal)
+            templates = ({**chunk_template(t), '_has_extraction': t['file_hash'] in extractions} for t in tasks)
+            total_chunks_processed = pipeline.run(tasks, templates)
+            print(pipeline.report())
+            print(f"   {pool.report()}")
+            if pool.scheduler is not None:
+                print(f"   {pool.scheduler.report()}")
+            for service in pool.services:
+                print(f"   {service.report()}")
+    finally:
+        # Also on Ctrl-C: text and vectors produced so far are kept for the resume
+        extractions.flush()
+        if cache is not None:
+            cache.flush()
+    journal.finish()
+
+    extractions.close(files_table)
+    if cache is not None:
+        cache.close()
+        print(f"   {cache.report()}")
+
+    ensure_indexes(table)
 
     print(f"✅ Pipeline Complete. Processed {total_chunks_processed} chunks in {time.time() - start_time:.2f}s")
 
@@ -0,0 +1,133 @@
+"""
+Module: Extraction Store
+Description: Persists extracted page text keyed by file content hash.
+
+OCR is by far the most expensive step of indexing. Once a file's pages have
+been extracted, their text is kept in the 'extractions' table, so:
+  - changing chunk_size / chunk_overlap      -> re-chunk stored text
+  - changing the embedding model              -> re-embed stored text
+  - moving / copying a file (same content)    -> no extraction at all
+
+Writes happen in the parent (pipeline writer), batched.
+Reads happen in the extraction workers, one file at a time, and only for
+hashes the parent already knows are stored (see `ExtractionStore`).
+"""
+
+import time
+
+from src.common.db import (
+    EXTRACTIONS_TABLE, STATUS_DELETED, ExtractedPage, connect, read_columns, sql_in,
+)
+
+# Stored rows buffered before one append
+FLUSH_EVERY = 1000
+# Hashes per SQL `IN (...)` when pruning
+HASH_BATCH = 500
+# Below this size a full scan is as fast as a scalar index
+INDEX_MIN_ROWS = 10_000
+
+
+def open_store():
+    """Opens (or creates) the 'extractions' table."""
+    db = connect()
+    if EXTRACTIONS_TABLE in db.table_names():
+        return db.open_table(EXTRACTIONS_TABLE)
+    return db.create_table(EXTRACTIONS_TABLE, schema=ExtractedPage)
+
+
+# --- WORKER SIDE ---
+_worker_table = None
+
+def load_pages(file_hash, extractor):
+    """
+    Stored pages for this content, as [(page_number, text, method)].
+    Returns None when nothing was stored by this extractor (extract again).
+    """
+    global _worker_table
+    if _worker_table is None:
+        _worker_table = open_store()
+
+    rows = read_columns(
+        _worker_table, ['seq', 'page_number', 'text', 'method', 'extractor'],
+        where=f"file_hash = '{file_hash}'",
+    ).to_pylist()
+    rows = [r for r in rows if r['extractor'] == extractor]
+    if not rows:
+        return None
+    rows.sort(key=lambda r: r['seq'])
+    # The empty marker row means "extracted before, no text"
+    return [(r['page_number'], r['text'], r['method']) for r in rows if r['text']]
+
+
+# --- PARENT SIDE ---
+class ExtractionStore:
+    """
+    Usage (single thread):
+        store = ExtractionStore()
+        if file_hash in store: ...            # worker can call load_pages()
+        store.add(file_hash, extractor, pages)
+        store.close()                          # flush, index, prune orphans
+    """
+
+    def __init__(self):
+        self.table = open_store()
+        self.hashes = set(read_columns(self.table, ['file_hash'])['file_hash'].to_pylist())
+        self.buffer = []
+        self.added = set()      # Hashes written by this run
+        self.replaced = []      # Hashes whose older rows must go before the next append
+
+    def __contains__(self, file_hash):
+        return file_hash in self.hashes
+
+    def add(self, file_hash, extractor, pages):
+        """
+        `pages` is the worker's [(page_number, text, method)] for one file.
+        A hash stored by an earlier run is only re-extracted when its extractor
+        changed, so its old rows are replaced.
+        """
+        if file_hash in self.added:
+            return  # Duplicate copy extracted twice in this run
+        if file_hash in self.hashes:
+            self.replaced.append(file_hash)
+        now = time.time()
+        rows = [
+            {'file_hash': file_hash, 'seq': seq, 'page_number': page, 'text': text,
+             'extractor': extractor, 'method': method, 'extracted_at': now}
+            for seq, (page, text, method) in enumerate(pages)
+        ]
+        if not rows:
+            rows = [{'file_hash': file_hash, 'seq': 0, 'page_number': 0, 'text': "",
+                     'extractor': extractor, 'method': "native", 'extracted_at': now}]
+        self.buffer.extend(rows)
+        self.hashes.add(file_hash)
+        self.added.add(file_hash)
+        if len(self.buffer) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        for i in range(0, len(self.replaced), HASH_BATCH):
+            self.table.delete(sql_in('file_hash', self.replaced[i:i + HASH_BATCH]))
+        self.replaced = []
+        if self.buffer:
+            self.table.add(self.buffer)
+            self.buffer = []
+
+    def close(self, files_table=None):
+        """Flushes, indexes file_hash once the table is large, and drops orphans."""
+        self.flush()
+        if files_table is not None:
+            self.prune(files_table)
+        if self.table.count_rows() >= INDEX_MIN_ROWS and \
+                not any(i.columns == ['file_hash'] for i in self.table.list_indices()):
+            self.table.create_scalar_index('file_hash')
+        if self.added:
+            self.table.optimize()
+
+    def prune(self, files_table):
+        """Removes text of contents no longer held by any live file."""
+        live = read_columns(files_table, ['file_hash'], where=f"status != '{STATUS_DELETED}'")
+        orphans = list(self.hashes - set(live['file_hash'].to_pylist()))
+        for i in range(0, len(orphans), HASH_BATCH):
+            self.table.delete(sql_in('file_hash', orphans[i:i + HASH_BATCH]))
+        self.hashes.difference_update(orphans)
+        return len(orphans)
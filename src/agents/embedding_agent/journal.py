@@ -0,0 +1,140 @@
+"""
+Module: Ingestion Journal
+Description: Durable progress log of an embed run, so a crash or Ctrl-C resumes
+             instead of starting over.
+
+Every file of a run moves through
+    pending -> extracted -> embedded -> committed
+and each step is one JSON line in <db_path>/ingest_journal.jsonl. The writer
+commits whole files in small units: chunks (one atomic LanceDB commit that
+also drops the file's old chunks), then the journal ('committed', fsync'd),
+then the 'files' table.
+
+On the next run an unfinished journal is recovered first:
+  - committed files whose 'files' row was not updated yet are marked now
+  - everything else is simply still pending; its extracted text is in the
+    Extraction Store and most of its vectors in the embedding cache, so
+    redoing it costs little
+and the journal is closed, so it is resumed once, not on every later run.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import Counter
+
+from src.common.db import DB_PATH, STATUS_PENDING, sql_in
+
+# Lives with the tables it describes (LanceDB ignores non-table files)
+JOURNAL_PATH = os.path.join(DB_PATH, 'ingest_journal.jsonl')
+STATES = ('pending', 'extracted', 'embedded', 'committed')
+
+
+class IngestJournal:
+    """Append-only JSONL log. Thread-safe: the pipeline stages all write to it."""
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    # --- RECOVERY ---
+    def read(self):
+        """Events of the last run, or [] if it finished cleanly (or there is none)."""
+        if not os.path.exists(self.path):
+            return []
+        events = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    break  # Torn last line from the crash
+        if not events or events[-1].get('event') == 'done':
+            return []
+        return events
+
+    def recover(self, files_table):
+        """
+        Applies what an interrupted run committed but did not mark in 'files',
+        then closes the journal (even if this run finds nothing to do).
+        Returns the number of files re-marked.
+        """
+        events = self.read()
+        if not events:
+            return 0
+        state = {}
+        for event in events:
+            if event.get('event') in STATES:
+                state[event['path']] = event
+        counts = Counter(e['event'] for e in state.values())
+        started = time.strftime('%Y-%m-%d %H:%M', time.localtime(events[0].get('t', 0)))
+        print(f"♻️  Resuming interrupted run from {started}: "
+              + ", ".join(f"{counts[s]} {s}" for s in STATES if counts[s]))
+
+        remarked = 0
+        for event in state.values():
+            if event['event'] != 'committed':
+                continue
+            where = (f"{sql_in('file_path', [event['path']])} AND {sql_in('file_hash', [event['hash']])} "
+                     f"AND status = '{STATUS_PENDING}'")
+            if files_table.count_rows(where):
+                files_table.update(where=where, values={
+                    'status': event['status'], 'chunk_count': event['chunks'], 'indexed_at': event['t'],
+                })
+                remarked += 1
+        if remarked:
+            print(f"   ✅ {remarked} committed files marked as done (not re-embedded)")
+        # Everything else is still 'pending' in 'files'; nothing left to resume
+        self._close_recovered()
+        return remarked
+
+    def _close_recovered(self):
+        """Replaces a recovered journal by a bare 'done' (also drops a torn last line)."""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'event': 'done', 't': time.time()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --- LOGGING ---
+    def start(self, tasks):
+        """Begins a new run: truncates the previous journal, logs every task as pending."""
+        self._file = open(self.path, 'w', encoding='utf-8')
+        with self._lock:
+            self._write({'event': 'run', 'files': len(tasks)})
+            for task in tasks:
+                self._write(self._entry('pending', task))
+            self._sync()
+
+    def record(self, state, task):
+        """'extracted' / 'embedded' progress. Buffered; made durable by the next commit."""
+        with self._lock:
+            self._write(self._entry(state, task))
+
+    def commit(self, done_files):
+        """Files whose chunks just landed. Synced to disk before 'files' is updated."""
+        with self._lock:
+            for f in done_files:
+                entry = self._entry('committed', f)
+                entry.update(status=f['status'], chunks=f['chunk_count'])
+                self._write(entry)
+            self._sync()
+
+    def finish(self):
+        with self._lock:
+            self._write({'event': 'done'})
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def _entry(self, state, task):
+        return {'event': state, 'path': task['file_path'], 'hash': task['file_hash']}
+
+    def _write(self, entry):
+        entry.setdefault('t', time.time())
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
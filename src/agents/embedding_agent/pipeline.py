@@ -0,0 +1,346 @@
+"""
+Module: Ingestion Pipeline
+Description: Overlaps extraction, embedding and DB writes.
+
+    [RecyclingPool] --files--> (queue) --> [Embed stage] --vectors--> (queue) --> [Writer stage]
+      CPU workers                          model.encode on                         Arrow batches
+      (OCR, parsing)                       fixed-size batches                      -> LanceDB
+
+- Images are triaged first: photos are indexed by metadata and never
+  reach OCR (triage.py).
+- Large PDFs are extracted as page shards on several workers and merged
+  back into one result per file before the embed stage (sharding.py).
+
+- The embed stage fills fixed-size encode batches across file boundaries,
+  so the GPU/MPS always gets full batches.
+- The writer commits whole files in small units, atomically replacing their
+  old chunks, logs them to the journal and only then marks them as done.
+- Queues are bounded: when a downstream stage falls behind, the upstream one
+  blocks, the pool stops handing out files, and memory stays flat.
+"""
+
+import gc
+import queue
+import threading
+import time
+from collections import deque
+import numpy as np
+import pyarrow as pa
+
+from src.common.db import Chunk, STATUS_EMPTY, STATUS_FAILED, STATUS_INDEXED, sql_in
+from src.common.binary_codes import CODE_COLUMN, code_array
+from src.agents.embedding_agent.sharding import PdfSharder
+from src.agents.embedding_agent.triage import PhotoTriage
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+PIPELINE_CFG = SETTINGS.get('pipeline', {})
+ENCODE_BATCH = PIPELINE_CFG.get('encode_batch', 64)
+WRITE_BATCH = PIPELINE_CFG.get('write_batch', 2000)
+QUEUE_DEPTH = PIPELINE_CFG.get('queue_depth', 8)
+# A commit unit closes at this many finished files or seconds (or WRITE_BATCH chunks);
+# it bounds the work an interrupted run has to redo
+COMMIT_FILES = PIPELINE_CFG.get('commit_files', 50)
+COMMIT_SECONDS = PIPELINE_CFG.get('commit_seconds', 30)
+
+_DONE = object()  # End-of-stream marker passed down the queues
+
+
+class _Aborted(Exception):
+    """Raised inside a stage when another stage failed and the run is stopping."""
+
+
+def _put(q, item, abort):
+    """queue.put that blocks while the queue is full, unless the run is aborting."""
+    while True:
+        if abort.is_set():
+            raise _Aborted()
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+class Stage(threading.Thread):
+    """
+    A pipeline thread with utilization accounting.
+    `busy` counts seconds spent working; time blocked on queues is excluded.
+    """
+
+    def __init__(self, name, inbox, outbox=None):
+        super().__init__(name=name, daemon=True)
+        self.inbox = inbox
+        self.outbox = outbox
+        self.busy = 0.0
+        self.items = 0
+        self.error = None
+        self.abort = None  # Shared threading.Event, set by the Pipeline
+
+    def emit(self, item):
+        # Blocks while downstream is full (backpressure), but gives up on abort.
+        _put(self.outbox, item, self.abort)
+
+    def run(self):
+        try:
+            while True:
+                try:
+                    item = self.inbox.get(timeout=0.5)
+                except queue.Empty:
+                    if self.abort.is_set():
+                        raise _Aborted()
+                    continue
+                if item is _DONE:
+                    break
+                t0 = time.perf_counter()
+                self.handle(item)
+                self.busy += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            self.finish()
+            self.busy += time.perf_counter() - t0
+            if self.outbox is not None:
+                self.emit(_DONE)
+        except _Aborted:
+            pass
+        except Exception as e:
+            self.error = e
+            self.abort.set()
+
+    def handle(self, item):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class EmbedStage(Stage):
+    """
+    Buffers chunks from any number of files and encodes them ENCODE_BATCH at a time.
+    A file's 'done' message is emitted only after all of its chunks went downstream.
+    """
+
+    def __init__(self, model, inbox, outbox, cache=None, journal=None):
+        super().__init__("embed", inbox, outbox)
+        self.model = model
+        self.cache = cache    # Optional EmbeddingCache; only misses reach the model
+        self.journal = journal
+        self.buffer = []      # chunks waiting for a full encode batch
+        self.waiting = deque()  # [task, status, extraction, chunk_count, chunks_not_yet_encoded]
+        self.encode_calls = 0
+
+    def handle(self, item):
+        task, chunks, status, extraction = item
+        self.buffer.extend(chunks)
+        self.waiting.append([task, status, extraction, len(chunks), len(chunks)])
+        while len(self.buffer) >= ENCODE_BATCH:
+            self._encode(ENCODE_BATCH)
+        self._release_finished()
+
+    def finish(self):
+        if self.buffer:
+            self._encode(len(self.buffer))
+        self._release_finished()
+
+    def _encode(self, n):
+        batch, self.buffer = self.buffer[:n], self.buffer[n:]
+        inputs = [c.pop('_embedding_input') for c in batch]
+        if self.cache is not None:
+            vectors = self.cache.encode(self.model, inputs)
+        else:
+            vectors = self.model.encode(inputs, batch_size=n, show_progress_bar=False)
+        self.encode_calls += 1
+        self.items += len(batch)
+        self.emit(('chunks', batch, np.asarray(vectors, dtype=np.float32)))
+
+        # Chunks are encoded in arrival order, so credit the oldest files first
+        for entry in self.waiting:
+            if n == 0:
+                break
+            take = min(n, entry[4])
+            entry[4] -= take
+            n -= take
+
+    def _release_finished(self):
+        while self.waiting and self.waiting[0][4] == 0:
+            task, status, extraction, count, _ = self.waiting.popleft()
+            if self.journal is not None:
+                self.journal.record('embedded', task)
+            self.emit(('file', task, status, extraction, count))
+
+
+class WriterStage(Stage):
+    """
+    Commits finished files in small units (COMMIT_FILES files / WRITE_BATCH
+    chunks / COMMIT_SECONDS, whichever comes first). A unit is:
+      1. fresh extractions -> Extraction Store (OCR output survives anything below)
+      2. chunks -> one merge_insert that adds the files' new chunks and deletes
+         their old ones in the same commit, so a file is never half-replaced
+      3. 'committed' -> journal, then the files are marked in the manifest
+    Chunks of a file wait in `open_files` until its last chunk has arrived.
+    A failed (or timed-out) file keeps its old chunks: only a successful
+    extraction replaces them.
+    """
+
+    def __init__(self, table, files_table, inbox, mark_files, extractions=None, journal=None):
+        super().__init__("writer", inbox)
+        self.table = table
+        self.files_table = files_table
+        self.mark_files = mark_files
+        self.extractions = extractions
+        self.journal = journal
+        self.schema = Chunk.to_arrow_schema()
+        self.open_files = {}  # file_path -> [(row, vector)] of files still being embedded
+        self.rows, self.vectors, self.done_files = [], [], []
+        self.last_commit = time.perf_counter()
+        self.chunks_written = 0
+        self.flushes = 0
+
+    def handle(self, item):
+        if item[0] == 'chunks':
+            _, rows, vectors = item
+            for row, vector in zip(rows, vectors):
+                self.open_files.setdefault(row['file_path'], []).append((row, vector))
+        else:
+            _, task, status, extraction, count = item
+            for row, vector in self.open_files.pop(task['file_path'], []):
+                self.rows.append(row)
+                self.vectors.append(vector)
+            if status == STATUS_FAILED:
+                count = task.get('chunk_count') or 0  # Its old chunks stay
+            self.done_files.append({**task, 'status': status, 'chunk_count': count})
+            if self.extractions is not None and extraction and not extraction['stored']:
+                self.extractions.add(task['file_hash'], extraction['extractor'], extraction['pages'])
+        if (len(self.rows) >= WRITE_BATCH or len(self.done_files) >= COMMIT_FILES
+                or (self.done_files and time.perf_counter() - self.last_commit >= COMMIT_SECONDS)):
+            self.flush()
+
+    def finish(self):
+        self.flush()
+
+    def _arrow_rows(self):
+        matrix = np.vstack(self.vectors)
+        columns = {}
+        for field in self.schema:
+            if field.name == 'vector':
+                flat = pa.array(matrix.ravel(), type=field.type.value_type)
+                columns['vector'] = pa.FixedSizeListArray.from_arrays(flat, matrix.shape[1])
+            elif field.name == CODE_COLUMN:
+                columns[CODE_COLUMN] = code_array(matrix)
+            else:
+                columns[field.name] = pa.array([r[field.name] for r in self.rows], type=field.type)
+        return pa.table(columns, schema=self.schema)
+
+    def flush(self):
+        if self.extractions is not None:
+            self.extractions.flush()
+        if not self.done_files:
+            return
+
+        # Failed files are left out: their previous chunks stay searchable
+        paths = [f['file_path'] for f in self.done_files if f['status'] != STATUS_FAILED]
+        if self.rows:
+            # Chunk ids repeat across copies of a file, so rows are keyed by (file_path, id)
+            (self.table.merge_insert(['file_path', 'id'])
+                .when_matched_update_all()
+                .when_not_matched_insert_all()
+                .when_not_matched_by_source_delete(sql_in('file_path', paths))
+                .execute(self._arrow_rows()))
+        elif paths:
+            # Only empty files: they just lose their old chunks
+            self.table.delete(sql_in('file_path', paths))
+        self.chunks_written += len(self.rows)
+        self.items += len(self.rows)
+        self.flushes += 1
+
+        now = time.time()
+        if self.journal is not None:
+            self.journal.commit(self.done_files)
+        self.mark_files(self.files_table, [{**f, 'indexed_at': now} for f in self.done_files])
+
+        self.rows, self.vectors, self.done_files = [], [], []
+        self.last_commit = time.perf_counter()
+        gc.collect()
+
+
+class Pipeline:
+    """Wires the pool, the embed stage and the writer stage together."""
+
+    def __init__(self, pool, model, table, files_table, mark_files, cache=None, extractions=None, journal=None):
+        self.pool = pool
+        self.journal = journal
+        self.triage = PhotoTriage()
+        self.sharder = PdfSharder()
+        self.abort = threading.Event()
+        self.to_embed = queue.Queue(maxsize=QUEUE_DEPTH)
+        self.to_write = queue.Queue(maxsize=QUEUE_DEPTH)
+        self.embedder = EmbedStage(model, self.to_embed, self.to_write, cache, journal)
+        self.writer = WriterStage(table, files_table, self.to_write, mark_files, extractions, journal)
+        for stage in (self.embedder, self.writer):
+            stage.abort = self.abort
+
+        self.files_extracted = 0
+        self.files_reused = 0       # Served from the Extraction Store (no OCR/parsing)
+        self.extract_blocked = 0.0  # Producer time spent waiting on a full embed queue
+        self.started = None
+        self.finished = None
+
+    def run(self, tasks, templates):
+        """
+        `templates` are the worker payloads, `tasks` the matching 'files' rows
+        (joined on file_path). Returns the number of chunks written.
+        """
+        tasks_by_path = {t['file_path']: t for t in tasks}
+        self.started = time.perf_counter()
+        self.embedder.start()
+        self.writer.start()
+
+        try:
+            # Photos are marked before the pool; large PDFs go out as page
+            # shards and come back as one result per file
+            payloads = self.sharder.split(self.triage.mark(templates))
+            for template, result, error in self.sharder.merge(self.pool.imap_unordered(payloads)):
+                task = tasks_by_path[template['file_path']]
+                chunks, extraction = result if result else ([], None)
+                if error:
+                    print(f"     ❌ [Worker] Error processing {task['filename']}: {error}")
+                    status, chunks = STATUS_FAILED, []
+                else:
+                    status = STATUS_INDEXED if chunks else STATUS_EMPTY
+                self.files_extracted += 1
+                if extraction and extraction['stored']:
+                    self.files_reused += 1
+                if self.journal is not None:
+                    self.journal.record('extracted', task)
+
+                t0 = time.perf_counter()
+                _put(self.to_embed, (task, chunks, status, extraction), self.abort)
+                self.extract_blocked += time.perf_counter() - t0
+            _put(self.to_embed, _DONE, self.abort)
+        except _Aborted:
+            pass
+        except BaseException:
+            # Ctrl-C or a producer bug: let the stages stop instead of hanging
+            self.abort.set()
+            raise
+        finally:
+            self.embedder.join()
+            self.writer.join()
+            self.finished = time.perf_counter()
+
+        for stage in (self.embedder, self.writer):
+            if stage.error:
+                raise RuntimeError(f"{stage.name} stage failed: {stage.error}") from stage.error
+        return self.writer.chunks_written
+
+    def report(self):
+        wall = max((self.finished or time.perf_counter()) - self.started, 1e-9)
+        e, w = self.embedder, self.writer
+        return "\n".join([
+            f"   📈 Stage utilization over {wall:.1f}s:",
+            f"      extract : {self.files_extracted} files ({self.files_reused} from stored text, "
+            f"{self.sharder.report()}) | "
+            f"blocked by embed queue {self.extract_blocked / wall:6.1%}",
+            f"      triage  : {self.triage.report()}",
+            f"      embed   : {e.busy / wall:6.1%} busy | {e.items} chunks in {e.encode_calls} encode calls",
+            f"      write   : {w.busy / wall:6.1%} busy | {w.chunks_written} chunks in {w.flushes} flushes",
+        ])
@@ -0,0 +1,146 @@
+"""
+Module: Cost-Aware Scheduler ("Lane Control")
+Description: Decides which file an extraction worker gets next, and when.
+
+Every task gets a rough cost estimate before the run starts:
+  - seconds: OCR pages dominate (a scanned 800-page PDF is hours, a .txt is ms)
+  - memory:  the worker's peak RAM above its idle baseline (OCR engine,
+             page renders, the text and chunk records a file produces)
+Inputs are the file type and size, the page count of large PDFs (counted
+once, by the sharding pass), and whether the text is already in the
+Extraction Store (then nothing is parsed at all).
+
+The pool then:
+  1. Hands out the longest jobs first (LPT), so the run does not end with
+     one 800-page PDF grinding on alone while the other workers sit idle.
+     Files are costed and ordered in windows of `plan_window`, so workers
+     start on the first window while the rest are still being planned.
+  2. Admits a task only while the estimated memory of everything in flight
+     fits `memory_budget_mb` and the machine keeps `reserve_mb` free (live,
+     via psutil). Smaller tasks further down the list backfill the gap.
+  3. Kills a worker whose file runs past `timeout_base_seconds +
+     timeout_factor * estimate`; that file fails, the rest of the run goes on.
+
+The numbers are deliberately coarse: they only need to rank files and keep
+the sum of in-flight work under the budget.
+"""
+
+from itertools import islice
+from typing import NamedTuple
+
+import psutil
+
+from src.config.loader import SETTINGS
+from src.extractors.ocr_service import SERVICE_ENABLED as OCR_SERVICE_ENABLED
+from src.agents.embedding_agent.sharding import PAGES_KEY, PAGE_TOTAL_KEY
+from src.agents.embedding_agent.triage import PHOTO_KEY
+
+# --- CONFIGURATION ---
+SCHED_CFG = SETTINGS.get('scheduler', {})
+# 0 = 60% of physical RAM
+MEMORY_BUDGET_MB = SCHED_CFG.get('memory_budget_mb', 0) or int(psutil.virtual_memory().total * 0.6 / 2**20)
+RESERVE_MB = SCHED_CFG.get('reserve_mb', 1024)
+OCR_PAGE_SECONDS = SCHED_CFG.get('ocr_page_seconds', 3.0)
+# Only charged to workers when they load their own engine (no OCR service)
+OCR_ENGINE_MB = 0 if OCR_SERVICE_ENABLED else SCHED_CFG.get('ocr_engine_mb', 600)
+TIMEOUT_BASE_SECONDS = SCHED_CFG.get('timeout_base_seconds', 120)
+TIMEOUT_FACTOR = SCHED_CFG.get('timeout_factor', 4)
+PLAN_WINDOW = SCHED_CFG.get('plan_window', 1000)
+
+MB = 1024 * 1024
+# Scanned PDFs carry a page image per page; text PDFs are far denser
+SCANNED_BYTES_PER_PAGE = 100 * 1024
+# Native text extraction, per page / per MB of input
+NATIVE_PAGE_SECONDS = 0.02
+PARSE_SECONDS_PER_MB = 0.5
+# One 300 DPI A4 render + OCR working set
+OCR_PAGE_MB = 150
+# Spreadsheet rows are streamed (spreadsheet.py): time is parsing, memory is
+# the result (page text + chunk records), per MB of input
+CSV_SECONDS_PER_MB = 0.1
+WORKBOOK_SECONDS_PER_MB = 2.0  # Zip-compressed sheet XML
+SPREADSHEET_RESULT_BLOWUP = 6
+DOCUMENT_BLOWUP = 4
+STORED_COST_SECONDS = 0.01
+# A photo (triage.py): an EXIF header read, no OCR
+PHOTO_COST_SECONDS = 0.01
+
+
+class Cost(NamedTuple):
+    seconds: float
+    memory_mb: float
+    ocr: bool
+
+
+def estimate_cost(payload):
+    """Cost of one worker payload (a chunk template: file_type, file_size_bytes, file_path, ...)."""
+    size = payload.get('file_size_bytes') or 0
+    size_mb = size / MB
+    file_type = str(payload.get('file_type', '')).lower().lstrip('.')
+
+    if payload.get('_has_extraction'):
+        # Text comes from the Extraction Store: read + chunk only
+        return Cost(STORED_COST_SECONDS, 1 + size_mb * 0.1, False)
+
+    if file_type == 'pdf':
+        # Counted by the sharding pass for large PDFs; smaller ones are guessed from their size
+        total = payload.get(PAGE_TOTAL_KEY) or max(1, round(size / SCANNED_BYTES_PER_PAGE))
+        # A page shard (sharding.py) costs its own page range
+        pages = payload[PAGES_KEY][1] - payload[PAGES_KEY][0] if PAGES_KEY in payload else total
+        if size / total >= SCANNED_BYTES_PER_PAGE:
+            return Cost(pages * OCR_PAGE_SECONDS, OCR_ENGINE_MB + OCR_PAGE_MB, True)
+        return Cost(pages * NATIVE_PAGE_SECONDS, 20 + size_mb * DOCUMENT_BLOWUP, False)
+
+    if payload.get(PHOTO_KEY):
+        return Cost(PHOTO_COST_SECONDS, 10, False)
+
+    if file_type in ('png', 'jpg', 'jpeg', 'heic'):
+        # Decoded bitmaps are ~10x the compressed file, capped by the 2500px downscale
+        return Cost(OCR_PAGE_SECONDS, OCR_ENGINE_MB + min(size_mb * 10, OCR_PAGE_MB * 2), True)
+
+    if file_type in ('xlsx', 'xls', 'csv'):
+        seconds_per_mb = CSV_SECONDS_PER_MB if file_type == 'csv' else WORKBOOK_SECONDS_PER_MB
+        return Cost(0.01 + size_mb * seconds_per_mb, 30 + size_mb * SPREADSHEET_RESULT_BLOWUP, False)
+
+    return Cost(0.01 + size_mb * PARSE_SECONDS_PER_MB, 10 + size_mb * DOCUMENT_BLOWUP, False)
+
+
+class CostScheduler:
+    """Ordering, admission and timeouts for RecyclingPool (see module docstring)."""
+
+    def __init__(self, budget_mb=MEMORY_BUDGET_MB, reserve_mb=RESERVE_MB,
+                 timeout_base=TIMEOUT_BASE_SECONDS, timeout_factor=TIMEOUT_FACTOR, plan_window=PLAN_WINDOW):
+        self.budget_mb = budget_mb
+        self.reserve_mb = reserve_mb
+        self.timeout_base = timeout_base
+        self.timeout_factor = timeout_factor
+        self.plan_window = max(1, plan_window)
+        self.deferred = 0    # Files that had to wait for memory at least once
+
+    def plan(self, payloads):
+        """Yields (payload, cost), most expensive (longest) first within each window of `plan_window`."""
+        payloads = iter(payloads)
+        while True:
+            window = [(p, estimate_cost(p)) for p in islice(payloads, self.plan_window)]
+            if not window:
+                return
+            window.sort(key=lambda pc: pc[1].seconds, reverse=True)
+            yield from window
+
+    def admits(self, cost, in_flight_mb, busy):
+        """
+        True if `cost` may start now. An idle pool always admits, so a file
+        bigger than the whole budget still runs (alone).
+        """
+        if not busy:
+            return True
+        if in_flight_mb + cost.memory_mb > self.budget_mb:
+            return False
+        available_mb = psutil.virtual_memory().available / MB
+        return available_mb - cost.memory_mb >= self.reserve_mb
+
+    def timeout(self, cost):
+        return self.timeout_base + self.timeout_factor * cost.seconds
+
+    def report(self):
+        return f"🚦 Scheduler: memory budget {self.budget_mb:,} MB | files held back for memory: {self.deferred}"
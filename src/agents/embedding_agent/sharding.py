@@ -0,0 +1,128 @@
+"""
+Module: PDF Page Sharding
+Description: Splits big PDFs into page-range work units, so several workers
+             extract (and OCR) one document at once, and reassembles them.
+
+A 600-page scanned bundle used to be one task: one worker rendered and
+OCR'd it page by page for many minutes while the others sat idle at the
+end of the run. Now a PDF of at least `min_size_mb` and `min_pages` pages
+becomes ceil(pages / shard_pages) payloads, each carrying its [start, stop)
+page range. Workers open the document independently and extract only
+their range. The shards' results are held until the file is complete, then
+merged in page order into one (template, result, error), so the rest of
+the pipeline (journal, extraction store, writer) still sees whole files.
+
+Every PDF of at least `min_size_mb` is opened here once, split or not (or
+with sharding disabled): its page count rides along in PAGE_TOTAL_KEY, so
+the scheduler (scheduler.py) costs it without opening it again.
+
+Chunk ids are "<hash>_p<page>_<offset>", so they do not depend on how a
+file was split. A failed shard fails the whole file, exactly as a failed
+file did before.
+"""
+
+import math
+
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+SHARD_CFG = SETTINGS.get('pdf_sharding', {})
+SHARDING_ENABLED = SHARD_CFG.get('enabled', True)
+# Only PDFs this big are opened to count their pages
+MIN_SIZE_BYTES = int(SHARD_CFG.get('min_size_mb', 2) * 1024 * 1024)
+MIN_PAGES = SHARD_CFG.get('min_pages', 100)
+SHARD_PAGES = SHARD_CFG.get('shard_pages', 25)
+
+# Payload keys of a shard (popped by the worker before chunking)
+PAGES_KEY = '_pages'            # [start, stop) 0-based page indexes
+PAGE_TOTAL_KEY = '_page_total'  # Pages in the whole document
+SHARD_KEY = '_shard'            # (index, count)
+SHARD_KEYS = (PAGES_KEY, PAGE_TOTAL_KEY, SHARD_KEY)
+
+
+def pdf_page_count(path):
+    """Page count from the PDF's xref (cheap); None if it cannot be opened."""
+    try:
+        import fitz  # PyMuPDF
+        with fitz.open(path) as doc:
+            return doc.page_count
+    except Exception:
+        return None
+
+
+class PdfSharder:
+    """split() the payloads before the pool, merge() its results after it."""
+
+    def __init__(self, enabled=SHARDING_ENABLED, min_size_bytes=MIN_SIZE_BYTES,
+                 min_pages=MIN_PAGES, shard_pages=SHARD_PAGES):
+        self.enabled = enabled
+        self.min_size_bytes = min_size_bytes
+        self.min_pages = min_pages
+        self.shard_pages = max(1, shard_pages)
+        self.files_split = 0
+        self.shards = 0
+
+    def _page_total(self, template):
+        """Page count of a large PDF still to be extracted, else None."""
+        if (template.get('_has_extraction')
+                or str(template.get('file_type', '')).lower().lstrip('.') != 'pdf'
+                or (template.get('file_size_bytes') or 0) < self.min_size_bytes):
+            return None
+        return pdf_page_count(template['file_path'])
+
+    def split(self, templates):
+        for template in templates:
+            total = self._page_total(template)
+            if total is None:
+                yield template
+                continue
+            if not self.enabled or total < self.min_pages:
+                # Not split, but the scheduler costs it from this count too
+                yield {**template, PAGE_TOTAL_KEY: total}
+                continue
+            count = math.ceil(total / self.shard_pages)
+            self.files_split += 1
+            self.shards += count
+            for index in range(count):
+                start = index * self.shard_pages
+                yield {
+                    **template,
+                    PAGES_KEY: (start, min(start + self.shard_pages, total)),
+                    PAGE_TOTAL_KEY: total,
+                    SHARD_KEY: (index, count),
+                }
+
+    def merge(self, results):
+        """Passes whole files through; holds shards until their file is complete."""
+        partial = {}
+        for template, result, error in results:
+            if SHARD_KEY not in template:
+                if PAGE_TOTAL_KEY in template:
+                    template = {k: v for k, v in template.items() if k != PAGE_TOTAL_KEY}
+                yield template, result, error
+                continue
+            index, count = template[SHARD_KEY]
+            parts = partial.setdefault(template['file_path'], {})
+            parts[index] = (template, result, error)
+            if len(parts) == count:
+                del partial[template['file_path']]
+                yield self._merge([parts[i] for i in range(count)])
+
+    @staticmethod
+    def _merge(parts):
+        template = {k: v for k, v in parts[0][0].items() if k not in SHARD_KEYS}
+        errors = [f"pages {t[PAGES_KEY][0] + 1}-{t[PAGES_KEY][1]}: {e or 'no extraction'}"
+                  for t, result, e in parts if e or not result or result[1] is None]
+        if errors:
+            # Never commit the other shards' pages as the whole file
+            return template, None, "; ".join(errors)
+
+        chunks, pages = [], []
+        for _, (shard_chunks, extraction), _ in parts:
+            chunks.extend(shard_chunks)
+            pages.extend(extraction['pages'])
+        extraction = {'extractor': parts[0][1][1]['extractor'], 'pages': pages, 'stored': False}
+        return template, (chunks, extraction), None
+
+    def report(self):
+        return f"{self.files_split} large PDFs split into {self.shards} page shards"
@@ -0,0 +1,97 @@
+"""
+Module: Extraction Worker
+Description: The code that runs inside the extraction worker processes.
+
+Kept separate from embedder.py on purpose: spawned workers import this module
+to unpickle their task function, and it must NOT drag in torch or
+sentence-transformers (hundreds of MB per process, seconds of startup).
+"""
+
+from src.config.loader import SETTINGS
+
+def chunk_pages(row_dict, pages):
+    """
+    Splits extracted pages into overlapping chunk records.
+    `pages` is [(page_number, text, method)]; each record carries `_embedding_input`.
+    """
+    filename = row_dict['filename']
+    doc_id = row_dict['id']
+    chunk_size = SETTINGS['system']['chunk_size']
+    overlap = SETTINGS['system']['chunk_overlap']
+
+    chunks = []
+    for page_num, content, _ in pages:
+        if not content: continue
+
+        start = 0
+        while start < len(content):
+            end = start + chunk_size
+            text_slice = content[start:end]
+
+            embedding_input = f"Filename: {filename} Page: {page_num} Content: {text_slice}"
+
+            record = row_dict.copy()
+            record['id'] = f"{doc_id}_p{page_num}_{start}"
+            record['page_number'] = page_num
+            record['content'] = text_slice
+            record['_embedding_input'] = embedding_input
+
+            chunks.append(record)
+
+            start += (chunk_size - overlap)
+            if start >= len(content): break
+    return chunks
+
+def process_file_wrapper(row_dict):
+    """
+    Worker Function: Extracts content from file.
+    Returns (chunks, extraction). `extraction` is None when no extractor handles
+    the type, otherwise {'extractor', 'pages', 'stored'}; 'stored' means the
+    pages came from the Extraction Store and nothing had to be re-extracted.
+    An extractor error is raised: the pool reports it and the file is marked
+    failed instead of indexed with partial text.
+    """
+    # Lazy Import inside the process to keep it isolated
+    from src.common.factory import ExtractorFactory
+    from src.agents.embedding_agent.extraction_store import load_pages
+    from src.agents.embedding_agent.sharding import PAGES_KEY, SHARD_KEYS
+    from src.agents.embedding_agent.triage import PHOTO_KEY
+
+    row_dict = dict(row_dict)
+    has_stored = row_dict.pop('_has_extraction', False)
+    # A page shard of a large PDF extracts only its [start, stop) range;
+    # a photo (triage.py) is indexed by its metadata, without OCR
+    options = {}
+    if row_dict.get(PAGES_KEY):
+        options['pages'] = row_dict[PAGES_KEY]
+    if row_dict.get(PHOTO_KEY):
+        options['ocr'] = False
+    for key in SHARD_KEYS + (PHOTO_KEY,):
+        row_dict.pop(key, None)
+    filename = row_dict['filename']
+    file_path = row_dict['file_path']
+
+    raw_type = str(row_dict['file_type']).lower()
+    file_type = raw_type if raw_type.startswith('.') else f".{raw_type}"
+
+    extractor = ExtractorFactory.get_extractor(file_type)
+    if not extractor:
+        return [], None
+    extractor_name = type(extractor).__name__
+
+    # 1. Reuse text extracted earlier from the same content
+    if has_stored:
+        try:
+            pages = load_pages(row_dict['id'], extractor_name)
+            if pages is not None:
+                return chunk_pages(row_dict, pages), {'extractor': extractor_name, 'pages': pages, 'stored': True}
+        except Exception as e:
+            print(f"⚠️ [Worker] Extraction store unavailable for {filename}: {e}")
+
+    # 2. Extract (OCR, parsing)
+    pages = []
+    for page_num, content in extractor.extract(file_path, **options):
+        if content:
+            pages.append((page_num, content, extractor.page_method))
+
+    return chunk_pages(row_dict, pages), {'extractor': extractor_name, 'pages': pages, 'stored': False}
@@ -0,0 +1,414 @@
+"""
+Module: Recycling Worker Pool
+Description: Long-lived extraction processes that retire themselves when they
+             grow too big, instead of one ProcessPoolExecutor per batch.
+
+Why not ProcessPoolExecutor / multiprocessing.Pool?
+  - Spawning a fresh pool per batch re-imports the extractor stack every time
+    and leaves workers idle while the slowest file of the batch finishes.
+  - maxtasksperchild only counts tasks; OCR leaks are about memory, so each
+    worker here also checks its own RSS after every file.
+
+Memory "Sawtooth":
+  A worker grows while it OCRs, crosses the watermark (or its task quota),
+  exits, and is replaced by a fresh process. RAM rises and drops per worker
+  instead of creeping up for the whole run.
+
+With a CostScheduler (scheduler.py) the pool also hands out the longest
+files first, holds files back while the memory budget is used up, and kills
+a worker stuck on one file past its timeout.
+
+OCR Lane:
+  With a scheduler, `ocr_lane_share` of the workers form an OCR lane that
+  gets the files estimated to need OCR (page rendering, and the OCR engine
+  when there is no OCR service); the others get everything else and only
+  help with OCR once their own queue is empty.
+
+Services:
+  Helper processes (the OCR service) passed in `services` are started before
+  the workers, which find them through inherited environment variables, and
+  stopped after the workers.
+"""
+
+import gc
+import time
+import queue
+import multiprocessing as mp
+from collections import deque
+
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+POOL_CFG = SETTINGS.get('pool', {})
+MAX_TASKS_PER_WORKER = POOL_CFG.get('max_tasks_per_worker', 50)
+WORKER_RSS_LIMIT_MB = POOL_CFG.get('worker_rss_limit_mb', 3000)
+# Tasks queued per worker, so a worker never waits for the parent to hand out work
+PREFETCH = POOL_CFG.get('prefetch', 2)
+# With a scheduler, files estimated longer than this only go to idle workers:
+# queued behind another long file they would wait while other workers idle
+PREFETCH_MAX_SECONDS = POOL_CFG.get('prefetch_max_seconds', 5)
+# Share of the workers reserved for OCR files (needs a scheduler; 0 = no lane)
+OCR_LANE_SHARE = POOL_CFG.get('ocr_lane_share', 0.5)
+
+# How often the parent checks for crashed / hung workers while waiting for results
+POLL_SECONDS = 1.0
+# How far down the queue a small file may be pulled forward while a big one waits for memory
+BACKFILL_WINDOW = 256
+# Planned tasks kept in the backlog ahead of the workers (the rest are planned as it drains)
+PLAN_AHEAD = 2 * BACKFILL_WINDOW
+IDLE = -1
+OCR_LANE = "ocr"
+GENERAL_LANE = "general"
+
+
+def _worker_main(worker_id, fn, task_queue, result_queue, max_tasks, rss_limit_bytes, current):
+    """
+    Worker loop: run tasks until told to stop, or until the quota/watermark is hit.
+    Every result message says whether the worker is retiring after it.
+    `current` holds [task_id, start time] of the running task, for the parent's timeout check.
+    """
+    import psutil
+    proc = psutil.Process()
+    done = 0
+
+    while True:
+        item = task_queue.get()
+        if item is None:
+            break
+        task_id, payload = item
+        with current.get_lock():
+            current[0], current[1] = task_id, time.time()
+        try:
+            result, error = fn(payload), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        with current.get_lock():
+            current[0] = IDLE
+        done += 1
+
+        gc.collect()
+        rss = proc.memory_info().rss
+        retire = done >= max_tasks or rss > rss_limit_bytes
+        result_queue.put((worker_id, task_id, result, error, rss, retire))
+        if retire:
+            break
+
+
+class _Worker:
+    """Parent-side handle: the process, its private task queue, and what it holds."""
+
+    def __init__(self, worker_id, process, task_queue, current, lane=GENERAL_LANE):
+        self.id = worker_id
+        self.process = process
+        self.task_queue = task_queue
+        self.current = current       # shared [task_id, started] of the running task
+        self.lane = lane
+        self.outstanding = deque()   # task ids sent but not yet answered, in order
+        self.retiring = False
+
+    def running(self):
+        """(task_id, seconds running) of the task the worker is inside, or None."""
+        with self.current.get_lock():
+            task_id, started = self.current[0], self.current[1]
+        if task_id == IDLE:
+            return None
+        return int(task_id), time.time() - started
+
+
+class _Backlog:
+    """
+    Tasks not handed to a worker yet, in dispatch order. With an OCR lane the
+    OCR files and the rest queue separately, so each lane takes its own first.
+    """
+
+    def __init__(self, items, is_ocr=None):
+        self.is_ocr = is_ocr
+        self.queues = {OCR_LANE: deque(), GENERAL_LANE: deque()}
+        for item in items:
+            self.append(item)
+
+    def _lane(self, task_id):
+        return OCR_LANE if self.is_ocr is not None and self.is_ocr(task_id) else GENERAL_LANE
+
+    def __len__(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def popleft(self):
+        return self.queues[GENERAL_LANE].popleft()
+
+    def append(self, item):
+        self.queues[self._lane(item[0])].append(item)
+
+    def extendleft(self, items):
+        """Same semantics as deque.extendleft (callers pass reversed order)."""
+        for item in items:
+            self.queues[self._lane(item[0])].appendleft(item)
+
+    def queues_for(self, lane):
+        """The queues a worker of `lane` may take from, in order of preference."""
+        if lane == OCR_LANE:
+            return [self.queues[OCR_LANE], self.queues[GENERAL_LANE]]
+        # General workers take OCR files only once their own work ran out
+        return [self.queues[GENERAL_LANE] or self.queues[OCR_LANE]]
+
+
+class RecyclingPool:
+    """
+    Usage:
+        with RecyclingPool(process_file_wrapper, workers=4) as pool:
+            for task, result, error in pool.imap_unordered(tasks):
+                ...
+
+    `scheduler` (a CostScheduler) switches on LPT ordering, memory
+    admission, per-file timeouts and the OCR lane; without one tasks go out
+    in order.
+    """
+
+    def __init__(self, fn, workers, max_tasks_per_worker=MAX_TASKS_PER_WORKER,
+                 rss_limit_mb=WORKER_RSS_LIMIT_MB, prefetch=PREFETCH, scheduler=None,
+                 ocr_lane_share=OCR_LANE_SHARE, services=()):
+        self.fn = fn
+        self.scheduler = scheduler
+        self.services = list(services)
+        self.size = max(1, workers)
+        # At least one general worker; a one-worker pool has no lanes
+        ocr_workers = min(int(self.size * ocr_lane_share), self.size - 1) if scheduler is not None else 0
+        self.lanes = {OCR_LANE: ocr_workers, GENERAL_LANE: self.size - ocr_workers}
+        self.max_tasks = max(1, max_tasks_per_worker)
+        self.rss_limit_bytes = int(rss_limit_mb * 1024 * 1024)
+        self.prefetch = max(1, prefetch)
+
+        # 'spawn' everywhere: LanceDB and torch are not fork-safe.
+        self._ctx = mp.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._workers = {}
+        self._next_worker_id = 0
+        self._costs = {}             # task id -> Cost, for the current imap_unordered call
+
+        # Stats for the end-of-run report
+        self.recycled = 0
+        self.crashed = 0
+        self.timed_out = 0
+        self.peak_worker_rss = 0
+
+    # --- LIFECYCLE ---
+    def __enter__(self):
+        for service in self.services:
+            service.start()
+        self._top_up()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _top_up(self):
+        """Spawns workers until every lane is at full strength."""
+        for lane, size in self.lanes.items():
+            while sum(w.lane == lane for w in self._workers.values()) < size:
+                self._spawn(lane)
+
+    def _spawn(self, lane=GENERAL_LANE):
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        task_queue = self._ctx.Queue()
+        current = self._ctx.Array('d', [IDLE, 0.0])
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.fn, task_queue, self._results, self.max_tasks, self.rss_limit_bytes, current),
+            daemon=True,
+        )
+        process.start()
+        self._workers[worker_id] = _Worker(worker_id, process, task_queue, current, lane)
+
+    def _retire(self, worker, respawn=True):
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.kill()
+        del self._workers[worker.id]
+        if respawn:
+            self._spawn(worker.lane)
+
+    def close(self):
+        for worker in list(self._workers.values()):
+            if worker.process.is_alive():
+                worker.task_queue.put(None)
+        for worker in list(self._workers.values()):
+            self._retire(worker, respawn=False)
+        for service in self.services:
+            service.stop()
+
+    # --- STREAMING ---
+    def imap_unordered(self, tasks):
+        """
+        Yields (task, result, error) as soon as any worker finishes a task.
+        Free workers are refilled immediately, so one slow file never blocks the rest.
+        """
+        # The plan is pulled as the backlog drains, not built for every task up front
+        self._costs = {}
+        if self.scheduler is not None:
+            planned = enumerate(self.scheduler.plan(tasks))
+        else:
+            planned = enumerate((payload, None) for payload in tasks)
+        is_ocr = (lambda task_id: self._costs[task_id].ocr) if self.lanes[OCR_LANE] else None
+        pending = _Backlog([], is_ocr)
+        payloads = {}
+        in_flight = 0
+        held_back = set()
+        next_check = time.monotonic() + POLL_SECONDS
+        planning = self._plan_ahead(planned, pending, payloads)
+
+        # Workers retired at the end of a previous run were not replaced
+        self._top_up()
+
+        while pending or in_flight or planning:
+            # 1. Keep every live worker's queue topped up (within the memory budget)
+            if planning:
+                planning = self._plan_ahead(planned, pending, payloads)
+            for worker in list(self._workers.values()):
+                while pending and not worker.retiring and len(worker.outstanding) < self.prefetch:
+                    task_id, payload = self._next_task(pending, worker, held_back)
+                    if task_id is None:
+                        break
+                    worker.task_queue.put((task_id, payload))
+                    worker.outstanding.append(task_id)
+                    in_flight += 1
+
+            # 2. Wait for the next result (or notice a crash / a hung file)
+            try:
+                worker_id, task_id, result, error, rss, retire = self._results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                failed, requeued = self._reap_crashed(pending, payloads)
+                in_flight -= requeued
+                for task_id in failed:
+                    in_flight -= 1
+                    yield payloads.pop(task_id), None, "Worker process crashed"
+                worker_id = None
+
+            if self.scheduler is not None and time.monotonic() >= next_check:
+                next_check = time.monotonic() + POLL_SECONDS
+                failed, requeued = self._reap_hung(pending, payloads)
+                in_flight -= requeued
+                for task_id, seconds in failed:
+                    in_flight -= 1
+                    yield payloads.pop(task_id), None, f"Timed out after {seconds:.0f}s"
+            if worker_id is None:
+                continue
+
+            worker = self._workers.get(worker_id)
+            if worker is None:
+                continue
+            worker.outstanding.remove(task_id)
+            in_flight -= 1
+            self.peak_worker_rss = max(self.peak_worker_rss, rss)
+
+            if retire:
+                # Hand its queued-but-unstarted tasks back, then replace it.
+                worker.retiring = True
+                in_flight -= len(worker.outstanding)
+                pending.extendleft((t, payloads[t]) for t in reversed(worker.outstanding))
+                self.recycled += 1
+                self._retire(worker, respawn=bool(pending or in_flight))
+
+            yield payloads.pop(task_id), result, error
+
+    # --- SCHEDULING ---
+    def _plan_ahead(self, planned, pending, payloads):
+        """
+        Moves planned tasks into the backlog until it holds PLAN_AHEAD of them.
+        Returns False once the plan is used up.
+        """
+        while len(pending) < PLAN_AHEAD:
+            item = next(planned, None)
+            if item is None:
+                return False
+            task_id, (payload, cost) = item
+            if cost is not None:
+                self._costs[task_id] = cost
+            payloads[task_id] = payload
+            pending.append((task_id, payload))
+        return True
+
+    def _in_flight_mb(self):
+        """Estimated RAM of the running tasks: a worker needs the largest of what it holds, not the sum."""
+        return sum(
+            max(self._costs[t].memory_mb for t in w.outstanding)
+            for w in self._workers.values() if w.outstanding
+        )
+
+    def _next_task(self, pending, worker, held_back):
+        """
+        The next task for `worker`: the head of its lane's queue if it fits
+        the memory budget, else the first smaller one within BACKFILL_WINDOW.
+        (None, None) if nothing fits right now.
+        """
+        if self.scheduler is None:
+            return pending.popleft()
+        busy = any(w.outstanding for w in self._workers.values())
+        base = self._in_flight_mb()
+        # Queued behind its own tasks, a file adds only what exceeds the worker's current peak
+        held = max((self._costs[t].memory_mb for t in worker.outstanding), default=0.0)
+        for lane_queue in pending.queues_for(worker.lane):
+            for position in range(min(len(lane_queue), BACKFILL_WINDOW)):
+                task_id, payload = lane_queue[position]
+                cost = self._costs[task_id]
+                if worker.outstanding and cost.seconds > PREFETCH_MAX_SECONDS:
+                    continue
+                if self.scheduler.admits(cost._replace(memory_mb=max(cost.memory_mb - held, 0.0)), base, busy):
+                    del lane_queue[position]
+                    return task_id, payload
+                if task_id not in held_back:
+                    held_back.add(task_id)
+                    self.scheduler.deferred += 1
+        return None, None
+
+    def _reap_hung(self, pending, payloads):
+        """
+        Kills workers that have been inside one file longer than the
+        scheduler's timeout for it. Same bookkeeping as _reap_crashed:
+        returns ([(task_id, seconds)], number_of_requeued_tasks).
+        """
+        failed, requeued = [], 0
+        for worker in list(self._workers.values()):
+            running = worker.running()
+            if running is None or not worker.outstanding:
+                continue
+            task_id, seconds = running
+            if task_id != worker.outstanding[0] or seconds <= self.scheduler.timeout(self._costs[task_id]):
+                continue
+            self.timed_out += 1
+            print(f"   ⏱️  Worker {worker.id} stuck for {seconds:.0f}s on task {task_id}, killing it")
+            worker.process.kill()
+            worker.outstanding.popleft()
+            failed.append((task_id, seconds))
+            requeued += len(worker.outstanding)
+            pending.extendleft((t, payloads[t]) for t in reversed(worker.outstanding))
+            self._retire(worker, respawn=True)
+        return failed, requeued
+
+    def _reap_crashed(self, pending, payloads):
+        """
+        Replaces workers that died (segfault in a native lib, OOM kill).
+        The task each one was running is reported failed; its queued tasks go
+        back to the front of `pending`.
+        Returns (failed_task_ids, number_of_requeued_tasks).
+        """
+        failed, requeued = [], 0
+        if not self._results.empty():
+            # A worker that just retired may look dead before its last result is read.
+            return failed, requeued
+        for worker in list(self._workers.values()):
+            if worker.process.is_alive():
+                continue
+            if worker.outstanding:
+                self.crashed += 1
+                task_id = worker.outstanding.popleft()
+                print(f"   💥 Worker {worker.id} died (exit code {worker.process.exitcode}) on task {task_id}")
+                failed.append(task_id)
+                requeued += len(worker.outstanding)
+                pending.extendleft((t, payloads[t]) for t in reversed(worker.outstanding))
+            self._retire(worker, respawn=True)
+        return failed, requeued
+
+    def report(self):
+        return (f"♻️  Workers recycled: {self.recycled} | crashed: {self.crashed} | "
+                f"timed out: {self.timed_out} | peak worker RSS: {self.peak_worker_rss / (1024 * 1024):,.0f} MB")
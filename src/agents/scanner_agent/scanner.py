@@ -1,12 +1,22 @@
 """
-Module: File Scanner Agent (Debug Mode)
-Description: Uses simple 'table.add()' to force data writing.
+Module: File Scanner Agent (Incremental)
+Description: Walks the target folder and keeps the 'files' table in sync.
+             The table remembers (size, mtime, inode) per file, so unchanged
+             files are neither re-hashed nor re-written. New/changed files are
+             hashed in parallel by the HashEngine and marked 'pending' for the
+             Embedder.
 """
 
+import os
 import pathlib
-import xxhash
-from typing import List, Optional
-from src.common.db import Document, get_table
+import time
+from typing import Dict, List, Optional
+from src.common.db import (
+    STATUS_DELETED, STATUS_PENDING, get_files_table, read_columns, sql_in
+)
+from src.agents.scanner_agent.hasher import (
+    DEFAULT_HASH_MODE, HashEngine, hash_file_full, hash_file_sampled, walk_files
+)
 
 # --- CONFIGURATION ---
 SUPPORTED_EXTS = {
@@ -24,68 +34,237 @@ SUPPORTED_EXTS = {
 }
 BATCH_SIZE = 100
 
-def calculate_file_hash(filepath: str) -> Optional[str]:
-    hasher = xxhash.xxh64()
+def load_manifest(files_table) -> Dict[str, dict]:
+    """
+    Loads the file manifest as {file_path: row}.
+    The table has no vector column, so this stays small even for huge libraries.
+    """
+    if files_table.count_rows() == 0:
+        return {}
+    return {row['file_path']: row for row in files_table.to_arrow().to_pylist()}
+
+def is_unchanged(entry: Optional[dict], stats) -> bool:
+    """A file is unchanged if the manifest saw the exact same size, mtime and inode."""
+    return (
+        entry is not None
+        and entry['status'] != STATUS_DELETED
+        and entry['file_size_bytes'] == stats.st_size
+        and entry['last_modified'] == stats.st_mtime
+        and entry['inode'] == stats.st_ino
+    )
+
+def _flush(files_table, batch: List[dict]):
+    """Upserts one batch of manifest rows (one LanceDB commit)."""
+    (files_table.merge_insert("file_path")
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .execute(batch))
+
+def _settle_owner(files_table, engine, owner, batch_rows, settled):
+    """
+    Re-hashes the earlier file of a sampled collision in full and rewrites its
+    row's hash (in the pending batch, or in the table), so identical copies end
+    up with the same hash. Its status is kept: the bytes did not change.
+    """
+    settled.add(owner)
     try:
-        with open(filepath, 'rb') as f:
-            while chunk := f.read(8192):
-                hasher.update(chunk)
-        return hasher.hexdigest()
-    except Exception as e:
-        print(f"⚠️  Error hashing {filepath}: {e}")
-        return None
-
-def scan_directory(root_path: str):
+        size = os.stat(owner).st_size
+    except OSError:
+        return  # Gone since; the deletion sweep / Embedder handles it
+    full_hash = engine.hash_full(owner, size)
+    if not full_hash:
+        return
+    if owner in batch_rows:
+        batch_rows[owner].update(file_hash=full_hash, hash_mode='full')
+    else:
+        files_table.update(where=sql_in("file_path", [owner]),
+                           values={'file_hash': full_hash, 'hash_mode': 'full'})
+
+def _upsert_hashed(files_table, engine, hashed, manifest, known_hashes, scan_time, counts) -> List[str]:
+    """
+    Turns (path, stat, digest) results into 'files' rows and upserts them in batches.
+    New and changed files become 'pending'; same-bytes files keep their status.
+    Returns the paths written.
+    """
+    written: List[str] = []
+    batch: Dict[str, dict] = {}   # file_path -> row, until the next flush
+    settled = set()               # Paths already re-hashed in full after a collision
+    for file_path, stats, file_hash in hashed:
+        if not file_hash:
+            continue
+
+        # Two files with the same sampled hash: settle it with full hashes of
+        # both, so copies share one hash and different files get two.
+        row_mode = engine.mode
+        owner = known_hashes.get(file_hash)
+        collision = engine.mode == 'sampled' and owner is not None and owner != file_path
+        if collision and owner not in settled:
+            _settle_owner(files_table, engine, owner, batch, settled)
+        if collision or file_path in settled:
+            file_hash = engine.hash_full(file_path, stats.st_size)
+            row_mode = 'full'
+            if not file_hash:
+                continue
+        else:
+            known_hashes[file_hash] = file_path
+
+        entry = manifest.get(file_path)
+        path = pathlib.Path(file_path)
+        row = {
+            # Pipeline state carries over; a new file starts empty.
+            'status': STATUS_PENDING,
+            'chunk_count': 0,
+            'indexed_at': 0.0,
+            'category': "Unsorted",
+            **(entry or {}),
+            'file_path': file_path,
+            'file_hash': file_hash,
+            'hash_mode': row_mode,
+            'filename': path.name,
+            'file_type': path.suffix.lower().strip('.'),
+            'file_size_bytes': stats.st_size,
+            'creation_date': stats.st_ctime,
+            'last_modified': stats.st_mtime,
+            'inode': stats.st_ino,
+            'last_seen': scan_time,
+        }
+
+        if entry is not None and entry['status'] != STATUS_DELETED:
+            previous_hash = file_hash
+            if entry.get('hash_mode', 'full') != row_mode:
+                # Mode switched since the last scan: compare like with like.
+                rehash = hash_file_sampled if entry.get('hash_mode') == 'sampled' else hash_file_full
+                previous_hash = rehash(file_path, stats.st_size)
+            edited = (entry['last_modified'] != stats.st_mtime
+                      or entry['file_size_bytes'] != stats.st_size)
+            if entry.get('hash_mode') == 'sampled' and edited and entry['file_hash'] == previous_hash:
+                # An edit between the samples keeps the sampled digest; it cannot
+                # prove the bytes are the same, so index again under a full hash
+                if row_mode != 'full':
+                    file_hash = engine.hash_full(file_path, stats.st_size)
+                    if not file_hash:
+                        continue
+                    row.update(file_hash=file_hash, hash_mode='full')
+                previous_hash = None
+            if entry['file_hash'] == previous_hash:
+                # Touched (copied back, metadata change) but same bytes: keep its
+                # status and its hash (stored text and chunk ids are keyed by it)
+                row.update(file_hash=entry['file_hash'], hash_mode=entry.get('hash_mode', 'full'))
+                counts['touched'] += 1
+            else:
+                # Content changed: the Embedder replaces its chunks.
+                row['status'] = STATUS_PENDING
+                counts['changed'] += 1
+        else:
+            row['status'] = STATUS_PENDING
+            counts['new'] += 1
+
+        batch[file_path] = row
+        written.append(file_path)
+        if len(batch) >= BATCH_SIZE:
+            _flush(files_table, list(batch.values()))
+            print(f"  -> Processed batch of {len(batch)} files...")
+            batch = {}
+
+    if batch:
+        _flush(files_table, list(batch.values()))
+        print(f"  -> Processed final batch of {len(batch)} files...")
+    return written
+
+def scan_directory(root_path: str, hash_mode: Optional[str] = None):
     root = pathlib.Path(root_path)
-    
+
     if not root.exists():
         raise FileNotFoundError(f"Path not found: {root_path}")
 
-    print(f"🔍 Scanning Target: {root_path}")
-    
-    docs_batch: List[Document] = []
-    table = get_table()
-    
-    # DEBUG: Print the DB Path to ensure we are looking at the same file
-    print(f"📂 Connected to Table: {table.name}")
-    
-    for path in root.rglob('*'):
-        if path.name.startswith("._"):
-            continue
-            
-        if path.is_file() and path.suffix.lower() in SUPPORTED_EXTS:
-            stats = path.stat()
-            file_hash = calculate_file_hash(str(path))
-            
-            if not file_hash: 
+    engine = HashEngine(hash_mode or DEFAULT_HASH_MODE)
+    print(f"🔍 Scanning Target: {root_path} (hash mode: {engine.mode}, {engine.workers} threads)")
+
+    files_table = get_files_table()
+    manifest = load_manifest(files_table)
+
+    print(f"📂 Connected to Table: {files_table.name} ({len(manifest)} files known)")
+
+    # digest -> path, used to spot sampled-hash collisions
+    known_hashes = {e['file_hash']: p for p, e in manifest.items() if e['status'] != STATUS_DELETED}
+
+    seen_paths = set()
+    counts = {'unchanged': 0, 'new': 0, 'changed': 0, 'touched': 0}
+    scan_time = time.time()
+
+    def candidates():
+        """Walks the tree and only yields files that need hashing."""
+        for file_path, stats in walk_files(str(root), SUPPORTED_EXTS):
+            seen_paths.add(file_path)
+            # FAST PATH: Same size, mtime and inode -> nothing to do.
+            if is_unchanged(manifest.get(file_path), stats):
+                counts['unchanged'] += 1
                 continue
+            yield file_path, stats
+
+    _upsert_hashed(files_table, engine, engine.hash_stream(candidates()),
+                   manifest, known_hashes, scan_time, counts)
+
+    print(engine.stats.report(engine.mode))
+
+    # --- RECORD DELETIONS ---
+    # Anything under this root that the manifest knew about but the walk did not find.
+    # The trailing separator keeps a sibling folder (/x/Docs2 next to /x/Docs) out.
+    root_prefix = os.path.abspath(str(root)).rstrip(os.sep) + os.sep
+    deleted = [
+        p for p, e in manifest.items()
+        if e['status'] != STATUS_DELETED and p.startswith(root_prefix) and p not in seen_paths
+    ]
+    for i in range(0, len(deleted), BATCH_SIZE):
+        paths = deleted[i:i + BATCH_SIZE]
+        files_table.update(where=sql_in("file_path", paths), values={'status': STATUS_DELETED})
+    # The Embedder removes the chunks of deleted files.
+
+    print(
+        f"✅ Scan Complete. {counts['new']} new, {counts['changed']} changed, "
+        f"{counts['touched']} re-stamped, {counts['unchanged']} unchanged, {len(deleted)} deleted."
+    )
+
+
+def scan_paths(paths: List[str], hash_mode: Optional[str] = None) -> List[str]:
+    """
+    Targeted scan for watch mode: only `paths` are stat'ed and hashed, and only
+    their manifest rows (plus, in sampled mode, the rows sharing one of their
+    hashes) are read. Paths that no longer exist are left to the Embedder,
+    which purges them. Returns the paths whose rows were written.
+    """
+    engine = HashEngine(hash_mode or DEFAULT_HASH_MODE)
+    files_table = get_files_table()
+    manifest = {}
+    for i in range(0, len(paths), BATCH_SIZE):
+        rows = files_table.search().where(sql_in("file_path", paths[i:i + BATCH_SIZE])).limit(None).to_list()
+        manifest.update((row['file_path'], row) for row in rows)
+
+    counts = {'unchanged': 0, 'new': 0, 'changed': 0, 'touched': 0}
+
+    def candidates():
+        for file_path in paths:
+            try:
+                stats = os.stat(file_path)
+            except OSError:
+                continue
+            if is_unchanged(manifest.get(file_path), stats):
+                counts['unchanged'] += 1
+                continue
+            yield file_path, stats
+
+    # A watch burst is small: hash it first, then look up only the rows that
+    # share one of these digests (all a sampled collision check needs)
+    hashed = list(engine.hash_stream(candidates()))
+    known_hashes = {}
+    if engine.mode == 'sampled':
+        digests = sorted({file_hash for _, _, file_hash in hashed if file_hash})
+        for i in range(0, len(digests), BATCH_SIZE):
+            where = f"{sql_in('file_hash', digests[i:i + BATCH_SIZE])} AND status != '{STATUS_DELETED}'"
+            state = read_columns(files_table, ['file_hash', 'file_path'], where=where)
+            known_hashes.update(zip(state['file_hash'].to_pylist(), state['file_path'].to_pylist()))
 
-            doc = Document(
-                id=file_hash,
-                filename=path.name,
-                file_path=str(path.absolute()),
-                file_type=path.suffix.lower().strip('.'),
-                file_size_bytes=stats.st_size,
-                creation_date=stats.st_ctime,
-                last_modified=stats.st_mtime,
-                summary="",
-                category="Unsorted"
-            )
-            docs_batch.append(doc)
-
-            if len(docs_batch) >= BATCH_SIZE:
-                # FIX: Use 'add' instead of 'merge_insert'.
-                # 'add' is the simplest way to write data. It crashes on duplicates,
-                # but since we are starting fresh, it GUARANTEES writing.
-                data_payload = [d.model_dump() for d in docs_batch]
-                table.add(data_payload) # <--- CHANGED THIS
-                
-                print(f"  -> Processed batch of {len(docs_batch)} files...")
-                docs_batch = [] 
-
-    if docs_batch:
-        data_payload = [d.model_dump() for d in docs_batch]
-        table.add(data_payload) # <--- CHANGED THIS
-        print(f"  -> Processed final batch of {len(docs_batch)} files...")
-
-    print("✅ Scan Complete. Database is synchronized.")
\ No newline at end of file
+    written = _upsert_hashed(files_table, engine, hashed, manifest, known_hashes, time.time(), counts)
+    print(f"🔍 {counts['new']} new, {counts['changed']} changed, {counts['touched']} re-stamped, "
+          f"{counts['unchanged']} unchanged.")
+    return written
@@ -0,0 +1,235 @@
+"""
+Module: Folder Watcher (Continuous Indexing)
+Description: Keeps the index in sync from filesystem events instead of full passes.
+
+watchdog reports every create / modify / delete / move under the target
+folder. Events are collected and debounced: a burst (a scanner dumping 200
+pages, a folder being copied) is flushed once it has been quiet for
+`debounce_seconds`, or after `max_delay_seconds` at the latest. Per flush:
+
+  1. Moves / renames rewrite `file_path` (+ filename) in 'files' and 'chunks'
+     in place. Nothing is re-hashed or re-embedded; a whole folder move is one
+     update per table.
+  2. Created / modified files are hashed and upserted (scan_paths).
+  3. The Embedder runs on just the touched paths with a model that stays
+     loaded: new content is embedded, vanished files have their chunks purged.
+"""
+
+import os
+import time
+import pathlib
+import threading
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from src.common.db import STATUS_DELETED, get_files_table, get_table, read_columns, sql_in
+from src.common.scalar_index import folder_range, prefix_range
+from src.agents.scanner_agent.hasher import walk_files
+from src.agents.scanner_agent.scanner import SUPPORTED_EXTS, scan_directory, scan_paths
+from src.agents.embedding_agent.embedder import delete_chunks, embed_documents, load_model, open_pool
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+WATCH_CFG = SETTINGS.get('watch', {})
+DEBOUNCE_SECONDS = WATCH_CFG.get('debounce_seconds', 2.0)
+MAX_DELAY_SECONDS = WATCH_CFG.get('max_delay_seconds', 30.0)
+POLL_SECONDS = 0.5
+
+
+def is_supported(path):
+    name = os.path.basename(path)
+    return not name.startswith("._") and os.path.splitext(name)[1].lower() in SUPPORTED_EXTS
+
+
+class ChangeSet:
+    """Everything seen since the last flush."""
+
+    def __init__(self):
+        self.touched = set()       # Created / modified files
+        self.removed = set()       # Deleted files
+        self.moves = {}            # src -> dest (files)
+        self.dir_moves = {}        # src -> dest (folders)
+        self.new_dirs = set()      # Folders created / moved in (walked at flush)
+        self.removed_dirs = set()
+
+    def __bool__(self):
+        return any((self.touched, self.removed, self.moves, self.dir_moves, self.new_dirs, self.removed_dirs))
+
+
+class ChangeCollector(FileSystemEventHandler):
+    """Runs on watchdog's thread; only records events. The main loop drains them."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+        self._changes = ChangeSet()
+        self._first_event = None
+        self._last_event = None
+
+    def _inside(self, path):
+        return bool(path) and os.path.abspath(path).startswith(self.root + os.sep)
+
+    def on_any_event(self, event):
+        if event.event_type in ('opened', 'closed_no_write'):
+            return
+        src = os.fsdecode(event.src_path)
+        dest = os.fsdecode(event.dest_path) if getattr(event, 'dest_path', None) else None
+
+        with self._lock:
+            c = self._changes
+            if event.is_directory:
+                if event.event_type == 'created':
+                    c.new_dirs.add(src)
+                elif event.event_type == 'deleted':
+                    c.removed_dirs.add(src)
+                elif event.event_type == 'moved':
+                    if self._inside(dest):
+                        c.dir_moves[src] = dest
+                    else:
+                        c.removed_dirs.add(src)
+                else:
+                    return
+            elif event.event_type == 'moved':
+                if is_supported(src) and self._inside(dest) and is_supported(dest):
+                    # a -> b -> c within one burst is a single move a -> c
+                    origin = next((s for s, d in c.moves.items() if d == src), src)
+                    c.moves.pop(origin, None)
+                    c.moves[origin] = dest
+                else:
+                    # Renamed from a temp file, to another type, or out of the folder
+                    if is_supported(src):
+                        c.removed.add(src)
+                    if self._inside(dest) and is_supported(dest):
+                        c.touched.add(dest)
+            elif is_supported(src):
+                if event.event_type == 'deleted':
+                    c.removed.add(src)
+                else:
+                    c.touched.add(src)
+            else:
+                return
+
+            now = time.monotonic()
+            self._first_event = self._first_event or now
+            self._last_event = now
+
+    def take(self, debounce=DEBOUNCE_SECONDS, max_delay=MAX_DELAY_SECONDS):
+        """The pending ChangeSet once the burst is quiet (or too old), else None."""
+        with self._lock:
+            if self._first_event is None:
+                return None
+            now = time.monotonic()
+            if now - self._last_event < debounce and now - self._first_event < max_delay:
+                return None
+            changes, self._changes = self._changes, ChangeSet()
+            self._first_event = self._last_event = None
+            return changes
+
+
+# --- APPLYING CHANGES ---
+def _rewrite_prefix(table, old, new):
+    """file_path under folder `old` -> under `new`, in one update."""
+    old, new = old.rstrip(os.sep) + os.sep, new.rstrip(os.sep) + os.sep
+    quoted = new.replace("'", "''")
+    table.update(
+        where=prefix_range('file_path', old),
+        values_sql={'file_path': f"concat('{quoted}', substr(file_path, {len(old) + 1}))"},
+    )
+
+def known_paths(files_table, where):
+    state = read_columns(files_table, ['file_path'], where=f"({where}) AND status != '{STATUS_DELETED}'")
+    return state['file_path'].to_pylist()
+
+def apply_moves(changes, files_table, table):
+    """
+    Renames rows in place. Returns destinations that could not be renamed
+    (source never indexed, or the type changed); they are scanned as new files.
+    """
+    for src, dest in changes.dir_moves.items():
+        _rewrite_prefix(files_table, src, dest)
+        _rewrite_prefix(table, src, dest)
+        print(f"📁 Moved folder {src} -> {dest}")
+
+    unresolved = []
+    moves = changes.moves
+    paths = list(moves) + list(moves.values())
+    known = set(known_paths(files_table, sql_in('file_path', paths))) if moves else set()
+    for src, dest in moves.items():
+        if src not in known or pathlib.Path(src).suffix.lower() != pathlib.Path(dest).suffix.lower():
+            if src in known:
+                changes.removed.add(src)
+            unresolved.append(dest)
+            continue
+        if dest in known:
+            # The move replaced an indexed document: its rows go first
+            delete_chunks(table, [dest])
+            files_table.delete(sql_in('file_path', [dest]))
+        path = pathlib.Path(dest)
+        values = {'file_path': dest, 'filename': path.name}
+        files_table.update(where=sql_in('file_path', [src]), values={**values, 'last_seen': time.time()})
+        table.update(where=sql_in('file_path', [src]), values=values)
+    if len(moves) > len(unresolved):
+        print(f"✏️  Renamed {len(moves) - len(unresolved)} files in place (no re-embedding)")
+    return unresolved
+
+def apply_changes(changes, model, pool, hash_mode=None):
+    files_table = get_files_table()
+    table = get_table()
+    t0 = time.time()
+
+    touched = set(changes.touched)
+    touched.update(apply_moves(changes, files_table, table))
+    for folder in changes.new_dirs | set(changes.dir_moves.values()):
+        touched.update(path for path, _ in walk_files(folder, SUPPORTED_EXTS))
+    removed = set(changes.removed)
+    for folder in changes.removed_dirs:
+        removed.update(known_paths(files_table, folder_range('file_path', folder)))
+
+    existing = sorted(p for p in touched if os.path.isfile(p))
+    # Saved via delete + create, or created then deleted within the burst
+    gone = sorted((removed | touched) - set(existing))
+
+    if existing:
+        scan_paths(existing, hash_mode)
+    if existing or gone:
+        # Pending files get embedded; vanished ones are purged (no model needed)
+        embed_documents(paths=existing + gone, model=model, pool=pool)
+    print(f"👀 Synced {len(existing)} changed, {len(gone)} removed in {time.time() - t0:.1f}s. Watching...")
+
+
+def watch_directory(root_path, hash_mode=None, reindex=False, initial_scan=True):
+    """
+    Catches up once (full scan + embed), then follows filesystem events until Ctrl-C.
+    The model and the extraction workers stay up between flushes, so a new
+    document costs its own extraction + embedding and nothing else.
+    """
+    root = os.path.abspath(root_path)
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"Path not found: {root_path}")
+
+    collector = ChangeCollector(root)
+    observer = Observer()
+    observer.schedule(collector, root, recursive=True)
+    # Start first: changes made during the catch-up pass are picked up afterwards
+    observer.start()
+    try:
+        model = load_model()
+        with open_pool() as pool:
+            if initial_scan:
+                scan_directory(root, hash_mode=hash_mode)
+                embed_documents(reindex=reindex, model=model, pool=pool)
+            print(f"👀 Watching {root} (debounce {DEBOUNCE_SECONDS}s)...")
+            while True:
+                time.sleep(POLL_SECONDS)
+                changes = collector.take()
+                if not changes:
+                    continue
+                try:
+                    apply_changes(changes, model, pool, hash_mode)
+                except Exception as e:
+                    # Keep watching; the next full scan or event retries these files
+                    print(f"❌ Watch Error: {e}")
+    finally:
+        observer.stop()
+        observer.join()
@@ -0,0 +1,163 @@
+"""
+Module: Search Client
+Description: Thin client for the local search server (server.py).
+
+The Streamlit app and the search CLI use this instead of loading their own
+model: every caller shares the server's one warm model, one open table and
+its query-embedding micro-batcher. Only the stdlib is imported here, so a
+client starts in milliseconds. The search modes and the filter / timing
+helpers a client needs live here too, so the app never imports search.py
+(and with it lancedb and the store's migrations).
+
+If the server is not running, `ensure_server()` starts it in the background
+(logging to data/search_server.log) and waits until it answers.
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import date, datetime
+
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+SERVER_CFG = SETTINGS.get('search_server', {})
+HOST = SERVER_CFG.get('host', '127.0.0.1')
+PORT = SERVER_CFG.get('port', 8765)
+AUTOSTART = SERVER_CFG.get('autostart', True)
+# Loading the model on a cold start can take a while
+STARTUP_TIMEOUT = SERVER_CFG.get('startup_timeout', 180)
+REQUEST_TIMEOUT = SERVER_CFG.get('request_timeout', 60)
+
+SEARCH_CFG = SETTINGS.get('search', {})
+SEARCH_MODES = ('vector', 'binary', 'fts', 'hybrid')
+DEFAULT_MODE = SEARCH_CFG.get('mode', 'hybrid')
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+SERVER_LOG = os.path.join(PROJECT_ROOT, 'data', 'search_server.log')
+
+
+class SearchServerError(RuntimeError):
+    """The server is unreachable or rejected the request."""
+
+
+# --- FILTER (DE)SERIALIZATION ---
+DATE_KEYS = ('date_from', 'date_to')
+
+def filters_to_json(filters):
+    """Dates become ISO strings ('2023-01-01' stays a whole day, see build_where)."""
+    if not filters:
+        return {}
+    encoded = {}
+    for key, value in filters.items():
+        if value is None or value == [] or value == '':
+            continue
+        if key in DATE_KEYS and isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        encoded[key] = value
+    return encoded
+
+def filters_from_json(filters):
+    """Inverse of filters_to_json."""
+    decoded = dict(filters or {})
+    for key in DATE_KEYS:
+        value = decoded.get(key)
+        if isinstance(value, str):
+            decoded[key] = datetime.fromisoformat(value) if 'T' in value else date.fromisoformat(value)
+    return decoded
+
+
+def format_timings(timings):
+    """'embed 12.1 ms | vector 8.3 ms | fts 9.0 ms | fuse 0.1 ms | total 18.0 ms'"""
+    return " | ".join(f"{stage} {ms:.1f} ms" for stage, ms in timings.items())
+
+
+# --- CLIENT ---
+class SearchClient:
+    def __init__(self, host=HOST, port=PORT, timeout=REQUEST_TIMEOUT):
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def _request(self, path, payload=None, timeout=None):
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', str(e))
+            except ValueError:
+                message = str(e)
+            raise SearchServerError(message) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise SearchServerError(f"Search server not reachable at {self.base_url} ({e})") from e
+
+    def health(self, timeout=None):
+        return self._request('/health', timeout=timeout)
+
+    def stats(self):
+        """Model, indexed file / chunk counts and categories (for the UI sidebar)."""
+        return self._request('/stats')
+
+    def is_running(self):
+        try:
+            return self.health(timeout=1).get('status') == 'ok'
+        except SearchServerError:
+            return False
+
+    def search_many(self, queries, limit=5, mode=None, filters=None, timings=None):
+        """Same contract as search.search_many, answered by the server."""
+        payload = {'queries': list(queries), 'limit': limit, 'filters': filters_to_json(filters)}
+        if mode:
+            payload['mode'] = mode
+        t0 = time.perf_counter()
+        response = self._request('/search', payload)
+        if timings is not None:
+            timings.update(response.get('timings', {}))
+            timings['roundtrip'] = (time.perf_counter() - t0) * 1000
+        return response['results']
+
+    def search(self, query, limit=5, mode=None, filters=None, timings=None):
+        return self.search_many([query], limit, mode, filters, timings)[0]
+
+
+def start_server():
+    """Starts server.py as a detached background process."""
+    os.makedirs(os.path.dirname(SERVER_LOG), exist_ok=True)
+    log = open(SERVER_LOG, 'ab')
+    return subprocess.Popen(
+        [sys.executable, '-u', '-m', 'src.agents.search_agent.server'],
+        cwd=PROJECT_ROOT, stdout=log, stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL, start_new_session=True,
+    )
+
+def ensure_server(client=None, autostart=AUTOSTART, timeout=STARTUP_TIMEOUT):
+    """Returns a client for a running server, starting one if allowed."""
+    client = client or SearchClient()
+    if client.is_running():
+        return client
+    if not autostart:
+        raise SearchServerError(
+            f"Search server not running at {client.base_url}. "
+            "Start it with: python -m src.agents.search_agent.server"
+        )
+
+    print(f"🚀 Starting search server (log: {SERVER_LOG})...")
+    process = start_server()
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.is_running():
+            return client
+        # If ours exited, another client may have won the port and still be
+        # loading its model, so keep waiting for that one.
+        time.sleep(0.5)
+    if process.poll() is not None:
+        raise SearchServerError(f"Search server exited on startup (see {SERVER_LOG})")
+    raise SearchServerError(f"Search server did not come up within {timeout}s (see {SERVER_LOG})")
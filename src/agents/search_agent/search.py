@@ -1,8 +1,45 @@
+"""
+Module: Search Engine
+Description: Semantic search over the 'chunks' table.
+
+The model and the table handle are loaded once per process (lazily, on the
+first query) and reused. The long-running search server (server.py) is that
+process for the UI and the CLI; `--local` searches in-process instead. Query vectors are kept in an LRU cache keyed by the
+normalized query text, so repeated searches skip the model entirely.
+`search_many()` embeds a whole list of queries in one forward pass and runs
+them as one batched LanceDB query.
+
+Modes:
+  'vector' - dense search on the bge vectors (meaning, paraphrases)
+  'binary' - dense, two-stage: Hamming scan over 1-bit codes, then exact
+             rerank of the best candidates on the full vectors
+  'fts'    - BM25 over content + filename (exact tokens: IDs, form codes)
+  'hybrid' - both, merged with Reciprocal Rank Fusion:
+             score(chunk) = sum over lists of 1 / (rrf_k + rank)
+
+Filters (file type, category, date range, folder) are applied *before* the
+vector / BM25 search, using the metadata indexes from scalar_index.py.
+"""
+
 import sys
 import os
-from sentence_transformers import SentenceTransformer
-from src.common.db import get_table
+import time
+import argparse
+import threading
+import unicodedata
+from datetime import date, datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.common.vector_index import vector_query
+from src.common.text_index import has_text_index, text_query
+from src.common.scalar_index import folder_range
+from src.common.binary_codes import binary_query, rerank
+from src.common.db import get_table, sql_in
 from src.config.loader import SETTINGS
+from src.agents.search_agent.client import (
+    DEFAULT_MODE, SEARCH_MODES, SearchServerError, ensure_server, format_timings,
+)
 
 # Allow running as script or module
 sys.path.append(os.getcwd())
@@ -11,52 +48,342 @@ sys.path.append(os.getcwd())
 # We use the key you added to settings.yaml
 MODEL_NAME = SETTINGS['system']['model_name']
 
-def search_documents(query: str, limit: int = 5):
+SEARCH_CFG = SETTINGS.get('search', {})
+QUERY_CACHE_SIZE = SEARCH_CFG.get('query_cache_size', 1024)
+RRF_K = SEARCH_CFG.get('rrf_k', 60)
+# Candidates each retriever contributes to the fusion, per requested result
+CANDIDATE_FACTOR = SEARCH_CFG.get('candidate_factor', 4)
+# Binary mode: candidates from the Hamming pass that get an exact rerank
+BINARY_RERANK_FACTOR = SEARCH_CFG.get('binary_rerank_factor', 20)
+BINARY_MIN_CANDIDATES = 100
+# A warm table handle is pinned to one table version; re-check for new chunks this often
+TABLE_REFRESH_SECONDS = 5.0
+
+RESULT_COLUMNS = ['id', 'filename', 'file_path', 'page_number', 'content']
+
+
+# --- PROCESS-WIDE HANDLES ---
+_model = None
+_table = None
+_table_checked = 0.0
+_init_lock = threading.Lock()
+# BM25 queries run here while the main thread embeds and runs the vector search
+_fts_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fts")
+
+def get_model():
+    """The SentenceTransformer, loaded on first use and shared by every caller."""
+    global _model
+    if _model is None:
+        with _init_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+def get_search_table():
+    """The 'chunks' table, opened once and refreshed to the latest version periodically."""
+    global _table, _table_checked
+    with _init_lock:
+        now = time.time()
+        if _table is None:
+            _table = get_table()
+            _table_checked = now
+        elif now - _table_checked > TABLE_REFRESH_SECONDS:
+            _table.checkout_latest()
+            _table_checked = now
+        return _table
+
+
+# --- QUERY EMBEDDING CACHE ---
+class QueryCache:
+    """Thread-safe LRU of normalized query -> vector."""
+
+    def __init__(self, max_size=QUERY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key, vector):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+_query_cache = QueryCache()
+
+def normalize_query(query: str) -> str:
     """
-    Embeds the query and searches the LanceDB table.
-    Returns a list of dictionaries with normalized confidence scores.
+    Unicode NFC + collapsed whitespace. Case is kept: not every configured
+    model is uncased, so 'IRS' and 'irs' may embed differently.
     """
-    try:
-        # 2. Connect
-        table = get_table()
-        
-        # 3. Embed Query using the correct Brain
-        model = SentenceTransformer(MODEL_NAME)
-        query_vector = model.encode([query])[0].tolist()
-        
-        # 4. Search
-        results = table.search(query_vector).limit(limit).to_list()
-        
-        if not results:
-            return []
-
-        # 5. Format Results
-        formatted_hits = []
-        for hit in results:
-            distance = hit['_distance']
-            
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+def encode_local(texts):
+    """Encodes with this process's own model (the default encoder)."""
+    return get_model().encode(texts, batch_size=len(texts), show_progress_bar=False)
+
+def embed_queries(queries, encoder=None):
+    """
+    Float32 matrix, one row per query. Cache misses are encoded in one batch
+    by `encoder` (texts -> vectors); the search server passes its micro-batcher.
+    """
+    keys = [normalize_query(q) for q in queries]
+    vectors = {}
+    missing = []
+    for key in keys:
+        if key in vectors or key in missing:
+            continue
+        vector = _query_cache.get(key)
+        if vector is None:
+            missing.append(key)
+        else:
+            vectors[key] = vector
+
+    if missing:
+        encoded = (encoder or encode_local)(missing)
+        for key, vector in zip(missing, np.asarray(encoded, dtype=np.float32)):
+            _query_cache.put(key, vector)
+            vectors[key] = vector
+    return np.stack([vectors[k] for k in keys])
+
+
+# --- FILTERS ---
+DATE_FIELDS = ('last_modified', 'creation_date')
+
+def _epoch(value):
+    """date / datetime / epoch seconds -> epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return value.timestamp()
+
+def build_where(filters):
+    """
+    SQL filter for LanceDB from a dict (all keys optional):
+        file_types  - ['pdf', 'docx']     (with or without the dot)
+        categories  - ['Finance']
+        path_prefix - '/Volumes/SSD/Documents/Bank'  (files inside that folder)
+        date_from / date_to - date, datetime or epoch seconds (inclusive)
+        date_field  - 'last_modified' (default) or 'creation_date'
+    Returns None when nothing is filtered.
+    """
+    if not filters:
+        return None
+    clauses = []
+    if filters.get('file_types'):
+        clauses.append(sql_in('file_type', [t.lower().lstrip('.') for t in filters['file_types']]))
+    if filters.get('categories'):
+        clauses.append(sql_in('category', filters['categories']))
+    if filters.get('path_prefix'):
+        clauses.append(folder_range('file_path', filters['path_prefix']))
+
+    date_field = filters.get('date_field') or 'last_modified'
+    if date_field not in DATE_FIELDS:
+        raise ValueError(f"Unknown date field '{date_field}' (expected one of {DATE_FIELDS})")
+    if filters.get('date_from') is not None:
+        clauses.append(f"{date_field} >= {_epoch(filters['date_from'])!r}")
+    if filters.get('date_to') is not None:
+        to = filters['date_to']
+        if isinstance(to, date) and not isinstance(to, datetime):
+            # A plain date means "until the end of that day"
+            clauses.append(f"{date_field} < {_epoch(to) + 86400.0!r}")
+        else:
+            clauses.append(f"{date_field} <= {_epoch(to)!r}")
+    return " AND ".join(clauses) or None
+
+
+# --- SEARCH ---
+def _format_hit(hit, score):
+    return {
+        'filename': hit['filename'],
+        'file_path': hit['file_path'],
+        'page_number': hit['page_number'],
+        'content': hit['content'],
+        'score': score
+    }
+
+def _vector_hits(table, vectors, depth, where=None):
+    """Ranked rows per query. One vector -> plain search; several -> one batched search."""
+    target = vectors[0].tolist() if len(vectors) == 1 else vectors.tolist()
+    query = vector_query(table, target)
+    if where:
+        query = query.where(where, prefilter=True)
+    rows = query.limit(depth).select(RESULT_COLUMNS + ['_distance']).to_list()
+    grouped = [[] for _ in range(len(vectors))]
+    for row in rows:
+        grouped[row.get('query_index', 0)].append(row)
+    for ranked in grouped:
+        ranked.sort(key=lambda r: r['_distance'])
+    return grouped
+
+def _binary_hits(table, vectors, limit, where, timings):
+    """Coarse Hamming pass over the sign codes, then exact rerank on full vectors."""
+    depth = max(limit * BINARY_RERANK_FACTOR, BINARY_MIN_CANDIDATES)
+    grouped = []
+    for vector in vectors:
+        t0 = time.perf_counter()
+        query = binary_query(table, vector)
+        if where:
+            query = query.where(where, prefilter=True)
+        candidates = query.limit(depth).select(RESULT_COLUMNS + ['vector', '_distance']).to_list()
+        _add_time(timings, 'coarse', t0)
+        t0 = time.perf_counter()
+        grouped.append(rerank(candidates, vector, limit))
+        _add_time(timings, 'rerank', t0)
+    return grouped
+
+def _fts_hits(table, query, depth, where=None):
+    search = text_query(table, query)
+    if where:
+        search = search.where(where, prefilter=True)
+    return search.limit(depth).select(RESULT_COLUMNS + ['_score']).to_list()
+
+def rrf_fuse(ranked_lists, limit, k=RRF_K):
+    """
+    Reciprocal Rank Fusion of several ranked row lists.
+    Rows are keyed by (file_path, chunk 'id'): ids come from the content hash,
+    so identical copies of a file share them and must stay separate hits.
+    Scores are scaled so a chunk ranked first everywhere gets 1.0.
+    """
+    fused, rows = {}, {}
+    for ranked in ranked_lists:
+        for rank, row in enumerate(ranked, start=1):
+            key = (row['file_path'], row['id'])
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+            rows.setdefault(key, row)
+    best = len(ranked_lists) / (k + 1)
+    order = sorted(fused, key=fused.get, reverse=True)[:limit]
+    return [(rows[i], fused[i] / best) for i in order]
+
+def _add_time(timings, stage, t0):
+    timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - t0) * 1000
+
+def _timed_fts(table, queries, depth, where):
+    t0 = time.perf_counter()
+    hits = [_fts_hits(table, q, depth, where) for q in queries]
+    return hits, t0
+
+def search_many(queries, limit: int = 5, mode: str = DEFAULT_MODE, filters=None, timings=None, encoder=None):
+    """
+    Runs several queries: one model forward pass, one batched vector query,
+    plus one BM25 query each in 'fts'/'hybrid' mode (in parallel with the
+    vector side).
+    `filters` restricts every query (see build_where) before ranking.
+    Returns one list of hits per query, in the same order.
+    If `timings` is a dict, per-stage latency (ms) is added to it.
+    `encoder` replaces the local model for query embedding (see embed_queries).
+    """
+    if not queries:
+        return []
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}' (expected one of {SEARCH_MODES})")
+    timings = {} if timings is None else timings
+    where = build_where(filters)
+    started = time.perf_counter()
+    table = get_search_table()
+
+    if mode in ('fts', 'hybrid') and not has_text_index(table):
+        print("⚠️ No full-text index yet (run the embedder); falling back to vector search.")
+        mode = 'vector'
+    uses_fts = mode in ('fts', 'hybrid')
+    depth = limit if mode != 'hybrid' else max(limit * CANDIDATE_FACTOR, 20)
+
+    sparse = [[] for _ in queries]
+    fts_job = None
+    if uses_fts:
+        fts_job = _fts_executor.submit(_timed_fts, table, queries, depth, where)
+
+    dense = [[] for _ in queries]
+    if mode != 'fts':
+        t0 = time.perf_counter()
+        vectors = embed_queries(queries, encoder)
+        _add_time(timings, 'embed', t0)
+        if mode == 'binary':
+            dense = _binary_hits(table, vectors, limit, where, timings)
+        else:
+            t0 = time.perf_counter()
+            dense = _vector_hits(table, vectors, depth, where)
+            _add_time(timings, 'vector', t0)
+
+    if fts_job is not None:
+        sparse, t0 = fts_job.result()
+        _add_time(timings, 'fts', t0)
+
+    t0 = time.perf_counter()
+    results = []
+    for dense_rows, sparse_rows in zip(dense, sparse):
+        if mode in ('vector', 'binary'):
             # Convert L2 Distance to Similarity Score (0% to 100%)
-            score = 1 / (1 + distance)
-            
-            formatted_hits.append({
-                'filename': hit['filename'],
-                'file_path': hit['file_path'],
-                'page_number': hit['page_number'],
-                'content': hit['content'],
-                'score': score
-            })
-            
-        return formatted_hits
+            hits = [_format_hit(r, 1 / (1 + r['_distance'])) for r in dense_rows[:limit]]
+        elif mode == 'fts':
+            top = max((r['_score'] for r in sparse_rows), default=1.0) or 1.0
+            hits = [_format_hit(r, r['_score'] / top) for r in sparse_rows[:limit]]
+        else:
+            hits = [_format_hit(r, score) for r, score in rrf_fuse([dense_rows, sparse_rows], limit)]
+        results.append(hits)
+    _add_time(timings, 'fuse', t0)
+    _add_time(timings, 'total', started)
+    return results
 
+def search_documents(query: str, limit: int = 5, mode: str = DEFAULT_MODE, filters=None, timings=None):
+    """
+    Searches the LanceDB table ('vector', 'fts' or 'hybrid').
+    `filters` e.g. {'file_types': ['pdf'], 'date_from': date(2023, 1, 1), 'date_to': date(2023, 12, 31)}
+    Returns a list of dictionaries with normalized confidence scores.
+    """
+    try:
+        return search_many([query], limit, mode, filters, timings)[0]
     except Exception as e:
         print(f"❌ Search Error: {e}")
         return []
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Search the indexed documents.")
+    parser.add_argument("queries", nargs="+", help="One or more queries (embedded in one batch)")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default=DEFAULT_MODE,
+                        help="'vector' (meaning), 'binary' (meaning, two-stage), 'fts' (exact words/IDs) "
+                             "or 'hybrid' (vector + fts, fused)")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--type", dest="file_types", nargs="+", help="Only these file types, e.g. pdf docx")
+    parser.add_argument("--category", dest="categories", nargs="+", help="Only these categories")
+    parser.add_argument("--path", dest="path_prefix", help="Only files under this folder")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="Modified on/after (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="Modified on/before (YYYY-MM-DD)")
+    parser.add_argument("--date-field", choices=DATE_FIELDS, default='last_modified')
+    parser.add_argument("--local", action="store_true",
+                        help="Search in this process instead of through the search server")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        q = sys.argv[1]
-        hits = search_documents(q)
+    args = parse_args()
+    timings = {}
+    filters = {k: getattr(args, k) for k in ('file_types', 'categories', 'path_prefix', 'date_from', 'date_to', 'date_field')}
+    if args.local:
+        results = search_many(args.queries, args.limit, args.mode, filters, timings)
+    else:
+        # Thin client: the server already has the model loaded
+        try:
+            results = ensure_server().search_many(args.queries, args.limit, args.mode, filters, timings)
+        except SearchServerError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    for q, hits in zip(args.queries, results):
+        if len(args.queries) > 1:
+            print(f"\n🔎 {q}")
         for h in hits:
             print(f"Found: {h['filename']} (Score: {h['score']:.2%})")
-    else:
-        print("Usage: python -m src.agents.search_agent.search 'your query'")
\ No newline at end of file
+    print(f"\n⏱️  {args.mode}: {format_timings(timings)}")
@@ -0,0 +1,230 @@
+"""
+Module: Search Server
+Description: Long-running local search service shared by the UI and the CLI.
+
+One process holds the warm model, the open 'chunks' table and the query
+cache; clients (client.py) talk to it over localhost HTTP:
+
+    GET  /health  -> {"status": "ok", "model": ..., "batching": {...}}
+    GET  /stats   -> indexed files / chunks, categories
+    POST /search  {"queries": [...], "limit": 5, "mode": "hybrid", "filters": {...}}
+                  -> {"results": [[hit, ...], ...], "timings": {...}}
+
+Requests are served on parallel threads. Their query embeddings go through
+an EmbedBatcher: texts arriving within `batch_window_ms` of each other are
+encoded in a single model.encode call, so several people searching at once
+cost about one forward pass instead of one each.
+
+Run:  python -m src.agents.search_agent.server [--host H] [--port P]
+"""
+
+import sys
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Allow running as script or module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.agents.search_agent.client import HOST, PORT, SERVER_CFG, filters_from_json
+from src.agents.search_agent.search import (
+    DEFAULT_MODE, MODEL_NAME, encode_local, get_model, get_search_table, search_many,
+)
+from src.common.db import STATUS_INDEXED, get_files_table, read_columns
+
+# --- CONFIGURATION ---
+BATCH_WINDOW_MS = SERVER_CFG.get('batch_window_ms', 5)
+MAX_BATCH = SERVER_CFG.get('max_batch', 64)
+STATS_TTL_SECONDS = 30.0
+
+
+# --- MICRO-BATCHING ---
+class EmbedBatcher:
+    """
+    Coalesces concurrent encode requests. The first waiting request opens a
+    window of `window_ms`; everything queued by then (up to `max_batch`
+    texts) is de-duplicated and encoded together on the batcher thread.
+    """
+
+    def __init__(self, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        threading.Thread(target=self._run, name="embed-batcher", daemon=True).start()
+
+    def encode(self, texts):
+        """Blocks until the batch holding `texts` is encoded. Same contract as encode_local."""
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _collect(self):
+        jobs = [self._queue.get()]
+        count = len(jobs[0][0])
+        deadline = time.perf_counter() + self.window
+        while count < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            count += len(job[0])
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            unique = list(dict.fromkeys(text for texts, _ in jobs for text in texts))
+            try:
+                rows = dict(zip(unique, np.asarray(encode_local(unique), dtype=np.float32)))
+            except Exception as e:
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+            for texts, future in jobs:
+                future.set_result(np.stack([rows[t] for t in texts]))
+            with self._lock:
+                self.batches += 1
+                self.requests += len(jobs)
+                self.texts += len(unique)
+
+    def report(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'texts': self.texts,
+                'requests_per_batch': round(self.requests / self.batches, 2) if self.batches else 0.0,
+            }
+
+
+# --- HTTP ---
+def _to_json(value):
+    """numpy scalars in hits -> plain Python."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+class SearchHandler(BaseHTTPRequestHandler):
+    server_version = "DocSearch/1.0"
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, default=_to_json).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {
+                'status': 'ok',
+                'model': MODEL_NAME,
+                'pid': os.getpid(),
+                'uptime_s': round(time.time() - self.server.started, 1),
+                'batching': self.server.batcher.report(),
+            })
+        elif self.path == '/stats':
+            try:
+                self._send(200, self.server.stats())
+            except Exception as e:
+                self._send(500, {'error': str(e)})
+        else:
+            self._send(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/search':
+            self._send(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            queries = request.get('queries') or []
+            if isinstance(queries, str):
+                queries = [queries]
+            filters = filters_from_json(request.get('filters'))
+        except (ValueError, TypeError) as e:
+            self._send(400, {'error': f"Bad request: {e}"})
+            return
+
+        timings = {}
+        try:
+            results = search_many(
+                queries, int(request.get('limit', 5)), request.get('mode') or DEFAULT_MODE,
+                filters, timings, encoder=self.server.batcher.encode,
+            )
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+        except Exception as e:
+            print(f"❌ Search Error: {e}")
+            self._send(500, {'error': str(e)})
+            return
+        self._send(200, {'results': results, 'timings': timings})
+
+    def log_message(self, format, *args):
+        pass  # One line per request would drown the log
+
+
+class SearchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, SearchHandler)
+        self.batcher = EmbedBatcher()
+        self.started = time.time()
+        self._stats = None
+        self._stats_time = 0.0
+        self._stats_lock = threading.Lock()
+
+    def stats(self):
+        """Sidebar numbers, recomputed at most every STATS_TTL_SECONDS."""
+        with self._stats_lock:
+            if self._stats is None or time.time() - self._stats_time > STATS_TTL_SECONDS:
+                files_table = get_files_table()
+                categories = read_columns(files_table, ['category'])['category'].to_pylist()
+                self._stats = {
+                    'model': MODEL_NAME,
+                    'files_indexed': files_table.count_rows(f"status = '{STATUS_INDEXED}'"),
+                    'chunks': get_search_table().count_rows(),
+                    'categories': sorted({c for c in categories if c}),
+                }
+                self._stats_time = time.time()
+            return self._stats
+
+
+def serve(host=HOST, port=PORT):
+    # Bind first: a second copy fails fast here instead of after loading the model
+    server = SearchServer((host, port))
+    print(f"🧠 Loading model {MODEL_NAME}...")
+    t0 = time.time()
+    get_model()
+    get_search_table()
+    print(f"🚀 Search server ready on http://{host}:{port} (warm-up {time.time() - t0:.1f}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Search server stopped.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local search server (one warm model for every client).")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
 import time
-from sentence_transformers import SentenceTransformer
-from src.common.db import get_table
+from datetime import date
+from src.agents.search_agent.client import (
+    DEFAULT_MODE, SEARCH_MODES, SearchServerError, ensure_server, format_timings,
+)
 from src.config.loader import SETTINGS
 
 # 1. SETUP PAGE
@@ -12,32 +14,63 @@ st.set_page_config(
     layout="wide"
 )
 
-# 2. LOAD BRAIN (Cached to prevent reloading on every click)
+# 2. CONNECT TO THE SEARCH SERVER
+# The model and the table live in one background server shared by every
+# browser session (and the CLI); this app is a thin client to it.
 @st.cache_resource
-def load_model():
-    model_name = SETTINGS['system']['model_name']
-    return SentenceTransformer(model_name), model_name
+def load_client():
+    return ensure_server()
+
+@st.cache_data(ttl=30)
+def load_stats():
+    return load_client().stats()
 
 try:
-    model, active_model_name = load_model()
-except Exception as e:
-    st.error(f"❌ Failed to load AI Model: {e}")
+    client = load_client()
+except SearchServerError as e:
+    st.error(f"❌ Search server unavailable: {e}")
     st.stop()
 
 # 3. SIDEBAR INFO
 with st.sidebar:
     st.title("🧠 System Status")
-    st.info(f"**Active Brain:**\n{active_model_name}")
-    st.caption(f"Dimensions: {SETTINGS['system']['model_dimension']}")
     
     # Show DB Stats
     try:
-        table = get_table()
-        row_count = len(table)
-        st.success(f"📚 Documents Indexed: {row_count}")
-    except:
+        stats = load_stats()
+        st.info(f"**Active Brain:**\n{stats['model']}")
+        st.caption(f"Dimensions: {SETTINGS['system']['model_dimension']}")
+        st.success(f"📚 Documents Indexed: {stats['files_indexed']}")
+        st.caption(f"Chunks: {stats['chunks']}")
+    except SearchServerError:
+        stats = {'categories': []}
         st.warning("Database not found or empty.")
 
+    st.divider()
+    search_mode = st.radio(
+        "Search Mode", SEARCH_MODES, index=SEARCH_MODES.index(DEFAULT_MODE),
+        help="vector: meaning | binary: meaning, fast two-stage | fts: exact words and IDs | "
+             "hybrid: vector + fts, rank-fused",
+    )
+
+    # Filters are applied before ranking (metadata indexes), so they also speed search up
+    st.subheader("🎛️ Filters")
+    file_types = sorted({ext.lstrip('.') for ext in SETTINGS.get('supported_extensions', {})})
+    selected_types = st.multiselect("File types", file_types)
+    selected_categories = st.multiselect("Categories", stats.get('categories', []))
+    path_prefix = st.text_input("Folder", placeholder="/Volumes/Extreme SSD/Documents/Bank")
+    use_dates = st.checkbox("Filter by modified date")
+    date_range = st.date_input("Modified between", (date(date.today().year, 1, 1), date.today()),
+                               disabled=not use_dates)
+
+    filters = {
+        'file_types': selected_types,
+        'categories': selected_categories,
+        'path_prefix': path_prefix.strip() or None,
+    }
+    if use_dates and isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        filters['date_from'], filters['date_to'] = date_range
+
 # 4. MAIN INTERFACE
 st.title("🔎 Personal Document Search")
 st.markdown("ask natural questions like *'What is my passport number?'* or *'Show me tax forms from 2022'*")
@@ -47,26 +80,21 @@ query = st.text_input("Enter your query:", placeholder="Type here...")
 if query:
     start_time = time.time()
     
-    # A. Embed Query
-    query_vector = model.encode([query])[0].tolist()
-    
-    # B. Search Database
+    # A. Embed + Search (on the server, which keeps the model warm)
     try:
-        table = get_table()
-        # Search and limit to top 5 results
-        results = table.search(query_vector).limit(5).to_list()
-        
+        timings = {}
+        results = client.search(query, limit=5, mode=search_mode, filters=filters, timings=timings)
         duration = time.time() - start_time
         
         if not results:
             st.warning("No matching documents found.")
         else:
             st.subheader(f"Top Results ({duration:.2f}s)")
+            st.caption(f"⏱️ {format_timings(timings)}")
             
             for hit in results:
-                # Calculate Confidence Score (Inverse Distance)
-                distance = hit['_distance']
-                score = 1 - (distance / 2) # Approximation for Cosine Distance
+                # Relevance from the search module (0-1 for every mode)
+                score = hit['score']
                 
                 # Visual Confidence Bar
                 st.write(f"**📄 {hit['filename']}** (Page {hit['page_number']})")
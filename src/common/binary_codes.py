@@ -0,0 +1,79 @@
+"""
+Module: Binary Codes
+Description: 1-bit sign codes of the chunk vectors for two-stage retrieval.
+
+Each chunk stores `code` = packbits(vector > 0): 1024 floats (4 KB) become
+128 bytes. A query then runs in two stages:
+  1. Coarse: Hamming-distance scan over the codes (32x less data than the
+     float vectors), keeping the best `depth` candidates.
+  2. Rerank: exact distance on the full vectors of those candidates only,
+     in the metric of `vector_index.metric` (the same as vector mode).
+
+Sign codes preserve angular neighborhoods well for normalized embedding
+models like bge, so a modest `depth` recovers almost all of the exact top-k.
+"""
+
+import numpy as np
+import pyarrow as pa
+
+from src.common.db import VECTOR_DIM
+from src.common.vector_index import METRIC
+
+CODE_COLUMN = "code"
+CODE_BYTES = VECTOR_DIM // 8
+
+
+def sign_codes(matrix):
+    """(N, dim) float matrix -> (N, dim / 8) uint8 sign codes."""
+    return np.packbits(np.asarray(matrix) > 0, axis=1)
+
+
+def code_array(matrix):
+    """Sign codes as the Arrow column stored in 'chunks'."""
+    codes = sign_codes(matrix)
+    flat = pa.array(codes.ravel(), type=pa.uint8())
+    return pa.FixedSizeListArray.from_arrays(flat, codes.shape[1])
+
+
+def binary_query(table, vector):
+    """Stage 1: Hamming search over the codes (brute force, but 32x smaller than floats)."""
+    code = sign_codes(np.asarray(vector, dtype=np.float32)[None, :])[0]
+    return table.search(code, vector_column_name=CODE_COLUMN).distance_type("hamming")
+
+
+def _l2(matrix, query):
+    return ((matrix - query) ** 2).sum(axis=1)
+
+
+def _cosine(matrix, query):
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    return 1.0 - (matrix @ query) / np.maximum(norms, 1e-12)
+
+
+def _dot(matrix, query):
+    return 1.0 - matrix @ query
+
+
+# LanceDB's distance for each metric, so binary mode ranks and scores like vector mode
+DISTANCES = {'l2': _l2, 'cosine': _cosine, 'dot': _dot}
+
+
+def rerank(rows, vector, limit, metric=METRIC):
+    """
+    Stage 2: exact distance in `metric` (as LanceDB computes it: squared L2,
+    1 - cosine similarity or 1 - dot product) on the candidates' full vectors.
+    Each row must carry 'vector'; it is dropped from the returned rows.
+    """
+    if metric not in DISTANCES:
+        raise ValueError(f"Binary search cannot rerank with metric '{metric}' (use one of: {', '.join(DISTANCES)})")
+    if not rows:
+        return []
+    matrix = np.asarray([r['vector'] for r in rows], dtype=np.float32)
+    query = np.asarray(vector, dtype=np.float32)
+    distances = DISTANCES[metric](matrix, query)
+    ranked = []
+    for i in np.argsort(distances)[:limit]:
+        row = {k: v for k, v in rows[i].items() if k != 'vector'}
+        row['_distance'] = float(distances[i])
+        ranked.append(row)
+    return ranked
@@ -1,5 +1,6 @@
 import lancedb
 import os
+import pyarrow as pa
 from lancedb.pydantic import LanceModel, Vector
 from pydantic import Field
 from pathlib import Path
@@ -22,16 +23,58 @@ os.makedirs(DB_PATH, exist_ok=True)
 VECTOR_DIM = SETTINGS['system']['model_dimension']
 print(f"🔌 Database Schema Configured for: {VECTOR_DIM} dimensions")
 
+# --- TABLE NAMES ---
+FILES_TABLE = "files"    # One small row per file (no vectors)
+CHUNKS_TABLE = "chunks"  # One row per text chunk, with its vector
+EMBED_CACHE_TABLE = "embedding_cache"  # Vectors keyed by chunk text + model
+EXTRACTIONS_TABLE = "extractions"      # Extracted page text keyed by file hash
+
+# File lifecycle in the 'files' table
+STATUS_PENDING = "pending"   # New or changed on disk, waiting for the Embedder
+STATUS_INDEXED = "indexed"   # Chunks + vectors are in the 'chunks' table
+STATUS_EMPTY = "empty"       # Processed, but no text could be extracted
+STATUS_FAILED = "failed"     # Extraction crashed; retried once the file changes
+STATUS_DELETED = "deleted"   # Gone from disk; its chunks have been removed
+
+
 # --- SCHEMA DEFINITION ---
-class Document(LanceModel):
+class FileRecord(LanceModel):
     """
-    The Master Schema for our Document Database.
+    The File Manifest: one row per file on disk.
+    Written by the Scanner, updated by the Embedder. It holds no vectors, so
+    change detection and dashboards read kilobytes instead of the vector store.
+    If (size, mtime, inode) still match the disk, the file is unchanged and the
+    Scanner skips hashing it.
+    """
+    file_path: str = Field(pk=True)
+    file_hash: str
+    hash_mode: str = Field(default="full")  # 'full' or 'sampled' (see hasher.py)
+
+    # Metadata Fields
+    filename: str
+    file_type: str
+    file_size_bytes: int
+    creation_date: float = Field(default=0.0)
+    last_modified: float = Field(default=0.0)
+    inode: int = Field(default=0)
+
+    # Pipeline State
+    status: str = Field(default=STATUS_PENDING)
+    chunk_count: int = Field(default=0)
+    indexed_at: float = Field(default=0.0)
+    last_seen: float = Field(default=0.0)
+    category: str = Field(default="Unsorted")
+
+
+class Chunk(LanceModel):
+    """
+    The Vector Store: one row per embedded text chunk.
     Inherits from LanceModel to allow seamless integration with LanceDB.
     """
-    # Primary Key: Unique ID (usually file_hash + page_num)
+    # Primary Key: Unique ID (file_hash + page_num + char offset)
     id: str = Field(pk=True)
 
-    # Metadata Fields
+    # Metadata Fields (copied from the file so search results need no join)
     filename: str
     file_path: str
     file_type: str
@@ -45,24 +88,95 @@ class Document(LanceModel):
 
     # DYNAMIC VECTOR SIZE
     # We use the variable from config instead of hardcoded 384.
-    # We also update the default zero-vector to match this size.
-    vector: Vector(VECTOR_DIM) = Field(default=[0.0] * VECTOR_DIM)
+    vector: Vector(VECTOR_DIM)
+    # 1-bit sign code of the vector for the coarse search pass (see binary_codes.py)
+    code: Vector(VECTOR_DIM // 8, value_type=pa.uint8())
 
     # Future-proofing fields (Phase 2/3)
     summary: str = Field(default="")
     category: str = Field(default="Unsorted")
 
 
+class CachedEmbedding(LanceModel):
+    """
+    The Embedding Cache: one vector per distinct (embedding input, model).
+    Lets re-indexing skip model.encode for chunk texts embedded before.
+    """
+    # xxh64 of model name + exact embedding input (see embed_cache.py)
+    key: str = Field(pk=True)
+    model: str
+    vector: Vector(VECTOR_DIM)
+    last_used: float = Field(default=0.0)
+
+
+class ExtractedPage(LanceModel):
+    """
+    The Extraction Store: the text each extractor produced, per file content.
+    Re-chunking or switching models re-reads this instead of re-running OCR.
+    A file that yielded no text is stored as one empty row (seq 0, page 0).
+    """
+    file_hash: str
+    seq: int                 # Order of the page in the extractor's output
+    page_number: int
+    text: str = Field(default="")
+    extractor: str           # Extractor class name, e.g. 'PDFExtractor'
+    method: str              # How the text was obtained: 'native', 'ocr' or 'metadata' (photos)
+    extracted_at: float = Field(default=0.0)
+
+
 # --- DATABASE CONNECTION ---
-def get_table(table_name="documents"):
+_migration_checked = False
+
+def connect():
+    """
+    Opens the embedded LanceDB instance.
+    The first call per process upgrades stores written by older versions.
+    """
+    global _migration_checked
+    db = lancedb.connect(DB_PATH)
+    if not _migration_checked:
+        _migration_checked = True
+        from src.common.migrations import add_chunk_codes, migrate_legacy_store
+        migrate_legacy_store(db)
+        add_chunk_codes(db)
+    return db
+
+
+def get_table(table_name=CHUNKS_TABLE, schema=Chunk):
     """
     Connects to the embedded LanceDB instance and retrieves the requested table.
     Safely creates the table if it does not exist.
     """
-    db = lancedb.connect(DB_PATH)
+    db = connect()
 
     if table_name in db.table_names():
         return db.open_table(table_name)
     else:
         # Create a new table using the Dynamic Schema defined above
-        return db.create_table(table_name, schema=Document)
\ No newline at end of file
+        return db.create_table(table_name, schema=schema)
+
+
+def get_files_table():
+    """Returns the File Manifest table (created on first use)."""
+    return get_table(FILES_TABLE, schema=FileRecord)
+
+
+# --- QUERY HELPERS ---
+def sql_in(column, values):
+    """
+    Builds a `column IN (...)` filter for LanceDB.
+    Single quotes are doubled so paths like "Bob's Taxes.pdf" stay valid SQL.
+    """
+    quoted = ", ".join("'" + str(v).replace("'", "''") + "'" for v in values)
+    return f"{column} IN ({quoted})"
+
+
+def read_columns(table, columns, where=None):
+    """
+    Reads only the requested columns as a PyArrow table.
+    Much cheaper than `table.to_pandas()` when the table holds vectors.
+    """
+    query = table.search().select(columns)
+    if where:
+        query = query.where(where)
+    return query.limit(None).to_arrow()
\ No newline at end of file
@@ -1,6 +1,6 @@
 from src.config.loader import SETTINGS
-# Import everything from our new package
-from src.extractors import *
+# Lazy registry: an extractor's module (and its libraries) is imported on first use
+import src.extractors as extractors
 
 class ExtractorFactory:
     @staticmethod
@@ -14,11 +14,11 @@ class ExtractorFactory:
         if not extractor_class_name:
             return None
         
-        # Look up the class in the global namespace of this module
-        # (Since we imported * from src.extractors, they are available here)
-        extractor_class = globals().get(extractor_class_name)
+        # Resolved through src.extractors.__getattr__, which imports only
+        # the module this class lives in
+        extractor_class = getattr(extractors, extractor_class_name, None)
         
         if extractor_class:
             return extractor_class()
         
-        return None
\ No newline at end of file
+        return None
@@ -1,60 +1,102 @@
 """
 Module: Image Classifier (Doc vs Photo)
-Description: Uses computer vision heuristics to determine if an image 
+Description: Uses computer vision heuristics to determine if an image
              is likely a scanned document/screenshot or a natural photograph.
+
+Built for triage before OCR (see embedding_agent/triage.py), so it never
+decodes a full-size image:
+  - the header gives the size; JPEGs are then decoded at 1/2, 1/4 or 1/8
+    scale straight from the DCT (IMREAD_REDUCED_GRAYSCALE_*), to about
+    THUMB_SIZE px on the short side
+  - thumbnails are stacked and scored together with NumPy: one pass of
+    gradient arithmetic for the whole batch instead of a Canny per image
 """
 
 import cv2
 import numpy as np
 
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+TRIAGE_CFG = SETTINGS.get('image_triage', {})
+# Documents have sharp edges (letters) on a flat background (paper, UI).
+# [min_edge_density, min_flat_fraction] pairs; matching any one means "document":
+# sparse text on a clean background (screenshots, scans), or dense text on a
+# noisier one (phone photos of pages)
+DOCUMENT_RULES = TRIAGE_CFG.get('rules', [[0.015, 0.75], [0.08, 0.45]])
+
+# Thumbnails are decoded to at least THUMB_SIZE px on the short side, then scored at SCORE_SIZE
+# (much smaller and small print no longer leaves edges)
+THUMB_SIZE = 288
+SCORE_SIZE = 384
+# Gradient (|dx| + |dy|, 0-510) above which a pixel is an edge / below which it is flat
+EDGE_GRADIENT = 64
+FLAT_GRADIENT = 6
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_GRAYSCALE_8), (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                  (2, cv2.IMREAD_REDUCED_GRAYSCALE_2))
+
+
+def image_size(image_path):
+    """(width, height) from the file header, or None (unknown / unreadable format)."""
+    try:
+        from PIL import Image
+        with Image.open(image_path) as img:
+            return img.size
+    except Exception:
+        return None
+
+def load_thumbnail(image_path):
+    """Grayscale SCORE_SIZE x SCORE_SIZE thumbnail, decoded at reduced size; None if unreadable."""
+    size = image_size(image_path)
+    flag = cv2.IMREAD_GRAYSCALE
+    if size:
+        for factor, reduced in _REDUCED_FLAGS:
+            if min(size) // factor >= THUMB_SIZE:
+                flag = reduced
+                break
+    img = cv2.imread(image_path, flag)
+    if img is None:
+        return None
+    return cv2.resize(img, (SCORE_SIZE, SCORE_SIZE), interpolation=cv2.INTER_AREA)
+
+def score_thumbnails(thumbs):
+    """
+    (edge_density, flat_fraction) arrays for a stack of thumbnails (N, H, W) uint8.
+    Edge density: share of pixels on a sharp edge. Flat fraction: share of
+    pixels with (almost) no gradient, i.e. uniform background.
+    """
+    stack = np.asarray(thumbs, dtype=np.int16)
+    gradient = np.abs(np.diff(stack, axis=2))[:, 1:, :] + np.abs(np.diff(stack, axis=1))[:, :, 1:]
+    pixels = gradient.shape[1] * gradient.shape[2]
+    edge_density = np.count_nonzero(gradient > EDGE_GRADIENT, axis=(1, 2)) / pixels
+    flat_fraction = np.count_nonzero(gradient < FLAT_GRADIENT, axis=(1, 2)) / pixels
+    return edge_density, flat_fraction
+
+def classify_thumbnails(thumbs):
+    """Boolean array: True where the thumbnail looks like a document/screenshot."""
+    if len(thumbs) == 0:
+        return np.zeros(0, dtype=bool)
+    edge_density, flat_fraction = score_thumbnails(thumbs)
+    is_document = np.zeros(len(edge_density), dtype=bool)
+    for min_edge, min_flat in DOCUMENT_RULES:
+        is_document |= (edge_density >= min_edge) & (flat_fraction >= min_flat)
+    return is_document
+
 def is_scanned_document(image_path: str) -> bool:
     """
     Analyzes image structure to detect if it contains dense text (Document)
     or natural scenes (Photo).
-    
+
     Returns:
         True if it looks like a document/screenshot.
         False if it looks like a natural photo.
     """
     try:
-        # 1. Read Image in Grayscale
-        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-        if img is None:
+        thumb = load_thumbnail(image_path)
+        if thumb is None:
             return False
-
-        # 2. Resize for Speed (Analyze a small thumbnail)
-        # We don't need 4K resolution to check for text texture.
-        h, w = img.shape
-        scale = 500 / max(h, w)
-        small_img = cv2.resize(img, None, fx=scale, fy=scale)
-        
-        # 3. Edge Detection (Canny)
-        # Text creates very strong, sharp edges compared to natural objects.
-        edges = cv2.Canny(small_img, 50, 150)
-        
-        # 4. Calculate Edge Density
-        # What % of the image is "edges"? 
-        # Documents (lots of letters) usually have high edge density.
-        total_pixels = small_img.size
-        edge_pixels = np.count_nonzero(edges)
-        edge_density = edge_pixels / total_pixels
-        
-        # 5. Check Background Consistency (Variance)
-        # Documents usually have a uniform background (white/paper).
-        # We look at the variance of the non-edge pixels.
-        # (This is a simplified check: High variance = Complex photo background)
-        
-        # Heuristic Thresholds:
-        # - Documents typically have > 5% edge density (dense text).
-        # - Screenshots can go lower, but natural photos usually are < 2% or extremely high > 20% (noise).
-        
-        # Let's stick to a simple robust check:
-        # If we see a healthy amount of sharp edges, we assume it's text.
-        if edge_density > 0.05: 
-            return True
-            
-        return False
+        return bool(classify_thumbnails([thumb])[0])
 
     except Exception as e:
         print(f"⚠️  Error classifying image {image_path}: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,177 @@
+"""
+Module: Store Migrations
+Description: Upgrades LanceDB stores written by older versions of the pipeline.
+
+Legacy layout:
+    'documents'     - Scanner rows (zero vectors) mixed with embedded chunks.
+    'scan_manifest' - The Scanner's (size, mtime, inode) cache.
+Current layout:
+    'files'         - One row per file (manifest + pipeline status).
+    'chunks'        - One row per embedded chunk (vector + binary sign code).
+
+The migration is idempotent: the new tables are rebuilt from the legacy ones
+and the legacy tables are dropped last, so an interrupted run simply redoes it.
+"""
+
+import numpy as np
+import pyarrow as pa
+
+from src.common.db import (
+    Chunk, FileRecord, CHUNKS_TABLE, FILES_TABLE, VECTOR_DIM,
+    STATUS_DELETED, STATUS_INDEXED, STATUS_PENDING,
+)
+from src.common.binary_codes import CODE_COLUMN, code_array
+
+LEGACY_DOCUMENTS = "documents"
+LEGACY_MANIFEST = "scan_manifest"
+CODES_TMP = "chunks_with_codes"
+
+# Rows streamed per step, so vectors never have to fit in RAM all at once.
+MIGRATION_BATCH = 10_000
+
+
+def _valid_vector_mask(batch: pa.RecordBatch) -> np.ndarray:
+    """True for rows whose vector has the expected size and is not all zeros."""
+    if 'vector' not in batch.schema.names:
+        return np.zeros(batch.num_rows, dtype=bool)
+    col = batch.column('vector')
+    if not pa.types.is_fixed_size_list(col.type) or col.type.list_size != VECTOR_DIM:
+        return np.zeros(batch.num_rows, dtype=bool)
+    # Null vectors become zeros, so they fail the non-zero check below
+    values = col.fill_null([0.0] * VECTOR_DIM) if col.null_count else col
+    matrix = values.flatten().to_numpy(zero_copy_only=False).reshape(-1, VECTOR_DIM)
+    return np.any(matrix != 0.0, axis=1)
+
+
+def _vector_matrix(batch):
+    return batch.column('vector').flatten().to_numpy(zero_copy_only=False).reshape(-1, VECTOR_DIM)
+
+
+def _migrate_chunks(db, legacy):
+    """
+    Copies real chunks into 'chunks' and summarises every file for 'files'.
+    Returns {file_path: summary dict}.
+    """
+    files = {}
+    chunks = db.create_table(CHUNKS_TABLE, schema=Chunk, mode="overwrite")
+    chunk_columns = list(Chunk.to_arrow_schema().names)
+
+    reader = legacy.search().limit(None).to_batches(MIGRATION_BATCH)
+    for batch in reader:
+        valid = _valid_vector_mask(batch)
+        rows = batch.drop_columns(['vector']).to_pylist()
+        for row, is_chunk in zip(rows, valid):
+            info = files.setdefault(row['file_path'], {
+                'file_hash': row['id'].split('_p')[0],
+                'filename': row['filename'],
+                'file_type': row['file_type'],
+                'file_size_bytes': row['file_size_bytes'],
+                'creation_date': row['creation_date'],
+                'last_modified': row['last_modified'],
+                'category': row.get('category') or "Unsorted",
+                'chunk_count': 0,
+                'indexed_at': 0.0,
+            })
+            # Scanner rows carry the disk mtime; chunk rows carry the embed time.
+            info['last_modified'] = min(info['last_modified'], row['last_modified'])
+            if is_chunk:
+                info['chunk_count'] += 1
+                info['indexed_at'] = max(info['indexed_at'], row['last_modified'])
+
+        if valid.any():
+            kept = batch.filter(pa.array(valid))
+            kept = kept.append_column(CODE_COLUMN, code_array(_vector_matrix(kept)))
+            chunks.add(kept.select([c for c in chunk_columns if c in kept.schema.names]))
+
+    return files
+
+
+def migrate_legacy_store(db):
+    names = set(db.table_names())
+    if LEGACY_DOCUMENTS not in names and LEGACY_MANIFEST not in names:
+        return
+
+    print("🔧 Migrating database to the files/chunks layout (one-time)...")
+
+    files = {}
+    if LEGACY_DOCUMENTS in names:
+        files = _migrate_chunks(db, db.open_table(LEGACY_DOCUMENTS))
+
+    manifest = {}
+    if LEGACY_MANIFEST in names:
+        manifest = {r['file_path']: r for r in db.open_table(LEGACY_MANIFEST).to_arrow().to_pylist()}
+
+    records = []
+    for file_path in set(files) | set(manifest):
+        info = files.get(file_path, {})
+        scan = manifest.get(file_path)
+        filename = info.get('filename') or file_path.rsplit('/', 1)[-1]
+        status = STATUS_INDEXED if info.get('chunk_count') else STATUS_PENDING
+        if scan and scan['status'] == 'deleted':
+            status = STATUS_DELETED
+
+        records.append({
+            'file_path': file_path,
+            'file_hash': scan['file_hash'] if scan else info['file_hash'],
+            'hash_mode': scan.get('hash_mode', 'full') if scan else 'full',
+            'filename': filename,
+            'file_type': info.get('file_type') or filename.rsplit('.', 1)[-1].lower(),
+            'file_size_bytes': scan['file_size_bytes'] if scan else info['file_size_bytes'],
+            'creation_date': info.get('creation_date', 0.0),
+            # Without an inode, the next scan re-hashes the file once to confirm it.
+            'last_modified': scan['last_modified'] if scan else info['last_modified'],
+            'inode': scan['inode'] if scan else 0,
+            'status': status,
+            'chunk_count': info.get('chunk_count', 0),
+            'indexed_at': info.get('indexed_at', 0.0),
+            'last_seen': scan['last_seen'] if scan else 0.0,
+            'category': info.get('category', "Unsorted"),
+        })
+
+    files_table = db.create_table(FILES_TABLE, schema=FileRecord, mode="overwrite")
+    for i in range(0, len(records), MIGRATION_BATCH):
+        files_table.add(records[i:i + MIGRATION_BATCH])
+
+    # Drop the manifest first: re-running from 'documents' alone is still correct.
+    if LEGACY_MANIFEST in names:
+        db.drop_table(LEGACY_MANIFEST)
+    if LEGACY_DOCUMENTS in names:
+        db.drop_table(LEGACY_DOCUMENTS)
+
+    indexed = sum(1 for r in records if r['status'] == STATUS_INDEXED)
+    chunk_rows = db.open_table(CHUNKS_TABLE).count_rows() if CHUNKS_TABLE in db.table_names() else 0
+    print(f"✅ Migration complete: {len(records)} files ({indexed} indexed), {chunk_rows} chunks.")
+
+
+def add_chunk_codes(db):
+    """
+    Adds the binary sign-code column to a 'chunks' table written before it
+    existed. Codes are computed from the stored vectors while the table is
+    streamed into a temporary copy, which then replaces 'chunks'.
+    (Chunk ids are not unique across duplicate files, so an in-place
+    merge on 'id' could give a copy the wrong code.)
+    """
+    names = set(db.table_names())
+    if CODES_TMP in names:
+        db.drop_table(CODES_TMP)  # Left over from an interrupted run
+    if CHUNKS_TABLE not in names:
+        return
+    chunks = db.open_table(CHUNKS_TABLE)
+    if CODE_COLUMN in chunks.schema.names:
+        return
+
+    total = chunks.count_rows()
+    print(f"🔧 Adding binary codes to {total} chunks (one-time)...")
+    schema = Chunk.to_arrow_schema()
+
+    def with_codes(source):
+        for batch in source:
+            batch = batch.append_column(CODE_COLUMN, code_array(_vector_matrix(batch)))
+            yield batch.select(schema.names).cast(schema)
+
+    source = chunks.search().limit(None).to_batches(MIGRATION_BATCH)
+    tmp = db.create_table(CODES_TMP, data=pa.RecordBatchReader.from_batches(schema, with_codes(source)))
+    copied = tmp.search().limit(None).to_batches(MIGRATION_BATCH)
+    db.create_table(CHUNKS_TABLE, data=pa.RecordBatchReader.from_batches(schema, copied), mode="overwrite")
+    db.drop_table(CODES_TMP)
+    print(f"✅ Binary codes added to {total} chunks (indexes are rebuilt by the next embed run).")
@@ -0,0 +1,83 @@
+"""
+Module: Scalar Indexes
+Description: Metadata indexes on 'chunks' so filtered searches skip non-matching rows.
+
+  - BITMAP for low-cardinality columns (file_type, category)
+  - BTREE  for ranges and prefixes (dates, file_path)
+
+With these, `where(..., prefilter=True)` in search resolves the filter from the
+index first and the vector / BM25 search only scores the matching rows.
+"file_path starts with X" is written as a range (X <= path < X') so the
+BTREE can answer it; LIKE 'X%' would scan.
+"""
+
+import os
+import time
+
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+SINDEX_CFG = SETTINGS.get('scalar_index', {})
+# Below this size filters are cheap without indexes
+INDEX_MIN_ROWS = SINDEX_CFG.get('min_rows', 10_000)
+OPTIMIZE_UNINDEXED_RATIO = SINDEX_CFG.get('optimize_unindexed_ratio', 0.05)
+
+SCALAR_INDEXES = {
+    'file_type': "BITMAP",
+    'category': "BITMAP",
+    'creation_date': "BTREE",
+    'last_modified': "BTREE",
+    'file_path': "BTREE",
+}
+
+
+def find_scalar_indexes(table):
+    """{column: index config} for the columns in SCALAR_INDEXES that are indexed."""
+    found = {}
+    for index in table.list_indices():
+        columns = list(index.columns)
+        if len(columns) == 1 and columns[0] in SCALAR_INDEXES:
+            found[columns[0]] = index
+    return found
+
+
+def ensure_scalar_indexes(table, min_rows=INDEX_MIN_ROWS):
+    """
+    Creates missing metadata indexes and folds new rows into existing ones.
+    Returns 'skipped', 'created', 'optimized' or 'up-to-date'.
+    """
+    rows = table.count_rows()
+    if rows < min_rows:
+        return "skipped"
+
+    existing = find_scalar_indexes(table)
+    missing = [c for c in SCALAR_INDEXES if c not in existing]
+    if missing:
+        t0 = time.time()
+        for column in missing:
+            table.create_scalar_index(column, index_type=SCALAR_INDEXES[column], replace=True)
+        print(f"🏷️  Metadata indexes built on {', '.join(missing)} in {time.time() - t0:.1f}s")
+        return "created"
+
+    unindexed = max(
+        (table.index_stats(index.name).num_unindexed_rows for index in existing.values()),
+        default=0,
+    )
+    if unindexed <= rows * OPTIMIZE_UNINDEXED_RATIO:
+        return "up-to-date"
+    t0 = time.time()
+    table.optimize()
+    print(f"🏷️  Metadata indexes updated with {unindexed:,} new chunks in {time.time() - t0:.1f}s")
+    return "optimized"
+
+
+def prefix_range(column, prefix):
+    """`column` starts with `prefix`, as a range the BTREE index can answer."""
+    quoted = prefix.replace("'", "''")
+    upper = (prefix[:-1] + chr(ord(prefix[-1]) + 1)).replace("'", "''")
+    return f"({column} >= '{quoted}' AND {column} < '{upper}')"
+
+
+def folder_range(column, folder):
+    """`column` is a path inside `folder` (and not in a sibling like folder + '2')."""
+    return prefix_range(column, folder.rstrip(os.sep) + os.sep)
@@ -0,0 +1,70 @@
+"""
+Module: Text Index
+Description: Keeps LanceDB's native full-text (BM25) indexes on the chunks.
+
+Dense vectors are bad at exact tokens: passport numbers, policy IDs, tax form
+codes. An inverted index over `content` and `filename` finds them directly.
+
+  1. The first embed run with chunks creates one INVERTED index per column.
+  2. Chunks added later are still searchable (scanned unindexed); once they
+     pass `optimize_unindexed_ratio` of the table, `optimize()` merges them
+     into the index.
+"""
+
+import time
+
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+TINDEX_CFG = SETTINGS.get('text_index', {})
+FTS_COLUMNS = TINDEX_CFG.get('columns', ['content', 'filename'])
+OPTIMIZE_UNINDEXED_RATIO = TINDEX_CFG.get('optimize_unindexed_ratio', 0.05)
+
+
+def find_text_indexes(table):
+    """{column: index config} for the columns that already have an FTS index."""
+    found = {}
+    for index in table.list_indices():
+        if index.index_type == "FTS" and len(index.columns) == 1:
+            found[index.columns[0]] = index
+    return found
+
+
+def has_text_index(table):
+    return bool(find_text_indexes(table))
+
+
+def ensure_text_index(table):
+    """
+    Creates missing FTS indexes and folds new chunks into existing ones.
+    Returns 'empty', 'created', 'optimized' or 'up-to-date'.
+    """
+    rows = table.count_rows()
+    if rows == 0:
+        return "empty"
+
+    existing = find_text_indexes(table)
+    missing = [c for c in FTS_COLUMNS if c not in existing]
+    if missing:
+        t0 = time.time()
+        for column in missing:
+            table.create_fts_index(column, replace=True)
+        print(f"🔤 Full-text index built on {', '.join(missing)} ({rows:,} chunks) in {time.time() - t0:.1f}s")
+        return "created"
+
+    unindexed = max(
+        (table.index_stats(index.name).num_unindexed_rows for index in existing.values()),
+        default=0,
+    )
+    if unindexed <= rows * OPTIMIZE_UNINDEXED_RATIO:
+        return "up-to-date"
+    t0 = time.time()
+    table.optimize()
+    print(f"🔤 Full-text index updated with {unindexed:,} new chunks in {time.time() - t0:.1f}s")
+    return "optimized"
+
+
+def text_query(table, query):
+    """BM25 search over every indexed text column."""
+    columns = [c for c in FTS_COLUMNS if c in find_text_indexes(table)]
+    return table.search(query, query_type="fts", fts_columns=columns)
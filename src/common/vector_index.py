@@ -0,0 +1,86 @@
+"""
+Module: Vector Index
+Description: Keeps an ANN index on 'chunks.vector' and builds tuned queries.
+
+Below `vector_index.min_rows` chunks a brute-force scan is fast and exact,
+so no index is built. Above it:
+  1. The first call builds an IVF_PQ index (configurable).
+  2. Later ingests leave new rows unindexed (still searched, brute force).
+     Once they pass `optimize_unindexed_ratio` of the table, `optimize()`
+     folds them into the existing partitions.
+  3. If the table grew by more than `retrain_growth` since the partitions
+     were trained, they are retrained so they keep matching the data.
+
+Every vector query goes through `vector_query()`, so `nprobes`,
+`refine_factor` and the distance metric in settings.yaml apply everywhere.
+"""
+
+import time
+
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+VINDEX_CFG = SETTINGS.get('vector_index', {})
+INDEX_MIN_ROWS = VINDEX_CFG.get('min_rows', 50_000)
+INDEX_TYPE = VINDEX_CFG.get('index_type', "IVF_PQ")
+METRIC = VINDEX_CFG.get('metric', "l2")
+NPROBES = VINDEX_CFG.get('nprobes', 20)
+REFINE_FACTOR = VINDEX_CFG.get('refine_factor', 10)
+OPTIMIZE_UNINDEXED_RATIO = VINDEX_CFG.get('optimize_unindexed_ratio', 0.05)
+RETRAIN_GROWTH = VINDEX_CFG.get('retrain_growth', 0.5)
+
+VECTOR_COLUMN = "vector"
+
+
+def find_vector_index(table):
+    """The index config on the vector column, or None."""
+    for index in table.list_indices():
+        if list(index.columns) == [VECTOR_COLUMN]:
+            return index
+    return None
+
+
+def ensure_vector_index(table, min_rows=INDEX_MIN_ROWS):
+    """
+    Creates, updates or retrains the vector index as the table grows.
+    Returns what was done: 'brute-force', 'created', 'optimized', 'retrained' or 'up-to-date'.
+    """
+    rows = table.count_rows()
+    index = find_vector_index(table)
+
+    if index is None:
+        if rows < min_rows:
+            return "brute-force"
+        print(f"🗂️  Building {INDEX_TYPE} index on {rows:,} chunks (metric: {METRIC})...")
+        t0 = time.time()
+        table.create_index(metric=METRIC, vector_column_name=VECTOR_COLUMN, index_type=INDEX_TYPE)
+        print(f"   ✅ Vector index ready in {time.time() - t0:.1f}s")
+        return "created"
+
+    stats = table.index_stats(index.name)
+    unindexed = stats.num_unindexed_rows if stats else 0
+    indexed = stats.num_indexed_rows if stats else 0
+    if unindexed <= rows * OPTIMIZE_UNINDEXED_RATIO:
+        return "up-to-date"
+
+    retrain = unindexed > indexed * RETRAIN_GROWTH
+    action = "retrained" if retrain else "optimized"
+    print(f"🗂️  {unindexed:,} of {rows:,} chunks are outside the vector index; "
+          f"{'retraining' if retrain else 'updating'} it...")
+    t0 = time.time()
+    table.optimize(retrain=retrain)
+    print(f"   ✅ Vector index {action} in {time.time() - t0:.1f}s")
+    return action
+
+
+def vector_query(table, vector, nprobes=NPROBES, refine_factor=REFINE_FACTOR):
+    """
+    `table.search(vector)` with the configured metric and ANN parameters.
+    Without an index, LanceDB ignores nprobes/refine_factor and scans exactly.
+    """
+    query = table.search(vector, vector_column_name=VECTOR_COLUMN).distance_type(METRIC)
+    if nprobes:
+        query = query.nprobes(nprobes)
+    if refine_factor:
+        query = query.refine_factor(refine_factor)
+    return query
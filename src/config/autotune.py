@@ -0,0 +1,297 @@
+"""
+Module: Hardware Auto-Tune
+Description: Measures this machine once and picks the embedding model, the
+             number of extraction workers and the encode batch size.
+
+`autotune: true` in settings.yaml makes the loader call get_hardware_profile().
+The first time on a machine it:
+  1. Detects cores, RAM and the torch device (CUDA / Apple MPS / CPU).
+  2. Benchmarks encode throughput of the best model tier the RAM allows, at
+     several batch sizes. A tier too slow for a usable ingest rate falls
+     back to the next smaller model.
+  3. OCRs one synthetic page in a fresh process: seconds per page, and the
+     RSS of a worker holding the OCR engine (what one extraction worker costs).
+  4. Sizes the pool: one core stays free for embedding/writing, and the
+     workers plus the model must fit in RAM.
+
+The result is cached in data/hardware_profiles.json under a fingerprint of
+the machine (CPU, cores, RAM, Python / torch / paddle versions), so later
+starts (and every spawned worker) skip straight to it. Benchmarks run as
+subprocesses: the calling process never imports torch or paddle here.
+
+Re-benchmark: python -m src.config.autotune --rebench
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+import subprocess
+from importlib import metadata
+
+import psutil
+
+# --- CONFIGURATION ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+PROFILE_CACHE = os.path.join(PROJECT_ROOT, 'data', 'hardware_profiles.json')
+# Bump when the tiers or the sizing rules change: every machine re-benchmarks
+PROFILE_VERSION = 1
+# Spawned processes inherit the parent's profile through the environment
+PROFILE_ENV = 'DOCSEARCH_HW_PROFILE'
+
+# Best first. A tier is tried if the machine has the RAM for it and kept if
+# it encodes at least `min_chunks_per_s` (~1000-char chunks).
+MODEL_TIERS = [
+    {'tier': 'God Mode', 'model_name': 'BAAI/bge-large-en-v1.5', 'model_dimension': 1024,
+     'min_ram_gb': 16, 'min_chunks_per_s': 40},
+    {'tier': 'Balanced', 'model_name': 'BAAI/bge-base-en-v1.5', 'model_dimension': 768,
+     'min_ram_gb': 8, 'min_chunks_per_s': 40},
+    {'tier': 'Eco', 'model_name': 'BAAI/bge-small-en-v1.5', 'model_dimension': 384,
+     'min_ram_gb': 0, 'min_chunks_per_s': 0},
+]
+BATCH_SIZES = (8, 16, 32, 64, 128)
+# A smaller batch within this share of the best throughput wins (less RAM per call)
+BATCH_TOLERANCE = 0.05
+ENCODE_PROBE_SECONDS = 60     # Stop trying bigger batches after this long
+PROBE_TIMEOUT_SECONDS = 600   # Includes a first-time model download
+SAMPLE_CHUNK_CHARS = 1000     # Matches the default chunk_size
+
+# Used when a probe cannot run (e.g. paddle missing)
+DEFAULT_WORKER_MB = 1500
+DEFAULT_MODEL_MB = 2000
+DEFAULT_OCR_PAGE_SECONDS = 3.0
+DEFAULT_BATCH_SIZE = 32
+RESERVE_MB = 1024
+RAM_SHARE = 0.75              # Of total RAM, for workers + the model
+
+
+# --- HARDWARE ---
+def _cpu_brand():
+    try:
+        if sys.platform == 'darwin':
+            return subprocess.run(['sysctl', '-n', 'machdep.cpu.brand_string'],
+                                  capture_output=True, text=True, timeout=5).stdout.strip()
+        if sys.platform.startswith('linux'):
+            with open('/proc/cpuinfo') as f:
+                for line in f:
+                    if line.startswith('model name'):
+                        return line.split(':', 1)[1].strip()
+    except Exception:
+        pass
+    return platform.processor() or platform.machine()
+
+def _version(package):
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+def detect_hardware():
+    """Static facts about the machine (cheap: no torch import)."""
+    return {
+        'system': platform.system(),
+        'machine': platform.machine(),
+        'cpu': _cpu_brand(),
+        'physical_cores': psutil.cpu_count(logical=False) or os.cpu_count() or 1,
+        'logical_cores': psutil.cpu_count(logical=True) or os.cpu_count() or 1,
+        'ram_gb': round(psutil.virtual_memory().total / 2**30),
+        'python': platform.python_version(),
+        'torch': _version('torch'),
+        'paddleocr': _version('paddleocr'),
+    }
+
+def fingerprint(hardware):
+    """Changes with the hardware or the libraries that set the speed; not with free RAM."""
+    raw = json.dumps({**hardware, 'version': PROFILE_VERSION}, sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+# --- PROBES (each runs in its own process) ---
+def _sample_texts(count):
+    words = ("invoice tax return policy premium statement account balance contract "
+             "renewal medical claim receipt payment quarterly report summary").split()
+    texts = []
+    for i in range(count):
+        body = " ".join(words[(i + j) % len(words)] for j in range(SAMPLE_CHUNK_CHARS // 7))
+        texts.append(body[:SAMPLE_CHUNK_CHARS])
+    return texts
+
+def probe_encode(model_name):
+    """Chunks/second per batch size on the best torch device, plus the process RSS."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if torch.cuda.is_available():
+        device = 'cuda'
+    elif torch.backends.mps.is_available():
+        device = 'mps'
+    else:
+        device = 'cpu'
+    t0 = time.perf_counter()
+    model = SentenceTransformer(model_name, device=device)
+    load_seconds = time.perf_counter() - t0
+    model.encode(_sample_texts(8), batch_size=8, show_progress_bar=False)  # Warm-up
+
+    throughput = {}
+    deadline = time.perf_counter() + ENCODE_PROBE_SECONDS
+    for batch in BATCH_SIZES:
+        texts = _sample_texts(max(batch * 2, 32))
+        t0 = time.perf_counter()
+        model.encode(texts, batch_size=batch, show_progress_bar=False)
+        throughput[batch] = len(texts) / (time.perf_counter() - t0)
+        best = max(throughput.values())
+        # Past the knee (or out of time): bigger batches only cost RAM
+        if time.perf_counter() > deadline or throughput[batch] < best * (1 - BATCH_TOLERANCE):
+            break
+    return {
+        'device': device,
+        'load_seconds': round(load_seconds, 1),
+        'chunks_per_s': {str(b): round(v, 1) for b, v in throughput.items()},
+        'rss_mb': round(psutil.Process().memory_info().rss / 2**20),
+    }
+
+def probe_ocr():
+    """One synthetic A4 page at 200 DPI through PaddleOCR: seconds, and the worker's RSS after."""
+    import cv2
+    import numpy as np
+    from paddleocr import PaddleOCR
+
+    page = np.full((2339, 1654, 3), 255, dtype=np.uint8)
+    for i, line in enumerate(_sample_texts(40)):
+        cv2.putText(page, line[:60], (80, 120 + i * 55), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (0, 0, 0), 2)
+    engine = PaddleOCR(use_angle_cls=True, lang='en')
+    engine.ocr(page[:400])  # Warm-up (first call initialises the predictors)
+    t0 = time.perf_counter()
+    engine.ocr(page)
+    return {
+        'page_seconds': round(time.perf_counter() - t0, 2),
+        'rss_mb': round(psutil.Process().memory_info().rss / 2**20),
+    }
+
+def _run_probe(*args):
+    """Runs a probe via `python -m src.config.autotune --probe ...`; its JSON result, or None."""
+    try:
+        done = subprocess.run(
+            [sys.executable, '-m', 'src.config.autotune', '--probe', *args],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=PROBE_TIMEOUT_SECONDS,
+        )
+        if done.returncode == 0:
+            return json.loads(done.stdout.strip().splitlines()[-1])
+        print(f"   ⚠️ Probe {' '.join(args)} failed: {(done.stderr.strip().splitlines() or ['?'])[-1]}")
+    except (subprocess.TimeoutExpired, ValueError, IndexError) as e:
+        print(f"   ⚠️ Probe {' '.join(args)} failed: {e}")
+    return None
+
+
+# --- SIZING ---
+def pick_batch_size(chunks_per_s):
+    """Smallest batch within BATCH_TOLERANCE of the best throughput."""
+    rates = {int(b): v for b, v in chunks_per_s.items()}
+    best = max(rates.values())
+    return min(b for b, v in rates.items() if v >= best * (1 - BATCH_TOLERANCE))
+
+def pick_workers(hardware, worker_mb, model_mb):
+    """One core left for embed/write; workers + model within RAM_SHARE of RAM."""
+    ram_mb = hardware['ram_gb'] * 1024 * RAM_SHARE - model_mb - RESERVE_MB
+    by_ram = int(ram_mb // max(worker_mb, 1))
+    return max(1, min(hardware['physical_cores'] - 1, by_ram))
+
+def benchmark(hardware):
+    """Runs the probes and turns them into a profile."""
+    t0 = time.time()
+    tier, encode = MODEL_TIERS[-1], None
+    for candidate in MODEL_TIERS:
+        if hardware['ram_gb'] < candidate['min_ram_gb']:
+            continue
+        print(f"   ⏱️  Encode benchmark: {candidate['model_name']}...")
+        result = _run_probe('encode', candidate['model_name'])
+        if result is None:
+            continue
+        best = max(result['chunks_per_s'].values())
+        print(f"      {best:.0f} chunks/s on {result['device']}")
+        tier, encode = candidate, result
+        if best >= candidate['min_chunks_per_s']:
+            break
+
+    print("   ⏱️  OCR benchmark: one page...")
+    ocr = _run_probe('ocr')
+
+    worker_mb = ocr['rss_mb'] if ocr else DEFAULT_WORKER_MB
+    model_mb = encode['rss_mb'] if encode else DEFAULT_MODEL_MB
+    batch_size = pick_batch_size(encode['chunks_per_s']) if encode else DEFAULT_BATCH_SIZE
+    max_workers = pick_workers(hardware, worker_mb, model_mb)
+    device = encode['device'] if encode else 'cpu'
+    return {
+        'mode_name': f"{tier['tier']} ({tier['model_name'].split('/')[-1]} on {device}, "
+                     f"{max_workers} workers, batch {batch_size})",
+        'model_name': tier['model_name'],
+        'model_dimension': tier['model_dimension'],
+        'max_workers': max_workers,
+        'batch_size': batch_size,
+        'ocr_page_seconds': ocr['page_seconds'] if ocr else DEFAULT_OCR_PAGE_SECONDS,
+        'worker_mb': worker_mb,
+        'device': device,
+        'hardware': hardware,
+        'benchmarks': {'encode': encode, 'ocr': ocr, 'seconds': round(time.time() - t0, 1)},
+        'measured_at': time.time(),
+    }
+
+
+# --- CACHE ---
+def _read_cache():
+    try:
+        with open(PROFILE_CACHE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_cache(profiles):
+    try:
+        os.makedirs(os.path.dirname(PROFILE_CACHE), exist_ok=True)
+        tmp = PROFILE_CACHE + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(profiles, f, indent=2)
+        os.replace(tmp, PROFILE_CACHE)
+    except OSError as e:
+        print(f"   ⚠️ Could not cache the hardware profile ({e}); it is re-measured next start.")
+
+def get_hardware_profile(refresh=False):
+    """
+    The profile for this machine: from the environment (spawned workers), the
+    on-disk cache, or a fresh benchmark. Keys used by the loader: mode_name,
+    model_name, model_dimension, max_workers, batch_size, ocr_page_seconds.
+    """
+    inherited = os.environ.get(PROFILE_ENV)
+    if inherited and not refresh:
+        return json.loads(inherited)
+
+    hardware = detect_hardware()
+    key = fingerprint(hardware)
+    profiles = _read_cache()
+    profile = None if refresh else profiles.get(key)
+    if profile is None:
+        print(f"⏱️  Benchmarking this machine ({hardware['cpu']}, {hardware['physical_cores']} cores, "
+              f"{hardware['ram_gb']} GB). One-time, cached afterwards...")
+        profile = benchmark(hardware)
+        profiles[key] = profile
+        _write_cache(profiles)
+    os.environ[PROFILE_ENV] = json.dumps(profile)
+    return profile
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark this machine and cache its profile.")
+    parser.add_argument("--rebench", action="store_true", help="Ignore the cached profile")
+    parser.add_argument("--probe", nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        kind, *rest = args.probe
+        result = probe_encode(rest[0]) if kind == 'encode' else probe_ocr()
+        print(json.dumps(result))
+    else:
+        profile = get_hardware_profile(refresh=args.rebench)
+        print(json.dumps({k: v for k, v in profile.items() if k != 'hardware'}, indent=2))
@@ -23,9 +23,12 @@ def load_settings():
         config['system']['model_name'] = profile['model_name']
         config['system']['model_dimension'] = profile['model_dimension']
         config['system']['max_workers'] = profile['max_workers']
-        # We can also inject batch_size if we move that to settings
         config['system']['batch_size'] = profile['batch_size']
-        
+        # Measured encode batch and OCR speed feed the pipeline and the scheduler
+        config.setdefault('pipeline', {})['encode_batch'] = profile['batch_size']
+        if 'ocr_page_seconds' in profile:
+            config.setdefault('scheduler', {})['ocr_page_seconds'] = profile['ocr_page_seconds']
+
     return config
 
 # Load once and export
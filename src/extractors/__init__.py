@@ -1,15 +1,30 @@
-from .pdf import PDFExtractor
-from .image import ImageExtractor
-from .office import DocxExtractor, SlideExtractor, SpreadsheetExtractor, TextExtractor
-from .email import EmailExtractor
-
-# Define what happens when someone does "from src.extractors import *"
-__all__ = [
-    "PDFExtractor",
-    "ImageExtractor",
-    "DocxExtractor",
-    "SlideExtractor",
-    "SpreadsheetExtractor",
-    "TextExtractor",
-    "EmailExtractor"
-]
\ No newline at end of file
+"""
+Extractor registry. Classes are resolved lazily (PEP 562): touching
+`ImageExtractor` imports image.py, nothing else does. A worker that only
+reads .txt / .docx files never imports fitz, cv2 or PaddleOCR.
+"""
+import importlib
+
+# Class name -> module that defines it
+EXTRACTOR_MODULES = {
+    "PDFExtractor": ".pdf",
+    "ImageExtractor": ".image",
+    "DocxExtractor": ".office",
+    "SlideExtractor": ".office",
+    "StreamingSpreadsheetExtractor": ".spreadsheet",
+    "SpreadsheetExtractor": ".spreadsheet",  # Old name, kept for existing settings files
+    "TextExtractor": ".office",
+    "EmailExtractor": ".email",
+}
+
+# Names for "from src.extractors import *" (which imports every extractor)
+__all__ = list(EXTRACTOR_MODULES)
+
+
+def __getattr__(name):
+    module = EXTRACTOR_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    extractor_class = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = extractor_class  # Resolved once per process
+    return extractor_class
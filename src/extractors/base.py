@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
 
 class BaseExtractor(ABC):
+    # How the page just yielded was read: 'native' (text layer) or 'ocr'.
+    # Extractors that mix both update it before every yield.
+    page_method = "native"
+
     @abstractmethod
     def extract(self, file_path: str):
         """
@@ -3,6 +3,7 @@ import numpy as np
 import warnings
 import logging
 import os
+from collections import deque
 
 # 1. AGGRESSIVE SILENCING
 # Silence standard warnings
@@ -15,20 +16,32 @@ logging.getLogger("paddlex").setLevel(logging.CRITICAL) # <--- This stops the "C
 # Redirect system stdout/stderr to devnull during import if needed (Advanced silence)
 # usually the logging lines above are enough.
 
-from paddleocr import PaddleOCR
 from .base import BaseExtractor
+from .ocr_service import QUEUE_DEPTH, drop_client, get_client
 
 # --- SINGLETON INSTANCE ---
-# We enable 'use_angle_cls=True' here.
-# The logger fixes above should keep this quiet now.
-ocr_engine = PaddleOCR(use_angle_cls=True, lang='en')
+# Created on the first OCR call, not at import: pdf.py imports run_ocr, and a
+# worker that only meets text-layer PDFs should never load the Paddle models
+# (seconds of startup, hundreds of MB).
+_ocr_engine = None
+
+def get_ocr_engine():
+    global _ocr_engine
+    if _ocr_engine is None:
+        from paddleocr import PaddleOCR
+        # We enable 'use_angle_cls=True' here.
+        # The logger fixes above should keep this quiet now.
+        _ocr_engine = PaddleOCR(use_angle_cls=True, lang='en')
+    return _ocr_engine
+
+# OCR doesn't need 12k resolution; 2.5k is plenty.
+# (pdf.py renders pages no larger than this in the first place)
+MAX_DIM = 2500
 
 def resize_if_huge(image):
     """
-    If an image is massive (>2500px), resize it down.
-    OCR doesn't need 12k resolution; 2.5k is plenty.
+    If an image is massive (>MAX_DIM px), resize it down.
     """
-    MAX_DIM = 2500
     h, w = image.shape[:2]
     
     if max(h, w) > MAX_DIM:
@@ -39,28 +52,135 @@ def resize_if_huge(image):
     
     return image
 
-def run_ocr(image_array):
+def _page_result(page):
+    """
+    (text, confidence) of one page result: 3.x gives {'rec_texts': [...],
+    'rec_scores': [...]}, 2.x [[box, (text, score)], ...]. Confidence is the
+    mean line score, None when nothing was recognised.
+    """
+    if not page:
+        return "", None
+    if isinstance(page, dict) or hasattr(page, 'get'):
+        texts, scores = list(page.get('rec_texts') or []), list(page.get('rec_scores') or [])
+    else:
+        texts, scores = [line[1][0] for line in page], [line[1][1] for line in page]
+    return " ".join(texts), (sum(scores) / len(scores) if scores else None)
+
+def ocr_images(images):
+    """
+    OCR on this process's own engine (the OCR service, or the fallback).
+    One batched predict() call where PaddleOCR has it (3.x), else page by page.
+    Returns [(text, confidence)].
+    """
+    engine = get_ocr_engine()
+    # Grayscale renders travel (and queue) at a third of the size; the models want 3 channels
+    images = [cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image for image in images]
+    if hasattr(engine, 'predict'):
+        return [_page_result(page) for page in engine.predict(images)]
+    # We removed 'cls=True' to fix the version bug.
+    return [_page_result((engine.ocr(image) or [None])[0]) for image in images]
+
+def _local_ocr(image):
     try:
-        # 1. SAFETY: Downscale huge images
-        safe_image = resize_if_huge(image_array)
-        
-        # 2. Run OCR
-        # We removed 'cls=True' to fix the version bug.
-        result = ocr_engine.ocr(safe_image)
-        
-        if not result or result[0] is None:
-            return ""
-            
-        text_lines = [line[1][0] for line in result[0]]
-        return " ".join(text_lines)
-        
+        return ocr_images([image])[0]
     except Exception as e:
-        # Only print actual errors, not warnings
+        # Raised, not an empty page: the file is marked failed and retried later
         print(f"⚠️ PaddleOCR Error: {e}")
-        return ""
+        raise
+
+def ocr_pages(pages, depth=QUEUE_DEPTH, escalate=None):
+    """
+    Streams (key, text, image) items; image=None means the text is final.
+    Yields (key, text, method) in input order. Images go to the OCR service
+    up to `depth` at a time, so it batches them (with other workers' pages)
+    while this worker renders the next ones.
+
+    `escalate(key, confidence)` may return a better image of that item (e.g.
+    a higher-DPI render) after a low-confidence result; it is OCR'd right
+    away and the more confident of the two readings is kept.
+    """
+    client = get_client()
+    window = deque()   # [key, text, image, ticket]
+
+    def recognise(image, ticket=None):
+        nonlocal client
+        if client is not None:
+            try:
+                return client.result(client.submit(image) if ticket is None else ticket)
+            except (EOFError, OSError) as e:
+                drop_client(e)
+                client = None
+        return _local_ocr(image)
+
+    def resolve(key, text, image, ticket):
+        if image is None:
+            return key, text, "native"
+        text, confidence = recognise(image, ticket)
+        better = escalate(key, confidence) if escalate is not None else None
+        if better is not None:
+            retry = recognise(resize_if_huge(better))
+            if retry[1] is not None and (confidence is None or retry[1] >= confidence):
+                text = retry[0]
+        return key, text, "ocr"
+
+    for key, text, image in pages:
+        ticket = None
+        if image is not None:
+            # 1. SAFETY: Downscale huge images
+            image = resize_if_huge(image)
+            if client is not None:
+                try:
+                    ticket = client.submit(image)
+                except (EOFError, OSError) as e:
+                    drop_client(e)
+                    client = None
+        window.append((key, text, image, ticket))
+        # Hand back everything finished at the front; block on the oldest page only when the window is full
+        while window and (window[0][2] is None or client is None
+                          or sum(item[3] is not None for item in window) >= depth):
+            yield resolve(*window.popleft())
+    while window:
+        yield resolve(*window.popleft())
+
+def run_ocr(image_array):
+    """One image (the OCR service batches it with other workers' pages)."""
+    for _, text, _ in ocr_pages([(None, "", image_array)]):
+        return text
+
+# EXIF tags quoted in a photo's metadata page
+EXIF_DATE_TAKEN = 36867   # DateTimeOriginal (in the Exif sub-IFD)
+EXIF_IFD = 0x8769
+EXIF_MAKE, EXIF_MODEL, EXIF_DATETIME = 271, 272, 306
+
+def describe_photo(file_path):
+    """Searchable text for a photo without OCR: name, folder, size, EXIF date and camera."""
+    parts = [f"Photo {os.path.basename(file_path)}",
+             f"in folder {os.path.basename(os.path.dirname(file_path))}"]
+    try:
+        from PIL import Image
+        with Image.open(file_path) as img:
+            parts.append(f"{img.width}x{img.height} px")
+            exif = img.getexif()
+            taken = exif.get_ifd(EXIF_IFD).get(EXIF_DATE_TAKEN) or exif.get(EXIF_DATETIME)
+            camera = " ".join(str(exif[tag]).strip() for tag in (EXIF_MAKE, EXIF_MODEL) if exif.get(tag))
+        if taken:
+            parts.append(f"taken {str(taken).replace(':', '-', 2)}")
+        if camera:
+            parts.append(f"camera {camera}")
+    except Exception:
+        pass  # Name and folder are still worth indexing
+    return ", ".join(parts)
 
 class ImageExtractor(BaseExtractor):
-    def extract(self, file_path):
+    page_method = "ocr"
+
+    def extract(self, file_path, ocr=True):
+        """`ocr=False`: a photo (see triage.py), indexed by its metadata only."""
+        if not ocr:
+            self.page_method = "metadata"
+            yield 1, describe_photo(file_path)
+            return
+        self.page_method = "ocr"
         try:
             image = cv2.imread(file_path)
             if image is None: return
@@ -69,4 +189,5 @@ class ImageExtractor(BaseExtractor):
             if text.strip():
                 yield 1, text
         except Exception as e:
-            print(f"⚠️ Image Error {file_path}: {e}")
\ No newline at end of file
+            print(f"⚠️ Image Error {file_path}: {e}")
+            raise
\ No newline at end of file
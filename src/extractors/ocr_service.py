@@ -0,0 +1,237 @@
+"""
+Module: OCR Service
+Description: One process that owns the PaddleOCR engine and OCRs page images
+             for every extraction worker, in batches.
+
+Without it each OCR-capable worker loads its own engine and OCRs one page per
+call, so a 300-page scan runs as 300 serial single-page calls in one worker.
+With it:
+  - workers render pages and send them here, up to `queue_depth` pages per
+    file ahead of the one they are waiting for (image.ocr_pages)
+  - pages arriving from all workers within `batch_window_ms` are recognised
+    in one engine call of up to `batch_size` pages
+  - the text and its confidence go back over the worker's own connection,
+    keyed by request id, so each (file, page) gets its own result; if the
+    engine fails, each page gets the error instead and its file fails
+  - there is one engine copy in RAM instead of one per worker
+
+Workers find the service through the environment (set before they spawn)
+and connect on their first OCR page; a worker that never meets a scan never
+connects. If the service is gone, image.py falls back to a local engine.
+"""
+
+import os
+import time
+import queue
+import threading
+import multiprocessing as mp
+from multiprocessing.connection import Client, Listener
+
+from src.config.loader import SETTINGS
+
+# --- CONFIGURATION ---
+OCR_CFG = SETTINGS.get('ocr', {})
+SERVICE_ENABLED = OCR_CFG.get('service', True)
+BATCH_SIZE = OCR_CFG.get('batch_size', 8)
+# Pages one file may have at the service before its worker waits for the oldest
+QUEUE_DEPTH = OCR_CFG.get('queue_depth', 4)
+BATCH_WINDOW_MS = OCR_CFG.get('batch_window_ms', 50)
+START_TIMEOUT_SECONDS = 30
+
+# Spawned workers inherit these from the parent
+ADDRESS_ENV = 'DOCSEARCH_OCR_SERVICE'
+AUTHKEY_ENV = 'DOCSEARCH_OCR_AUTHKEY'
+
+
+class OCRServiceError(RuntimeError):
+    """The service's engine failed on a batch holding this page."""
+
+
+# --- SERVICE PROCESS ---
+def _read_requests(conn, send_lock, jobs, stats):
+    """One thread per worker connection: queues its pages, answers 'stats'."""
+    sent_pages = False
+    try:
+        while True:
+            kind, request_id, *payload = conn.recv()
+            if kind == 'ocr':
+                if not sent_pages:
+                    sent_pages = True
+                    stats['clients'] += 1
+                jobs.put((conn, send_lock, request_id, payload[0]))
+            elif kind == 'stats':
+                with send_lock:
+                    conn.send((request_id, dict(stats)))
+    except (EOFError, OSError):
+        pass  # Worker exited (or was killed by the scheduler)
+
+def _accept(listener, jobs, stats):
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=_read_requests, args=(conn, threading.Lock(), jobs, stats), daemon=True).start()
+
+def _collect(jobs, batch_size, window):
+    """The first waiting page, plus whatever arrives within `window` (up to batch_size)."""
+    batch = [jobs.get()]
+    deadline = time.perf_counter() + window
+    while len(batch) < batch_size:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(jobs.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+def _serve(parent_conn, authkey, batch_size, window_ms):
+    # Imported here: the parent only needs the client side of this module
+    from src.extractors.image import get_ocr_engine, ocr_images
+
+    listener = Listener(authkey=authkey)
+    parent_conn.send(listener.address)
+    parent_conn.close()
+
+    jobs = queue.Queue()
+    stats = {'pages': 0, 'batches': 0, 'busy_s': 0.0, 'load_s': 0.0, 'clients': 0}
+    threading.Thread(target=_accept, args=(listener, jobs, stats), daemon=True).start()
+
+    while True:
+        batch = _collect(jobs, batch_size, window_ms / 1000.0)
+        if not stats['load_s']:
+            t0 = time.perf_counter()
+            get_ocr_engine()  # First page: load the models (not counted as OCR time)
+            stats['load_s'] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        try:
+            replies = [(result,) for result in ocr_images([image for _, _, _, image in batch])]
+        except Exception as e:
+            # Not an empty page: the workers must fail these files, not index them without the text
+            print(f"⚠️ OCR Service Error: {e}")
+            replies = [(None, f"{type(e).__name__}: {e}")] * len(batch)
+        stats['busy_s'] += time.perf_counter() - t0
+        stats['pages'] += len(batch)
+        stats['batches'] += 1
+        for (conn, send_lock, request_id, _), reply in zip(batch, replies):
+            try:
+                with send_lock:
+                    conn.send((request_id, *reply))
+            except OSError:
+                pass  # That worker is gone; its file was already reported failed
+
+
+class OCRService:
+    """
+    Parent-side handle. Started before the extraction workers (they inherit
+    its address), stopped after them. RecyclingPool does both when the
+    service is passed in `services`.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, window_ms=BATCH_WINDOW_MS):
+        self.batch_size = batch_size
+        self.window_ms = window_ms
+        self.process = None
+        self.stats = {}
+
+    def start(self):
+        ctx = mp.get_context("spawn")
+        authkey = os.urandom(16)
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_serve, args=(child_conn, authkey, self.batch_size, self.window_ms), daemon=True,
+        )
+        self.process.start()
+        if not parent_conn.poll(START_TIMEOUT_SECONDS):
+            self.process.kill()
+            raise RuntimeError("OCR service did not start")
+        os.environ[ADDRESS_ENV] = parent_conn.recv()
+        os.environ[AUTHKEY_ENV] = authkey.hex()
+        return self
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.stats = OCRClient.from_env().stats()
+        except (EOFError, OSError, KeyError):
+            pass
+        os.environ.pop(ADDRESS_ENV, None)
+        os.environ.pop(AUTHKEY_ENV, None)
+        self.process.terminate()
+        self.process.join(timeout=5)
+        self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def report(self):
+        stats = self.stats
+        if self.process is not None:
+            try:
+                stats = OCRClient.from_env().stats()
+            except (EOFError, OSError, KeyError):
+                pass
+        pages = stats.get('pages', 0)
+        if not pages:
+            return "🔍 OCR service: no pages"
+        return (f"🔍 OCR service: {pages} pages in {stats['batches']} batches "
+                f"({pages / stats['batches']:.1f}/batch) | {pages / max(stats['busy_s'], 1e-9):.2f} pages/s | "
+                f"{stats['clients']} workers connected | engine load {stats['load_s']:.1f}s")
+
+
+# --- CLIENT (inside extraction workers) ---
+class OCRClient:
+    """A worker's connection. Requests are pipelined: submit several, then collect by id."""
+
+    def __init__(self, address, authkey):
+        self.conn = Client(address, authkey=authkey)
+        self._next_id = 0
+        self._done = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ[ADDRESS_ENV], bytes.fromhex(os.environ[AUTHKEY_ENV]))
+
+    def submit(self, image):
+        request_id = self._next_id
+        self._next_id += 1
+        self.conn.send(('ocr', request_id, image))
+        return request_id
+
+    def result(self, request_id):
+        """The reply to `request_id`; raises OCRServiceError if the service failed on it."""
+        while request_id not in self._done:
+            rid, value, *error = self.conn.recv()
+            self._done[rid] = (value, error)
+        value, error = self._done.pop(request_id)
+        if error:
+            raise OCRServiceError(error[0])
+        return value
+
+    def stats(self):
+        self.conn.send(('stats', -1))
+        return self.result(-1)
+
+
+_client = None
+
+def get_client():
+    """This process's connection to the service, or None (not running / broken)."""
+    global _client
+    if _client is None:
+        _client = False
+        if SERVICE_ENABLED and ADDRESS_ENV in os.environ:
+            try:
+                _client = OCRClient.from_env()
+            except (OSError, EOFError) as e:
+                print(f"⚠️ OCR service unreachable, using a local engine: {e}")
+    return _client or None
+
+def drop_client(error):
+    """Called when the connection fails mid-run: the rest of this process OCRs locally."""
+    global _client
+    print(f"⚠️ OCR service connection lost, using a local engine: {error}")
+    _client = False
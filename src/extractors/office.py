@@ -1,11 +1,33 @@
-import docx
-import pptx
-import pandas as pd
-import os
+from src.config.loader import SETTINGS
 from .base import BaseExtractor
 
+# docx / pptx are imported inside the extractor that needs them: all three
+# classes share this module, and a worker reading .txt files should not
+# import them. Spreadsheets stream through spreadsheet.py.
+
+# .docx / .pptx text is streamed from the XML parts (ooxml.py); python-docx /
+# python-pptx only read files that fast path fails on
+FAST_PATH = SETTINGS.get('office', {}).get('ooxml_fast_path', True)
+
+def _fast_pages(parse, file_path):
+    """All pages from an ooxml.py parser, or None if it failed (use the library)."""
+    if not FAST_PATH:
+        return None
+    try:
+        return list(parse(file_path))
+    except Exception as e:
+        print(f"⚠️ OOXML fast path failed for {file_path} ({e}), using the full parser")
+        return None
+
 class DocxExtractor(BaseExtractor):
     def extract(self, file_path):
+        from .ooxml import docx_pages
+        pages = _fast_pages(docx_pages, file_path)
+        if pages is not None:
+            yield from pages
+            return
+
+        import docx
         try:
             doc = docx.Document(file_path)
             full_text = [p.text for p in doc.paragraphs]
@@ -20,6 +42,13 @@ class DocxExtractor(BaseExtractor):
 
 class SlideExtractor(BaseExtractor):
     def extract(self, file_path):
+        from .ooxml import pptx_slides
+        pages = _fast_pages(pptx_slides, file_path)
+        if pages is not None:
+            yield from pages
+            return
+
+        import pptx
         try:
             prs = pptx.Presentation(file_path)
             for i, slide in enumerate(prs.slides):
@@ -32,28 +61,6 @@ class SlideExtractor(BaseExtractor):
         except Exception:
             pass
 
-class SpreadsheetExtractor(BaseExtractor):
-    def extract(self, file_path):
-        try:
-            # Check extension to decide method
-            ext = os.path.splitext(file_path)[1].lower()
-            
-            if ext == '.csv':
-                # Handle CSV
-                df = pd.read_csv(file_path, nrows=20)
-                text = df.to_string(index=False)
-                if text.strip(): yield 1, f"CSV Data:\n{text}"
-            else:
-                # Handle Excel (.xls, .xlsx)
-                xls = pd.ExcelFile(file_path)
-                for sheet_name in xls.sheet_names:
-                    df = pd.read_excel(xls, sheet_name=sheet_name, nrows=20)
-                    text = df.to_string(index=False)
-                    if text.strip(): yield 1, f"Sheet: {sheet_name}\n{text}"
-                    
-        except Exception as e:
-            print(f"⚠️ Spreadsheet Error {file_path}: {e}")
-
 class TextExtractor(BaseExtractor):
     def extract(self, file_path):
         try:
@@ -0,0 +1,230 @@
+"""
+Module: OOXML Fast Path
+Description: Text of .docx / .pptx files read straight from their XML parts
+             with lxml iterparse, without building a document object model.
+
+python-docx / python-pptx parse each part into a full object tree (styles,
+numbering, shapes, relationships) only for office.py to read paragraph text.
+Here the zip member is streamed once:
+  - .docx: word/document.xml. Pages split at explicit page breaks, at the
+    page breaks Word saved from its last layout (w:lastRenderedPageBreak)
+    and at section breaks that start a new page. A section's break type is
+    stored with the *next* section, so pages are held back from a section
+    end until that is known.
+  - .pptx: ppt/slides/*.xml in presentation order, one page per slide
+  - table rows become "cell | cell | cell" lines, in document order
+  - finished elements are cleared, so memory does not grow with file size
+Deleted tracked changes (w:delText), field codes and the duplicate fallback
+copies of text boxes (mc:Fallback) are left out.
+"""
+
+import posixpath
+import zipfile
+
+from lxml import etree
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+CELL_SEPARATOR = " | "
+
+
+class _TextCollector:
+    """
+    Paragraph and table bookkeeping shared by both formats: paragraphs go to
+    the innermost open table cell, or to the page when outside tables.
+    """
+
+    def __init__(self):
+        self.lines = []       # Finished lines of the current page
+        self.paragraphs = []  # Open paragraphs (text boxes nest them)
+        self.rows = []        # Open table rows: [cell texts]
+        self.cells = []       # Open table cells: [paragraph texts]
+        self.skip = 0         # Depth inside mc:Fallback
+
+    def text(self, value):
+        if value and self.paragraphs and not self.skip:
+            self.paragraphs[-1].append(value)
+
+    def start_paragraph(self):
+        self.paragraphs.append([])
+
+    def end_paragraph(self):
+        text = "".join(self.paragraphs.pop()).strip() if self.paragraphs else ""
+        if text and not self.skip:
+            (self.cells[-1] if self.cells else self.lines).append(text)
+
+    def end_cell(self):
+        cell = " ".join(self.cells.pop())
+        if self.rows:
+            self.rows[-1].append(cell)
+
+    def end_row(self):
+        cells = self.rows.pop()
+        line = CELL_SEPARATOR.join(cells).strip(" |")
+        if line:
+            # A nested table's row belongs to the enclosing cell
+            (self.cells[-1] if self.cells else self.lines).append(line)
+
+    def take_page(self):
+        """Lines of the page so far (including the open top-level paragraph); starts a fresh page."""
+        if self.paragraphs and not self.cells:
+            text = "".join(self.paragraphs[0]).strip()
+            self.paragraphs[0] = []
+            if text:
+                self.lines.append(text)
+        page, self.lines = self.lines, []
+        return page
+
+
+def _release(elem):
+    """Frees a finished element and the already-processed siblings before it."""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+# --- WORD ---
+def _starts_new_page(sect_pr):
+    kind = sect_pr.find(W + 'type')
+    return kind is None or kind.get(W + 'val') != 'continuous'  # Default: nextPage
+
+def docx_pages(file_path):
+    """Yields (page_number, text) for a .docx; empty pages are skipped."""
+    with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as xml:
+        collector = _TextCollector()
+        pages = []          # Finished pages (line lists) not yet yielded
+        boundary = None     # (page index, line index) of a section end whose break type is not known yet
+        section_end = False
+        number = 1
+        for event, elem in etree.iterparse(xml, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == W + 'p':
+                    collector.start_paragraph()
+                elif tag == W + 'tc':
+                    collector.cells.append([])
+                elif tag == W + 'tr':
+                    collector.rows.append([])
+                elif tag == MC_FALLBACK:
+                    collector.skip += 1
+                continue
+
+            page_break = False
+            if tag == W + 't':
+                collector.text(elem.text)
+            elif tag == W + 'tab':
+                collector.text("\t")
+            elif tag in (W + 'br', W + 'cr'):
+                if elem.get(W + 'type') == 'page':
+                    page_break = True
+                else:
+                    collector.text("\n")
+            elif tag == W + 'lastRenderedPageBreak':
+                page_break = True
+            elif tag == W + 'sectPr':
+                parent = elem.getparent()
+                # In a paragraph's properties it ends a section; in the body it is the last section
+                if parent is not None and parent.tag in (W + 'pPr', W + 'body'):
+                    if boundary is not None:
+                        if _starts_new_page(elem):
+                            page_index, line_index = boundary
+                            if page_index < len(pages):
+                                page = pages[page_index]
+                                pages[page_index:page_index + 1] = [page[:line_index], page[line_index:]]
+                            else:
+                                pages.append(collector.lines[:line_index])
+                                collector.lines = collector.lines[line_index:]
+                        boundary = None
+                    section_end = parent.tag == W + 'pPr'
+            elif tag == W + 'p':
+                collector.end_paragraph()
+                if section_end and not collector.cells:
+                    boundary = (len(pages), len(collector.lines))
+                section_end = False
+                _release(elem)
+            elif tag == W + 'tc':
+                collector.end_cell()
+            elif tag == W + 'tr':
+                collector.end_row()
+            elif tag == W + 'tbl':
+                _release(elem)
+            elif tag == MC_FALLBACK:
+                collector.skip -= 1
+
+            # Breaks inside tables are ignored; consecutive breaks (a hard
+            # break plus Word's rendered marker) leave an empty page, skipped
+            if page_break and not collector.cells:
+                pages.append(collector.take_page())
+            if pages and boundary is None:
+                for lines in pages:
+                    if lines:
+                        yield number, "\n".join(lines)
+                        number += 1
+                pages = []
+
+        pages.append(collector.take_page())
+        for lines in pages:
+            if lines:
+                yield number, "\n".join(lines)
+                number += 1
+
+
+# --- POWERPOINT ---
+def _slide_parts(archive):
+    """Zip member names of the slides, in presentation order."""
+    presentation = etree.fromstring(archive.read('ppt/presentation.xml'))
+    rels = etree.fromstring(archive.read('ppt/_rels/presentation.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(PKG_REL + 'Relationship')}
+    parts = []
+    for slide_id in presentation.iter(P + 'sldId'):
+        target = targets.get(slide_id.get(R + 'id'))
+        if target:
+            # Targets are relative to ppt/ (or absolute within the package)
+            parts.append(target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('ppt', target)))
+    return parts
+
+def _slide_text(xml):
+    collector = _TextCollector()
+    for event, elem in etree.iterparse(xml, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag == A + 'p':
+                collector.start_paragraph()
+            elif tag == A + 'tc':
+                collector.cells.append([])
+            elif tag == A + 'tr':
+                collector.rows.append([])
+            elif tag == MC_FALLBACK:
+                collector.skip += 1
+            continue
+
+        if tag == A + 't':
+            collector.text(elem.text)
+        elif tag == A + 'br':
+            collector.text("\n")
+        elif tag == A + 'p':
+            collector.end_paragraph()
+            elem.clear()
+        elif tag == A + 'tc':
+            collector.end_cell()
+        elif tag == A + 'tr':
+            collector.end_row()
+        elif tag == MC_FALLBACK:
+            collector.skip -= 1
+    return "\n".join(collector.take_page())
+
+def pptx_slides(file_path):
+    """Yields (slide_number, text) for a .pptx; slides without text are skipped but still counted."""
+    with zipfile.ZipFile(file_path) as archive:
+        for number, part in enumerate(_slide_parts(archive), 1):
+            with archive.open(part) as xml:
+                text = _slide_text(xml)
+            if text.strip():
+                yield number, text
@@ -1,41 +1,141 @@
+import ctypes
+from functools import partial
+from itertools import groupby
+
 import fitz  # PyMuPDF
 import cv2
 import numpy as np
+from src.config.loader import SETTINGS
 from .base import BaseExtractor
-from .image import run_ocr  # Import the shared OCR tool
+from .image import MAX_DIM, ocr_pages  # Shared OCR (batched through the OCR service)
+
+# --- CONFIGURATION ---
+OCR_CFG = SETTINGS.get('ocr', {})
+# 'adaptive': grayscale at pdf_dpi, re-rendered at pdf_max_dpi when OCR is unsure;
+#             on pages with a text layer, only the pictures it does not cover
+# 'fixed'   : whole page at 300 DPI in colour
+RENDER_MODE = OCR_CFG.get('pdf_render', 'adaptive')
+RENDER_DPI = OCR_CFG.get('pdf_dpi', 150)
+MAX_RENDER_DPI = OCR_CFG.get('pdf_max_dpi', 300)
+MIN_CONFIDENCE = OCR_CFG.get('min_confidence', 0.8)
+REGION_MIN_AREA = OCR_CFG.get('region_min_area', 0.05)
+FIXED_DPI = 300
+
+
+def _pixmap_view(pix):
+    """A grayscale pixmap's samples as an (h, w) array, without copying them. The array keeps the pixmap alive."""
+    buffer = (ctypes.c_ubyte * (pix.stride * pix.h)).from_address(pix.samples_ptr)
+    buffer.pixmap = pix
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(pix.h, pix.w)
+
 
 class PDFExtractor(BaseExtractor):
-    def extract(self, file_path):
+    def __init__(self, render=RENDER_MODE):
+        self.adaptive = render == 'adaptive'
+        self.escalations = 0  # Renders redone at MAX_RENDER_DPI
+        self.regions = 0      # Picture regions OCR'd on pages that have a text layer
+
+    def extract(self, file_path, pages=None):
+        """
+        `pages` = (start, stop) 0-based: only that range (a page shard of a large PDF).
+        Errors are raised after logging: a PDF that fails partway is marked
+        failed, not indexed with the pages read so far.
+        """
         try:
-            doc = fitz.open(file_path)
-            for i, page in enumerate(doc):
-                # 1. Try Standard Extraction
-                text = page.get_text()
-                
-                # 2. Gibberish Detection
-                is_gibberish = False
-                if len(text) > 50 and (text.count(' ') / len(text)) < 0.05:
-                    is_gibberish = True
-                if "flfi" in text or "fifl" in text:
-                    is_gibberish = True
-                    
-                if is_gibberish:
-                    text = "" # Discard to force OCR
-                
-                # 3. Fallback to OCR
-                if not text.strip():
-                    try:
-                        pix = page.get_pixmap(dpi=300)
-                        img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
-                        if pix.n == 4:
-                            img_array = cv2.cvtColor(img_array, cv2.COLOR_RGBA2RGB)
-                        
-                        text = run_ocr(img_array)
-                    except Exception as e:
-                        print(f"⚠️ OCR Failed for PDF page {i}: {e}")
-
-                if text.strip():
-                    yield i + 1, text
-                    
+            # Closed even when the worker stops early: recycled workers live for many files
+            with fitz.open(file_path) as doc:
+                renders = {}  # key -> (page index, clip, dpi) of each image sent to OCR
+                # Scanned pages are OCR'd a few at a time while the next ones render;
+                # pages still come out in order.
+                results = ocr_pages(self._pages(doc, pages, renders), escalate=partial(self._escalate, doc, renders))
+                # A page's text layer and its OCR'd regions come out together: join them
+                for page_num, parts in groupby(results, key=lambda result: result[0][0]):
+                    texts, methods = [], set()
+                    for key, text, method in parts:
+                        renders.pop(key, None)
+                        if text.strip():
+                            texts.append(text)
+                            methods.add(method)
+                    if texts:
+                        self.page_method = "ocr" if "ocr" in methods else "native"
+                        yield page_num, "\n".join(texts)
+
         except Exception as e:
-            print(f"⚠️ PDF Error {file_path}: {e}")
\ No newline at end of file
+            print(f"⚠️ PDF Error {file_path}: {e}")
+            raise
+
+    def _pages(self, doc, pages, renders):
+        """((page_number, part), text, image): `image` is set when that part needs OCR."""
+        start, stop = pages if pages else (0, len(doc))
+        for i in range(start, min(stop, len(doc))):
+            page = doc[i]
+            # 1. Try Standard Extraction
+            textpage = page.get_textpage()
+            text = page.get_text(textpage=textpage)
+
+            # 2. Gibberish Detection
+            is_gibberish = False
+            if len(text) > 50 and (text.count(' ') / len(text)) < 0.05:
+                is_gibberish = True
+            if "flfi" in text or "fifl" in text:
+                is_gibberish = True
+
+            if is_gibberish:
+                text = "" # Discard to force OCR
+
+            if text.strip():
+                yield (i + 1, 0), text, None
+                # 3. Mixed page: OCR the pictures the text layer does not cover
+                if self.adaptive:
+                    for part, clip in enumerate(self._textless_regions(page, textpage), 1):
+                        self.regions += 1
+                        yield from self._ocr_item(page, (i + 1, part), renders, clip)
+                continue
+
+            # 3. Fallback to OCR
+            yield from self._ocr_item(page, (i + 1, 0), renders)
+
+    def _ocr_item(self, page, key, renders, clip=None):
+        try:
+            image, dpi = self._render(page, clip, RENDER_DPI)
+            renders[key] = (page.number, clip, dpi)
+            yield key, "", image
+        except Exception as e:
+            print(f"⚠️ OCR Failed for PDF page {page.number}: {e}")
+
+    def _render(self, page, clip, dpi):
+        """(image, dpi). Adaptive renders are grayscale and no larger than OCR will use."""
+        if not self.adaptive:
+            pix = page.get_pixmap(dpi=FIXED_DPI)
+            img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+            if pix.n == 4:
+                img_array = cv2.cvtColor(img_array, cv2.COLOR_RGBA2RGB)
+            return img_array, FIXED_DPI
+
+        # Rendering past MAX_DIM would only be thrown away by resize_if_huge
+        rect = clip or page.rect
+        dpi = int(min(dpi, 72 * MAX_DIM / max(rect.width, rect.height, 1)))
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False, clip=clip)
+        return _pixmap_view(pix), dpi
+
+    def _textless_regions(self, page, textpage):
+        """Clips of the pictures on a text page that its text layer does not cover (a pasted scan, a photo of a receipt)."""
+        min_area = REGION_MIN_AREA * abs(page.rect)
+        pictures = [fitz.Rect(info['bbox']) & page.rect for info in page.get_image_info()]
+        pictures = [box for box in pictures if not box.is_empty and abs(box) >= min_area]
+        if not pictures:
+            return []
+        text_boxes = [fitz.Rect(block[:4]) for block in page.get_text("blocks", textpage=textpage) if block[6] == 0]
+        return [box for box in pictures if sum(abs(box & text_box) for text_box in text_boxes) < 0.5 * abs(box)]
+
+    def _escalate(self, doc, renders, key, confidence):
+        """A MAX_RENDER_DPI render of an item whose first reading was unsure; None to keep it."""
+        index, clip, dpi = renders[key]
+        if confidence is None or confidence >= MIN_CONFIDENCE or dpi >= MAX_RENDER_DPI:
+            return None
+        image, new_dpi = self._render(doc[index], clip, MAX_RENDER_DPI)
+        if new_dpi <= dpi:
+            return None  # Already as large as MAX_DIM allows
+        renders[key] = (index, clip, new_dpi)
+        self.escalations += 1
+        return image
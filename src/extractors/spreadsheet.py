@@ -0,0 +1,152 @@
+"""
+Module: Streaming Spreadsheet Extractor
+Description: Every row of CSV / XLSX / XLS files, read as a stream and
+             emitted as row-window "pages".
+
+The previous extractor read the first 20 rows of each sheet into a pandas
+DataFrame, so most of a ledger or bank export was never indexed, and reading
+more would have loaded whole workbooks into memory. Here:
+  - CSV rows come from the csv module, XLSX rows from openpyxl in read-only
+    mode, XLS rows from xlrd. Nothing holds more than one page of rows.
+  - a page is a window of consecutive rows, closed at `rows_per_page` rows or
+    `page_chars` characters (default: one chunk), so chunks end on row
+    boundaries
+  - every page repeats its sheet name and header row, so each chunk says
+    what its columns are
+  - pages are numbered across sheets (1, 2, ... for the whole file)
+"""
+
+import csv
+import datetime
+import os
+
+from src.config.loader import SETTINGS
+from .base import BaseExtractor
+
+# --- CONFIGURATION ---
+SHEET_CFG = SETTINGS.get('spreadsheet', {})
+ROWS_PER_PAGE = SHEET_CFG.get('rows_per_page', 50)
+# Default: the chunker's stride, so a page becomes exactly one chunk
+PAGE_CHARS = SHEET_CFG.get('page_chars', 0) or (SETTINGS['system']['chunk_size'] - SETTINGS['system']['chunk_overlap'])
+# Data rows read per sheet; 0 = all of them
+MAX_ROWS = SHEET_CFG.get('max_rows', 0)
+
+CELL_SEPARATOR = " | "
+# Enough of a CSV to detect its delimiter
+SNIFF_BYTES = 64 * 1024
+# Fields longer than the csv default (128 KB) are kept, not an error
+csv.field_size_limit(2**31 - 1)
+
+
+def _cell(value):
+    if isinstance(value, str):  # Every CSV cell, most XLSX cells
+        return " ".join(value.split())
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime.datetime) and value.time() == datetime.time():
+        return value.date().isoformat()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+def _line(row):
+    """One row as text; empty cells at the end are dropped, '' for an empty row."""
+    cells = [_cell(value) for value in row]
+    while cells and not cells[-1]:
+        cells.pop()
+    return CELL_SEPARATOR.join(cells)
+
+
+# --- ROW SOURCES: (sheet name, iterator of rows) ---
+def _csv_sheets(file_path):
+    with open(file_path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+        sample = f.read(SNIFF_BYTES)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        yield os.path.basename(file_path), csv.reader(f, dialect)
+
+def _xlsx_sheets(file_path):
+    import openpyxl
+    # read_only streams the sheet XML; data_only gives cached values instead of formulas
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield sheet.title, sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def _xls_sheets(file_path):
+    import xlrd
+    # on_demand: one sheet in memory at a time (.xls caps sheets at 65,536 rows)
+    workbook = xlrd.open_workbook(file_path, on_demand=True)
+
+    def rows(sheet):
+        # .xls stores dates as day numbers; only the cell type says which numbers are dates
+        for row in sheet.get_rows():
+            yield [xlrd.xldate_as_datetime(cell.value, workbook.datemode) if cell.ctype == xlrd.XL_CELL_DATE
+                   else cell.value for cell in row]
+
+    try:
+        for index in range(workbook.nsheets):
+            sheet = workbook.sheet_by_index(index)
+            yield sheet.name, rows(sheet)
+            workbook.unload_sheet(index)
+    finally:
+        workbook.release_resources()
+
+SHEET_READERS = {'.csv': _csv_sheets, '.xlsx': _xlsx_sheets, '.xlsm': _xlsx_sheets, '.xls': _xls_sheets}
+
+
+def row_pages(sheets, rows_per_page=ROWS_PER_PAGE, page_chars=PAGE_CHARS, max_rows=MAX_ROWS):
+    """
+    (sheet name, rows) pairs -> page texts. The first non-empty row of a sheet
+    is its header and opens every page of that sheet.
+    """
+    for sheet_name, rows in sheets:
+        header, lines, size, first, last, taken = None, [], 0, 0, 0, 0
+        for number, row in enumerate(rows, 1):
+            line = _line(row)
+            if not line:
+                continue
+            if header is None:
+                header = line
+                # The "Sheet: ... (rows a-b)" line and the header open every page
+                reserved = len(sheet_name) + len(header) + 40
+                continue
+            if lines and (len(lines) >= rows_per_page or reserved + size + len(line) > page_chars):
+                yield _page(sheet_name, header, first, last, lines)
+                lines, size = [], 0
+            if not lines:
+                first = number
+            lines.append(line)
+            last = number
+            size += len(line) + 1
+            taken += 1
+            if max_rows and taken >= max_rows:
+                break
+        if lines:
+            yield _page(sheet_name, header, first, last, lines)
+        elif header is not None:
+            yield f"Sheet: {sheet_name}\n{header}"  # A header-only sheet
+
+def _page(sheet_name, header, first, last, lines):
+    return f"Sheet: {sheet_name} (rows {first}-{last})\n{header}\n" + "\n".join(lines)
+
+
+class StreamingSpreadsheetExtractor(BaseExtractor):
+    def extract(self, file_path):
+        ext = os.path.splitext(file_path)[1].lower()
+        reader = SHEET_READERS.get(ext, _xlsx_sheets)
+        try:
+            for page_number, text in enumerate(row_pages(reader(file_path)), 1):
+                yield page_number, text
+        except Exception as e:
+            print(f"⚠️ Spreadsheet Error {file_path}: {e}")
+
+# Settings files written before the streaming extractor still name the old class
+SpreadsheetExtractor = StreamingSpreadsheetExtractor
@@ -1,5 +1,6 @@
 import sys
 import os
+import argparse
 import warnings # <--- Add this
 
 # --- SILENCE MPS WARNINGS ---
@@ -12,24 +13,51 @@ warnings.filterwarnings("ignore", category=UserWarning, module='torch.utils.data
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.agents.scanner_agent.scanner import scan_directory
-from src.agents.embedding_agent.embedder import embed_documents
+from src.agents.scanner_agent.hasher import HASH_MODES
+# NOTE: The embedder (torch, sentence-transformers) is imported inside __main__.
+# Extraction workers are spawned, and spawned processes re-import this file;
+# keeping the import out of module scope keeps every worker light.
 
 # --- CONFIGURATION ---
 TARGET_FOLDER = "/volumes/Extreme SSD/Documents"
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scan and index personal documents.")
+    parser.add_argument(
+        "--hash-mode", choices=HASH_MODES, default=None,
+        help="'full' hashes every byte, 'sampled' hashes size + head/middle/tail (default: settings.yaml)"
+    )
+    parser.add_argument(
+        "--reindex", action="store_true",
+        help="Re-chunk and re-embed every file (e.g. after changing chunk_size or the model). "
+             "Stored extractions are reused, so nothing is OCR'd again."
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="After the first pass, keep running and index changes as they happen (filesystem events)."
+    )
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    from src.agents.embedding_agent.embedder import embed_documents
     try:
-        print("--- 🏁 STARTING PIPELINE ---")
-        
-        # Step 1: Scan for new/modified files
-        print("\n--- [STEP 1] SCANNING ---")
-        scan_directory(TARGET_FOLDER)
-        
-        # Step 2: Generate AI Embeddings
-        print("\n--- [STEP 2] EMBEDDING ---")
-        embed_documents()
-        
-        print("\n--- 🎉 PIPELINE FINISHED SUCCESSFULLY ---")
+        if args.watch:
+            # One catch-up pass (scan + embed), then follow filesystem events until Ctrl-C
+            from src.agents.scanner_agent.watcher import watch_directory
+            watch_directory(TARGET_FOLDER, hash_mode=args.hash_mode, reindex=args.reindex)
+        else:
+            print("--- 🏁 STARTING PIPELINE ---")
+            
+            # Step 1: Scan for new/modified files
+            print("\n--- [STEP 1] SCANNING ---")
+            scan_directory(TARGET_FOLDER, hash_mode=args.hash_mode)
+            
+            # Step 2: Generate AI Embeddings
+            print("\n--- [STEP 2] EMBEDDING ---")
+            embed_documents(reindex=args.reindex)
+            
+            print("\n--- 🎉 PIPELINE FINISHED SUCCESSFULLY ---")
         
     except KeyboardInterrupt:
         print("\n🛑 Pipeline stopped by user.")
@@ -0,0 +1,84 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+import pyarrow as pa
+import lancedb
+
+# Path Setup
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.common.binary_codes import CODE_COLUMN, binary_query, code_array, rerank
+
+# --- BENCHMARK: Two-Stage Binary Search vs Exact Search ---
+# Builds a synthetic 'chunks'-like table (normalized, clustered vectors like
+# bge output + their sign codes) in a temp dir. Compares the current exact
+# path (float32 brute force) with Hamming-over-codes + exact rerank of the top
+# `k * factor` candidates. Recall@k is measured against the exact top-k.
+
+def build_table(db, rows, dim, clusters=256, seed=7):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, rows)
+    vectors = centers[labels] + 0.8 * rng.standard_normal((rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    flat = pa.array(vectors.ravel(), type=pa.float32())
+    data = pa.table({
+        'id': [f"chunk_{i}" for i in range(rows)],
+        'vector': pa.FixedSizeListArray.from_arrays(flat, dim),
+        CODE_COLUMN: code_array(vectors),
+    })
+    return db.create_table("chunks", data=data), vectors
+
+def timed(fn, queries):
+    """Returns (id sets per query, latencies in ms)."""
+    found, latencies = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        ids = fn(q)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        found.append(ids)
+    return found, np.array(latencies)
+
+def row(label, recall, lat):
+    print(f"{label:<26} | {recall:>9.3f} | {np.percentile(lat, 50):>8.2f} | {np.percentile(lat, 95):>8.2f}")
+
+def run(rows, dim, n_queries, k, factors):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = lancedb.connect(tmp)
+        print(f"📦 Building {rows:,} x {dim} vectors (+ {dim // 8}-byte codes)...")
+        table, vectors = build_table(db, rows, dim)
+
+        rng = np.random.default_rng(1)
+        queries = vectors[rng.integers(0, rows, n_queries)] + 0.02 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+        def exact(q):
+            res = (table.search(q, vector_column_name='vector').bypass_vector_index()
+                   .limit(k).select(['id', '_distance']).to_arrow())
+            return set(res['id'].to_pylist())
+
+        truth, lat = timed(exact, queries)
+        print(f"\n{'mode':<26} | {'recall@' + str(k):>9} | {'p50 ms':>8} | {'p95 ms':>8}")
+        print("-" * 60)
+        row("exact float32 (current)", 1.0, lat)
+
+        for factor in factors:
+            depth = k * factor
+            def two_stage(q):
+                candidates = binary_query(table, q).limit(depth).select(['id', 'vector', '_distance']).to_list()
+                return {r['id'] for r in rerank(candidates, q, k)}
+            found, lat = timed(two_stage, queries)
+            recall = np.mean([len(f & t) / k for f, t in zip(found, truth)])
+            row(f"binary + rerank top {depth}", recall, lat)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs latency: exact search vs binary two-stage search.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--factors", type=int, nargs="+", default=[5, 10, 20, 50],
+                        help="Rerank depth as a multiple of k")
+    args = parser.parse_args()
+    run(args.rows, args.dim, args.queries, args.k, args.factors)
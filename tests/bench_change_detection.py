@@ -0,0 +1,115 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Path Setup
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.agents.embedding_agent.changes import detect_changes, stat_paths
+
+# --- BENCHMARK: Change Detection ("IDENTIFY TASKS") ---
+# Compares the old per-row loop (iterrows + os.path.* + Python zero-vector scan)
+# with the vectorized version (projection + batched stat + NumPy masks).
+# Paths point at a pool of real temp files, so every stat call hits the filesystem.
+
+FILE_POOL = 1000
+VECTOR_POOL = 1000
+
+def legacy_identify(df, expected_dim):
+    """The pre-refactor loop from embed_documents, kept verbatim for comparison."""
+    tasks = []
+    files_to_delete = []
+    has_vector_col = 'vector' in df.columns
+    for _, row in df.iterrows():
+        f_path = row['file_path']
+        if not os.path.exists(f_path):
+            files_to_delete.append(f_path)
+            continue
+        disk_mtime = os.path.getmtime(f_path)
+        db_mtime = row.get('last_modified', 0)
+        if pd.isna(db_mtime): db_mtime = 0
+        val = row.get('vector')
+        should_reindex = False
+        if not has_vector_col: should_reindex = True
+        elif val is None: should_reindex = True
+        elif isinstance(val, float) and pd.isna(val): should_reindex = True
+        elif hasattr(val, '__len__'):
+            if len(val) != expected_dim: should_reindex = True
+            elif all(v == 0.0 for v in val): should_reindex = True
+        if (disk_mtime - db_mtime > 1.0): should_reindex = True
+        if should_reindex:
+            files_to_delete.append(f_path)
+            tasks.append(row.to_dict())
+    return tasks, files_to_delete
+
+def vectorized_identify(state):
+    paths = state['file_path'].to_pylist()
+    exists, disk_mtime = stat_paths(paths)
+    return detect_changes(
+        state['status'],
+        state['chunk_count'].to_numpy(),
+        state['last_modified'].to_numpy(),
+        exists, disk_mtime,
+    )
+
+def build_fixtures(n_rows, pool_paths, dim):
+    rng = np.random.default_rng(42)
+    paths = [pool_paths[i % len(pool_paths)] for i in range(n_rows)]
+    mtimes = np.full(n_rows, time.time() + 3600.0)   # "indexed after the last edit"
+    pending = rng.random(n_rows) < 0.01              # ~1% of files changed
+
+    # Legacy layout: one DataFrame row per chunk, 1024-float vector included.
+    # Vectors are shared views of a small pool to keep the fixture in RAM.
+    pool = rng.standard_normal((VECTOR_POOL, dim)).astype(np.float32)
+    pool[0] = 0.0  # Some rows carry the scanner's zero placeholder
+    vectors = [pool[0] if p else pool[1 + i % (VECTOR_POOL - 1)] for i, p in enumerate(pending)]
+    legacy_df = pd.DataFrame({'file_path': paths, 'last_modified': mtimes, 'vector': vectors})
+
+    # New layout: the 4-column projection of the 'files' table.
+    state = pa.table({
+        'file_path': paths,
+        'last_modified': mtimes,
+        'status': np.where(pending, 'pending', 'indexed'),
+        'chunk_count': np.where(pending, 0, 3),
+    })
+    return legacy_df, state
+
+def run(sizes, dim, legacy_limit):
+    with tempfile.TemporaryDirectory() as tmp:
+        pool_paths = []
+        for i in range(FILE_POOL):
+            p = os.path.join(tmp, f"doc_{i}.txt")
+            with open(p, 'w') as f: f.write("x")
+            pool_paths.append(p)
+
+        print(f"{'rows':>10} | {'legacy (s)':>11} | {'vectorized (s)':>14} | {'speedup':>8}")
+        print("-" * 54)
+        for n in sizes:
+            legacy_df, state = build_fixtures(n, pool_paths, dim)
+
+            t0 = time.perf_counter()
+            purge, embed, _ = vectorized_identify(state)
+            t_new = time.perf_counter() - t0
+
+            if n <= legacy_limit:
+                t0 = time.perf_counter()
+                tasks, _ = legacy_identify(legacy_df, dim)
+                t_old = time.perf_counter() - t0
+                assert len(tasks) == int(embed.sum()), "Both paths must select the same files"
+                print(f"{n:>10,} | {t_old:>11.2f} | {t_new:>14.3f} | {t_old / t_new:>7.0f}x")
+            else:
+                print(f"{n:>10,} | {'(skipped)':>11} | {t_new:>14.3f} | {'-':>8}")
+            del legacy_df, state
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark change detection: legacy loop vs vectorized.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--legacy-limit", type=int, default=1_000_000,
+                        help="Skip the legacy loop above this many rows (it takes minutes at 1M)")
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.legacy_limit)
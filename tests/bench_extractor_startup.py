@@ -0,0 +1,89 @@
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+
+# Path Setup
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+# --- BENCHMARK: Extractor Startup ("WORKER COLD START") ---
+# What a fresh extraction worker pays before its first file of each type:
+# import time of the extractor's module stack and the process RSS afterwards.
+# Every row runs in its own process, like a newly spawned / recycled worker.
+#   baseline : worker module + factory only (no extractor resolved)
+#   <Class>  : baseline + that extractor (lazy registry)
+#   all      : every extractor, as the old eager `from src.extractors import *` did
+# With --sample .png=scan.png the first extraction is timed too (for images
+# and scanned PDFs that is where the OCR engine gets created).
+
+def child(target, sample=None):
+    import psutil
+    proc = psutil.Process()
+    t0 = time.perf_counter()
+    from src.agents.embedding_agent import worker  # noqa: F401  (what a worker unpickles)
+    from src.common.factory import ExtractorFactory
+    import src.extractors as extractors
+    result = {'base_s': time.perf_counter() - t0}
+
+    t0 = time.perf_counter()
+    if target == 'all':
+        for name in extractors.__all__:
+            getattr(extractors, name)
+    elif target != 'baseline':
+        extractor = getattr(extractors, target)()
+    result['import_s'] = time.perf_counter() - t0
+    result['rss_mb'] = proc.memory_info().rss / 2**20
+
+    if sample and target not in ('all', 'baseline'):
+        t0 = time.perf_counter()
+        pages = sum(1 for _ in extractor.extract(sample))
+        result['first_file_s'] = time.perf_counter() - t0
+        result['pages'] = pages
+        result['rss_after_file_mb'] = proc.memory_info().rss / 2**20
+    result['modules'] = {m: m in sys.modules for m in ('paddleocr', 'fitz', 'cv2', 'pandas', 'docx', 'pptx')}
+    print(json.dumps(result))
+
+def run_child(target, sample=None):
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', target]
+    if sample:
+        cmd += ['--sample', sample]
+    done = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if done.returncode != 0:
+        return {'error': (done.stderr.strip().splitlines() or ['?'])[-1]}
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup cost and RSS per extractor type.")
+    parser.add_argument('--sample', action='append', default=[],
+                        help="EXT=PATH, e.g. .pdf=scan.pdf: also time the first extraction")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.sample[0] if args.sample else None)
+        return
+
+    from src.config.loader import SETTINGS
+    mapping = SETTINGS.get('supported_extensions', {})
+    samples = dict(s.split('=', 1) for s in args.sample)
+    targets = ['baseline'] + list(dict.fromkeys(mapping.values())) + ['all']
+    sample_for = {mapping[ext]: path for ext, path in samples.items() if ext in mapping}
+
+    print(f"{'Extractor':<22} {'Import':>9} {'RSS':>9} {'1st file':>9} {'RSS after':>10}  Heavy modules loaded")
+    print("-" * 96)
+    for target in targets:
+        r = run_child(target, sample_for.get(target))
+        if 'error' in r:
+            print(f"{target:<22} ❌ {r['error']}")
+            continue
+        first = f"{r['first_file_s']:.2f}s" if 'first_file_s' in r else "-"
+        after = f"{r['rss_after_file_mb']:.0f} MB" if 'rss_after_file_mb' in r else "-"
+        loaded = ", ".join(m for m, on in r['modules'].items() if on) or "none"
+        import_s = r['base_s'] if target == 'baseline' else r['import_s']
+        print(f"{target:<22} {import_s:>8.2f}s {r['rss_mb']:>6.0f} MB {first:>9} {after:>10}  {loaded}")
+
+if __name__ == "__main__":
+    main()
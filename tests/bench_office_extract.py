@@ -0,0 +1,139 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import subprocess
+
+# Path Setup
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+# --- BENCHMARK: Office Extraction ("OOXML FAST PATH vs PYTHON-DOCX/PPTX") ---
+# Files/sec of DocxExtractor and SlideExtractor over a corpus of .docx/.pptx
+# files, with the streaming XML fast path (ooxml.py) and with it switched
+# off (the python-docx / python-pptx object model, as before).
+# By default a corpus of generated reports and decks is written to a temp
+# dir; --corpus points at a real folder instead.
+# Every case runs in its own process so imports and peak RSS are not shared.
+
+WORDS = ("invoice payment account balance quarter report meeting budget contract "
+         "tax insurance policy customer supplier delivery schedule review summary").split()
+
+def sentence(rng, words=14):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def make_docx(path, rng):
+    import docx
+    from docx.enum.text import WD_BREAK
+    doc = docx.Document()
+    for page in range(rng.randint(1, 6)):
+        doc.add_heading(f"Section {page + 1}", level=1)
+        for _ in range(rng.randint(5, 25)):
+            doc.add_paragraph(" ".join(sentence(rng) for _ in range(3)))
+        if rng.random() < 0.5:
+            table = doc.add_table(rows=rng.randint(3, 12), cols=4)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = rng.choice(WORDS)
+        doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+    doc.save(path)
+
+def make_pptx(path, rng):
+    import pptx
+    from pptx.util import Inches
+    prs = pptx.Presentation()
+    for s in range(rng.randint(3, 20)):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = f"Slide {s + 1}: {rng.choice(WORDS)}"
+        body = slide.placeholders[1].text_frame
+        body.text = sentence(rng, 8)
+        for _ in range(rng.randint(2, 6)):
+            body.add_paragraph().text = sentence(rng, 8)
+        if rng.random() < 0.3:
+            table = slide.shapes.add_table(4, 3, Inches(1), Inches(5), Inches(6), Inches(1.5)).table
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = rng.choice(WORDS)
+    prs.save(path)
+
+def make_corpus(folder, count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        if i % 2:
+            make_pptx(os.path.join(folder, f"deck_{i:05d}.pptx"), rng)
+        else:
+            make_docx(os.path.join(folder, f"report_{i:05d}.docx"), rng)
+
+def corpus_files(folder):
+    files = []
+    for dirpath, _, names in os.walk(folder):
+        files += [os.path.join(dirpath, n) for n in names if n.lower().endswith(('.docx', '.pptx'))]
+    return sorted(files)
+
+def child(case, folder):
+    from src.extractors import office
+    office.FAST_PATH = case == 'fast'
+    extractors = {'.docx': office.DocxExtractor(), '.pptx': office.SlideExtractor()}
+    files = corpus_files(folder)
+    pages = chars = 0
+    t0 = time.perf_counter()
+    for path in files:
+        for _, text in extractors[os.path.splitext(path)[1].lower()].extract(path):
+            pages += 1
+            chars += len(text)
+    result = {'files': len(files), 'pages': pages, 'chars': chars, 'seconds': time.perf_counter() - t0}
+    # ru_maxrss is KB on Linux
+    result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(result))
+
+def run_child(case, folder):
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', case, folder]
+    done = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if done.returncode != 0:
+        return {'error': (done.stderr.strip().splitlines() or ['?'])[-1]}
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+def report(folder):
+    files = corpus_files(folder)
+    size_mb = sum(os.path.getsize(f) for f in files) / 2**20
+    print(f"Corpus: {len(files):,} files ({size_mb:.0f} MB) in {folder}")
+    print(f"{'Case':<10} {'Seconds':>8} {'Files/s':>9} {'Pages':>8} {'Chars':>12} {'Peak RSS':>10}")
+    print("-" * 62)
+    results = {}
+    for case in ('library', 'fast'):
+        r = results[case] = run_child(case, folder)
+        if 'error' in r:
+            print(f"{case:<10} ❌ {r['error']}")
+            continue
+        seconds = max(r['seconds'], 1e-9)
+        print(f"{case:<10} {seconds:>8.1f} {r['files'] / seconds:>9.0f} {r['pages']:>8,} {r['chars']:>12,} {r['peak_rss_mb']:>7.0f} MB")
+    if not any('error' in r for r in results.values()):
+        print(f"\n🚀 Speedup: {results['library']['seconds'] / max(results['fast']['seconds'], 1e-9):.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="OOXML fast path vs python-docx/python-pptx.")
+    parser.add_argument('--files', type=int, default=2000, help="Files in the generated corpus (half .docx, half .pptx)")
+    parser.add_argument('--corpus', help="Folder of real .docx/.pptx files to use instead")
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    if args.corpus:
+        report(os.path.abspath(args.corpus))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        make_corpus(tmp, args.files)
+        print(f"   (generated {args.files:,} files in {time.perf_counter() - t0:.1f}s)")
+        report(tmp)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import sys
+import os
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+# Path Setup
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+# --- BENCHMARK: PDF OCR Rendering ("FIXED 300 DPI vs ADAPTIVE") ---
+# Pages/sec and peak RSS of PDFExtractor on the same files in each render mode
+# (ocr.pdf_render):
+#   fixed    : whole page, 300 DPI, colour, copied out of the pixmap
+#   adaptive : grayscale view of the pixmap at ocr.pdf_dpi, re-rendered at
+#              ocr.pdf_max_dpi when confidence is low; only the text-less
+#              pictures of pages that have a text layer
+# `render` rows time rendering alone (what a worker does while OCR runs
+# elsewhere, in the OCR service); `full` rows add OCR on a local engine.
+# Every row runs in its own process so peak RSS is not shared between modes.
+
+def child(mode, stage, paths):
+    from src.extractors.pdf import PDFExtractor
+    import fitz
+
+    extractor = PDFExtractor(render=mode)
+    result = {'pages': 0, 'images': 0, 'image_mb': 0.0}
+    t0 = time.perf_counter()
+    for path in paths:
+        if stage == 'full':
+            result['pages'] += sum(1 for _ in extractor.extract(path))
+            continue
+        with fitz.open(path) as doc:
+            result['pages'] += len(doc)
+            for _, _, image in extractor._pages(doc, None, {}):
+                if image is not None:
+                    result['images'] += 1
+                    result['image_mb'] += image.nbytes / 2**20
+    result['seconds'] = time.perf_counter() - t0
+    result['escalations'] = extractor.escalations
+    result['regions'] = extractor.regions
+    # ru_maxrss is KB on Linux
+    result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(result))
+
+def run_child(mode, stage, paths):
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', mode, stage] + paths
+    done = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if done.returncode != 0:
+        return {'error': (done.stderr.strip().splitlines() or ['?'])[-1]}
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed 300 DPI vs adaptive OCR rendering of PDF pages.")
+    parser.add_argument('pdfs', nargs='*', help="PDF files (scanned, mixed, ...)")
+    parser.add_argument('--render-only', action='store_true', help="Skip the OCR rows (no PaddleOCR needed)")
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.pdfs)
+        return
+    if not args.pdfs:
+        parser.error("give at least one PDF")
+
+    paths = [os.path.abspath(p) for p in args.pdfs]
+    stages = ['render'] if args.render_only else ['render', 'full']
+    print(f"{'Mode':<10} {'Stage':<7} {'Pages':>6} {'Pages/s':>9} {'Peak RSS':>10} {'OCR imgs':>9} {'MB/img':>7} {'Re-render':>9} {'Regions':>8}")
+    print("-" * 86)
+    for stage in stages:
+        for mode in ('fixed', 'adaptive'):
+            r = run_child(mode, stage, paths)
+            if 'error' in r:
+                print(f"{mode:<10} {stage:<7} ❌ {r['error']}")
+                continue
+            per_image = f"{r['image_mb'] / r['images']:.2f}" if r['images'] else "-"
+            images = r['images'] if stage == 'render' else "-"
+            print(f"{mode:<10} {stage:<7} {r['pages']:>6} {r['pages'] / max(r['seconds'], 1e-9):>9.1f} "
+                  f"{r['peak_rss_mb']:>7.0f} MB {images:>9} {per_image:>7} {r['escalations']:>9} {r['regions']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import sys
+import os
+import csv
+import json
+import time
+import random
+import argparse
+import resource
+import datetime
+import tempfile
+import subprocess
+
+# Path Setup
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+# --- BENCHMARK: Spreadsheet Extraction ("STREAMING vs DATAFRAME") ---
+# Throughput and peak RSS of StreamingSpreadsheetExtractor on a generated
+# bank-ledger export (1M rows CSV by default, plus an XLSX), against reading
+# the same file whole into pandas, which is what indexing every row with the
+# old DataFrame-based extractor would have taken.
+# Every row runs in its own process so peak RSS is not shared between cases.
+
+PAYEES = ["ACME Corp", "City Utilities", "Grocery Mart", "Rent", "Salary", "Pharmacy", "Fuel Station", "Bookshop"]
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    day = datetime.date(2015, 1, 1)
+    balance = 1000.0
+    yield ["Date", "Payee", "Category", "Amount", "Balance", "Reference"]
+    for i in range(count):
+        amount = round(rng.uniform(-250, 250), 2)
+        balance = round(balance + amount, 2)
+        yield [(day + datetime.timedelta(days=i // 40)).isoformat(), rng.choice(PAYEES),
+               "Income" if amount > 0 else "Expense", amount, balance, f"TX{i:09d}"]
+
+def make_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        csv.writer(f).writerows(make_rows(rows))
+
+def make_xlsx(path, rows, sheets=2):
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    for s in range(sheets):
+        sheet = workbook.create_sheet(f"Account {s + 1}")
+        for row in make_rows(rows // sheets, seed=s):
+            sheet.append(row)
+    workbook.save(path)
+
+def child(case, path):
+    result = {}
+    t0 = time.perf_counter()
+    if case == 'stream':
+        from src.extractors.spreadsheet import StreamingSpreadsheetExtractor
+        pages = chars = 0
+        for _, text in StreamingSpreadsheetExtractor().extract(path):
+            pages += 1
+            chars += len(text)
+        result.update(pages=pages, chars=chars)
+    else:
+        import pandas as pd
+        if path.endswith('.csv'):
+            frames = [pd.read_csv(path)]
+        else:
+            frames = list(pd.read_excel(path, sheet_name=None).values())
+        result['rows'] = sum(len(f) for f in frames)
+    result['seconds'] = time.perf_counter() - t0
+    # ru_maxrss is KB on Linux
+    result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(result))
+
+def run_child(case, path):
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', case, path]
+    done = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if done.returncode != 0:
+        return {'error': (done.stderr.strip().splitlines() or ['?'])[-1]}
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming spreadsheet extraction vs whole-file DataFrames.")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Data rows in the generated CSV")
+    parser.add_argument('--xlsx-rows', type=int, default=200_000, help="Data rows in the generated XLSX (0 = skip)")
+    parser.add_argument('--no-pandas', action='store_true', help="Skip the DataFrame rows")
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [(os.path.join(tmp, 'ledger.csv'), args.rows, make_csv)]
+        if args.xlsx_rows:
+            files.append((os.path.join(tmp, 'ledger.xlsx'), args.xlsx_rows, make_xlsx))
+
+        print(f"{'File':<12} {'Rows':>10} {'Size':>9} {'Case':<10} {'Seconds':>8} {'Rows/s':>10} {'MB/s':>7} {'Peak RSS':>10} {'Pages':>7}")
+        print("-" * 92)
+        for path, rows, make in files:
+            t0 = time.perf_counter()
+            make(path, rows)
+            print(f"   (generated {os.path.basename(path)} in {time.perf_counter() - t0:.1f}s)")
+            size_mb = os.path.getsize(path) / 2**20
+            for case in ['stream'] + ([] if args.no_pandas else ['dataframe']):
+                r = run_child(case, path)
+                name = os.path.basename(path)
+                if 'error' in r:
+                    print(f"{name:<12} {rows:>10,} {size_mb:>6.0f} MB {case:<10} ❌ {r['error']}")
+                    continue
+                seconds = max(r['seconds'], 1e-9)
+                print(f"{name:<12} {rows:>10,} {size_mb:>6.0f} MB {case:<10} {seconds:>8.1f} {rows / seconds:>10,.0f} "
+                      f"{size_mb / seconds:>7.1f} {r['peak_rss_mb']:>7.0f} MB {r.get('pages', '-'):>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+import pyarrow as pa
+import lancedb
+
+# Path Setup
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.common.vector_index import INDEX_TYPE, METRIC, ensure_vector_index, vector_query
+
+# --- BENCHMARK: ANN Index Recall vs Latency ---
+# Builds a synthetic 'chunks'-like table in a temp dir, then compares exact
+# (brute-force) search with the ANN index for several nprobes / refine_factor
+# settings. Recall@k is measured against the exact top-k of the same query.
+
+def build_table(db, rows, dim, clusters=256, seed=7):
+    """Clustered vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, rows)
+    vectors = centers[labels] + 0.3 * rng.standard_normal((rows, dim)).astype(np.float32)
+    flat = pa.array(vectors.ravel(), type=pa.float32())
+    data = pa.table({
+        'id': [f"chunk_{i}" for i in range(rows)],
+        'vector': pa.FixedSizeListArray.from_arrays(flat, dim),
+    })
+    return db.create_table("chunks", data=data), vectors
+
+def run_queries(fn, queries):
+    """Returns (ids per query, latencies in ms)."""
+    ids, latencies = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        hits = fn(q)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ids.append(hits)
+    return ids, np.array(latencies)
+
+def run(rows, dim, n_queries, k, nprobes_list, refine_list):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = lancedb.connect(tmp)
+        print(f"📦 Building {rows:,} x {dim} vectors...")
+        table, vectors = build_table(db, rows, dim)
+
+        rng = np.random.default_rng(1)
+        picks = rng.integers(0, rows, n_queries)
+        queries = vectors[picks] + 0.1 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+        def exact(q):
+            res = table.search(q).distance_type(METRIC).bypass_vector_index().limit(k).select(['id', '_distance']).to_arrow()
+            return set(res['id'].to_pylist())
+
+        truth, lat = run_queries(exact, queries)
+        print(f"\n{'mode':<28} | {'recall@' + str(k):>9} | {'p50 ms':>8} | {'p95 ms':>8}")
+        print("-" * 62)
+        print(f"{'exact (brute force)':<28} | {1.0:>9.3f} | {np.percentile(lat, 50):>8.2f} | {np.percentile(lat, 95):>8.2f}")
+
+        t0 = time.perf_counter()
+        ensure_vector_index(table, min_rows=0)
+        build_s = time.perf_counter() - t0
+
+        for nprobes in nprobes_list:
+            for refine in refine_list:
+                def ann(q):
+                    res = vector_query(table, q, nprobes=nprobes, refine_factor=refine).limit(k).select(['id', '_distance']).to_arrow()
+                    return set(res['id'].to_pylist())
+                found, lat = run_queries(ann, queries)
+                recall = np.mean([len(f & t) / k for f, t in zip(found, truth)])
+                label = f"{INDEX_TYPE} nprobes={nprobes} refine={refine or '-'}"
+                print(f"{label:<28} | {recall:>9.3f} | {np.percentile(lat, 50):>8.2f} | {np.percentile(lat, 95):>8.2f}")
+
+        print(f"\n🗂️  Index build: {build_s:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs latency: exact search vs the ANN index.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobes", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--refine", type=int, nargs="+", default=[0, 10])
+    args = parser.parse_args()
+    run(args.rows, args.dim, args.queries, args.k, args.nprobes, args.refine)
@@ -8,7 +8,7 @@ import pandas as pd
 # going up one level ('..') takes us to the Project Root.
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.common.db import get_table
+from src.common.db import get_files_table, get_table
 
 def inspect_database():
     print("--- 🕵️‍♂️ Starting Database Inspection ---")
@@ -34,6 +34,12 @@ def inspect_database():
         print(f"\n❌ WARNING: Found {total_rows - unique_ids} duplicate records!")
         print(df[df.duplicated(subset=['id'], keep=False)][['filename', 'id']])
 
+    # File Manifest (small table, no vectors)
+    files = get_files_table().to_pandas()
+    print(f"\n--- 🗂️  File Manifest: {len(files)} files ---")
+    if not files.empty:
+        print(files['status'].value_counts().to_string())
+
     print("\n--- 📄 First 5 Records ---")
     print(df[['filename', 'file_type', 'file_size_bytes']].head().to_string())
 
@@ -0,0 +1,37 @@
+import sys
+import os
+
+import lancedb
+import numpy as np
+import pytest
+
+# Path Setup
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.common.binary_codes import rerank
+
+# --- TEST: Exact rerank of binary-search candidates ---
+# The rerank must rank and score candidates exactly as LanceDB does in the
+# configured `vector_index.metric`, so binary and vector mode agree.
+
+DIM = 16
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(0)
+    return [{'id': f"h{i}_p1_0", 'vector': rng.normal(size=DIM).astype(np.float32).tolist()}
+            for i in range(50)]
+
+@pytest.mark.parametrize('metric', ['l2', 'cosine', 'dot'])
+def test_rerank_matches_lancedb(tmp_path, rows, metric):
+    query = np.random.default_rng(1).normal(size=DIM).astype(np.float32)
+    table = lancedb.connect(str(tmp_path)).create_table("chunks", data=rows)
+    expected = table.search(query).distance_type(metric).limit(5).select(['id', '_distance']).to_list()
+
+    ranked = rerank(rows, query, 5, metric=metric)
+    assert [r['id'] for r in ranked] == [r['id'] for r in expected]
+    assert np.allclose([r['_distance'] for r in ranked], [r['_distance'] for r in expected], atol=1e-4)
+    assert 'vector' not in ranked[0]
+
+def test_rerank_rejects_unknown_metric(rows):
+    with pytest.raises(ValueError):
+        rerank(rows, rows[0]['vector'], 5, metric='hamming')
@@ -0,0 +1,18 @@
+import sys
+import os
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# --- TEST: The search client stays light ---
+# The Streamlit app imports only client.py. It must not pull in lancedb
+# (and db.py, whose connect runs the store's migrations) or the model.
+
+HEAVY = ('lancedb', 'src.common.db', 'src.agents.search_agent.search', 'sentence_transformers')
+
+def test_client_imports_no_store():
+    code = ("import sys; import src.agents.search_agent.client; "
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    done = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    assert done.returncode == 0, done.stderr
+    assert done.stdout.strip() == ""
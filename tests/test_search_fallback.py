@@ -0,0 +1,40 @@
+import sys
+import os
+
+import lancedb
+import numpy as np
+import pytest
+
+# Path Setup
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.agents.search_agent import search
+
+# --- TEST: Search on a store without a full-text index ---
+# A freshly migrated store has chunks but no FTS index yet. 'hybrid' and
+# 'fts' must fall back to vector search instead of failing in LanceDB.
+
+DIM = 4
+
+@pytest.fixture
+def unindexed_table(tmp_path, monkeypatch):
+    rows = [
+        {'id': f"h{i}_p1_0", 'filename': f"doc{i}.txt", 'file_path': f"/docs/doc{i}.txt",
+         'page_number': 1, 'content': f"passport number X{i}", 'vector': [float(i)] * DIM}
+        for i in range(3)
+    ]
+    table = lancedb.connect(str(tmp_path)).create_table("chunks", data=rows)
+    monkeypatch.setattr(search, 'get_search_table', lambda: table)
+    monkeypatch.setattr(search, 'embed_queries',
+                        lambda queries, encoder=None: np.zeros((len(queries), DIM), dtype=np.float32))
+    return table
+
+@pytest.mark.parametrize('mode', ['hybrid', 'fts'])
+def test_falls_back_to_vector_search(unindexed_table, mode):
+    assert not search.has_text_index(unindexed_table)
+    timings = {}
+    hits = search.search_many(["passport"], limit=2, mode=mode, timings=timings)[0]
+    assert [h['filename'] for h in hits] == ["doc0.txt", "doc1.txt"]
+    assert 'fts' not in timings
+
+def test_search_documents_returns_hits(unindexed_table):
+    assert len(search.search_documents("passport", limit=3)) == 3
@@ -0,0 +1,49 @@
+import sys
+import os
+
+import lancedb
+import numpy as np
+import pytest
+
+# Path Setup
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.agents.search_agent import search
+from src.common.text_index import FTS_COLUMNS
+
+# --- TEST: Hybrid search over identical copies of a file ---
+# Chunk ids come from the content hash, so two copies of the same document
+# share every id. Rank fusion must keep one hit per path, scored <= 1.0.
+
+DIM = 4
+
+def _row(path, file_hash, content, value):
+    return {'id': f"{file_hash}_p1_0", 'filename': os.path.basename(path), 'file_path': path,
+            'page_number': 1, 'content': content, 'vector': [value] * DIM}
+
+def test_rrf_fuse_keeps_copies_apart():
+    a = _row("/docs/a/report.pdf", "h1", "tax form W-2", 0.0)
+    b = _row("/docs/b/report.pdf", "h1", "tax form W-2", 0.0)
+    fused = search.rrf_fuse([[a, b], [b, a]], limit=5)
+    assert sorted(r['file_path'] for r, _ in fused) == ["/docs/a/report.pdf", "/docs/b/report.pdf"]
+    assert all(score <= 1.0 for _, score in fused)
+
+@pytest.fixture
+def copies_table(tmp_path, monkeypatch):
+    rows = [
+        _row("/docs/a/report.pdf", "h1", "tax form W-2 wages", 0.0),
+        _row("/docs/b/report.pdf", "h1", "tax form W-2 wages", 0.0),
+        _row("/docs/c/notes.txt", "h2", "holiday plans", 5.0),
+    ]
+    table = lancedb.connect(str(tmp_path)).create_table("chunks", data=rows)
+    for column in FTS_COLUMNS:
+        table.create_fts_index(column, replace=True)
+    monkeypatch.setattr(search, 'get_search_table', lambda: table)
+    monkeypatch.setattr(search, 'embed_queries',
+                        lambda queries, encoder=None: np.zeros((len(queries), DIM), dtype=np.float32))
+    return table
+
+def test_hybrid_returns_every_copy(copies_table):
+    hits = search.search_many(["W-2"], limit=5, mode='hybrid')[0]
+    paths = [h['file_path'] for h in hits]
+    assert "/docs/a/report.pdf" in paths and "/docs/b/report.pdf" in paths
+    assert all(h['score'] <= 1.0 for h in hits)
@@ -0,0 +1,41 @@
+import sys
+import os
+
+# Path Setup
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.agents.embedding_agent.sharding import PdfSharder, PAGES_KEY, PAGE_TOTAL_KEY, SHARD_KEY
+
+# --- TEST: Reassembling the page shards of a large PDF ---
+# A shard whose extraction failed must fail the whole file: the other
+# shards' pages are never committed as if they were the complete document.
+
+PATH = "/docs/bundle.pdf"
+
+def _shard(index, count=3, size=10):
+    start = index * size
+    return {'file_path': PATH, 'filename': "bundle.pdf",
+            PAGES_KEY: (start, start + size), PAGE_TOTAL_KEY: count * size, SHARD_KEY: (index, count)}
+
+def _ok(index):
+    page = index * 10 + 1
+    chunks = [{'id': f"h_p{page}_0", 'page_number': page}]
+    return _shard(index), (chunks, {'extractor': "PDFExtractor", 'pages': [(page, "text", "native")], 'stored': False}), None
+
+def test_shards_merge_in_page_order():
+    merged = list(PdfSharder().merge([_ok(2), _ok(0), _ok(1)]))
+    assert len(merged) == 1
+    template, (chunks, extraction), error = merged[0]
+    assert error is None and SHARD_KEY not in template
+    assert [p for p, _, _ in extraction['pages']] == [1, 11, 21]
+    assert [c['page_number'] for c in chunks] == [1, 11, 21]
+
+def test_failed_shard_fails_the_file():
+    failed = (_shard(1), None, "RuntimeError: engine crashed")
+    template, result, error = next(PdfSharder().merge([_ok(0), failed, _ok(2)]))
+    assert result is None
+    assert error == "pages 11-20: RuntimeError: engine crashed"
+
+def test_shard_without_extraction_fails_the_file():
+    empty = (_shard(0), ([], None), None)
+    _, result, error = next(PdfSharder().merge([empty, _ok(1), _ok(2)]))
+    assert result is None and "pages 1-10" in error